@@ -1,5 +1,7 @@
 # -*- mode: python -*-
 import os
+import sys
+import subprocess
 
 block_cipher = None
 
@@ -25,6 +27,9 @@ def hiddenImportGet():
 				classNames.append('extensions'+cn+'.'+name)
 	return classNames
 
+# command manifest of the packaged extensions, so iLOrest starts without importing them all
+subprocess.check_call([sys.executable, os.path.join('src', 'rdmc.py'), 'manifest'])
+
 a = Analysis(['.//src//rdmc.py'],
              pathex=[],
              binaries=None,
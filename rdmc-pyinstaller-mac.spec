@@ -2,6 +2,7 @@
 import os
 import sys
 import compileall
+import subprocess
 
 block_cipher = None
 
@@ -40,9 +41,13 @@ def getData():
 			datalist.append(('./src/' + tempstr + '*.pyc', tempstr))
 
 	datalist.append(('./packaging/jsonpath_rw', 'jsonpath_rw'))
+	datalist.append(('./src/extensions/manifest.json', 'extensions'))
 
 	return datalist
 
+# command manifest of the packaged extensions, so iLOrest starts without importing them all
+subprocess.check_call([sys.executable, os.path.join('src', 'rdmc.py'), 'manifest'])
+
 compileall.compile_dir('.', force=True, quiet=True, legacy=True)
 
 a = Analysis(['.//src//rdmc.py'],
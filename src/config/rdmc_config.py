@@ -18,6 +18,10 @@
 """Rdmc config"""
 
 import os
+import collections
+
+from six.moves import configparser
+
 from config.config import AutoConfigParser
 
 class RdmcConfig(AutoConfigParser):
@@ -42,8 +46,14 @@ class RdmcConfig(AutoConfigParser):
         self._ac__commit = ''
         self._ac__format = ''
         self._ac__cachedir = ''
+        self._ac__cacheformat = ''
+        self._ac__etagcache = ''
         self._ac__savefile = ''
         self._ac__loadfile = ''
+        self._ac__ratelimit = ''
+        self._ac__ratelimitburst = ''
+        self._ac__globalratelimit = ''
+        self._ac__globalratelimitburst = ''
         self._ac__user_cert = ''
         self._ac__user_root_ca_key = ''
         self._ac__user_root_ca_password = ''
@@ -62,6 +72,26 @@ class RdmcConfig(AutoConfigParser):
         """
         self._configfile = config_file
 
+    def inventory(self):
+        """Targets of the [targets] section of the configuration file, each a name with the
+        login arguments of the server as value
+
+        :returns: ordered dictionary of target names to login arguments
+        """
+        inventory = collections.OrderedDict()
+        if not self._configfile or not os.path.isfile(self._configfile):
+            return inventory
+
+        config = configparser.RawConfigParser()
+        config.optionxform = str
+        try:
+            config.read(self._configfile)
+            for name, value in config.items('targets'):
+                inventory[name] = value
+        except (configparser.Error, IOError):
+            pass
+        return inventory
+
     @property
     def logdir(self):
         """Get the current log directory"""
@@ -181,6 +211,20 @@ class RdmcConfig(AutoConfigParser):
         """
         return self._set('cachedir', value)
 
+    @property
+    def cacheformat(self):
+        """Get the config file cache format"""
+        return self._get('cacheformat')
+
+    @cacheformat.setter
+    def cacheformat(self, value):
+        """Set the config file cache format
+
+        :param value: cache format, json or binary
+        :type value: str
+        """
+        return self._set('cacheformat', value)
+
     @property
     def defaultsavefilename(self):
         """Get the config file default save name"""
@@ -209,6 +253,47 @@ class RdmcConfig(AutoConfigParser):
         """
         return self._set('loadfile', value)
 
+    def _rate(self, key):
+        """Get a rate limiter setting as a number, 0 when not set
+
+        :param key: name of the setting
+        :type key: str
+        """
+        value = self._get(key)
+        try:
+            return float(value) if value else 0.0
+        except ValueError:
+            raise ValueError("Invalid value '%s' of the %s setting." % (value, key))
+
+    @property
+    def etagcache(self):
+        """Get the flag to send GETs with the ETags of earlier responses"""
+        value = self._get('etagcache')
+        if isinstance(value, bool):
+            return value
+
+        return value.lower() in ("yes", "true", "t", "1")
+
+    @property
+    def ratelimit(self):
+        """Get the requests per second sent to a server"""
+        return self._rate('ratelimit')
+
+    @property
+    def ratelimitburst(self):
+        """Get the requests sent to a server at once before the rate limit applies"""
+        return self._rate('ratelimitburst')
+
+    @property
+    def globalratelimit(self):
+        """Get the requests per second sent to all servers together"""
+        return self._rate('globalratelimit')
+
+    @property
+    def globalratelimitburst(self):
+        """Get the requests sent to all servers at once before the global rate limit applies"""
+        return self._rate('globalratelimitburst')
+
     @property
     def proxy(self):
         """Get proxy value to be set for communication"""
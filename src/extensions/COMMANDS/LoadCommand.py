@@ -20,14 +20,10 @@
 import os
 import sys
 import json
-import shlex
-import subprocess
+import time
 
-from datetime import datetime
 from argparse import ArgumentParser, SUPPRESS
 
-from six.moves import queue
-
 import redfish.ris
 
 from redfish.ris.rmc_helper import LoadSkipSettingError
@@ -35,9 +31,11 @@ from rdmc_helper import ReturnCodes, InvalidCommandLineError, \
     InvalidCommandLineErrorOPTS, InvalidFileFormattingError, \
     NoChangesFoundOrMadeError, InvalidFileInputError, \
     NoDifferencesFoundError, MultipleServerConfigError, \
-    InvalidMSCfileInputError, Encryption
+    Encryption
 
 from rdmc_base_classes import HARDCODEDLIST
+from rdmc_fleet import FleetRunner, DEFAULT_WORKERS, read_targets, output_directory, \
+    write_summary, run_line
 
 # default file name
 __filename__ = 'ilorest.json'
@@ -66,7 +64,6 @@ class LoadCommand():
         }
         self.filenames = None
         self.mpfilename = None
-        self.queue = queue.Queue()
         self.cmdbase = None
         self.rdmc = None
         self.auxcommands = dict()
@@ -137,7 +134,7 @@ class LoadCommand():
                     outputdir = options.outdirectory
 
                 if self.runmpfunc(mpfile=mfile, lfile=files,
-                                  outputdir=outputdir):
+                                  outputdir=outputdir, workers=options.workers):
                     return ReturnCodes.SUCCESS
                 else:
                     raise MultipleServerConfigError("One or more servers "
@@ -145,6 +142,7 @@ class LoadCommand():
 
             results = False
             validation_errs = []
+            selected = None
 
             for loadcontent in loadcontents:
                 for content, loaddict in loadcontent.items():
@@ -157,7 +155,10 @@ class LoadCommand():
                     if options.biospassword:
                         inputlist.extend(["--biospassword", options.biospassword])
 
-                    self.auxcommands['select'].selectfunction(inputlist)
+                    # saved files list every instance apart, their type is selected once
+                    if content != selected:
+                        self.auxcommands['select'].selectfunction(inputlist)
+                        selected = content
                     if self.rdmc.app.selector.lower() not in content.lower():
                         raise InvalidCommandLineError("Selector not found.\n")
 
@@ -239,6 +240,9 @@ class LoadCommand():
         if not self.filenames:
             self.filenames = [__filename__]
 
+        if options.workers < 1:
+            raise InvalidCommandLineError("The number of workers must be at least 1.")
+
     def verify_file(self, filedata, inputfile):
         """ Function used to handle oddly named files and convert to JSON
 
@@ -271,8 +275,9 @@ class LoadCommand():
 
         return contents
 
-    def runmpfunc(self, mpfile=None, lfile=None, outputdir=None):
-        """ Main worker function for multi file command
+    def runmpfunc(self, mpfile=None, lfile=None, outputdir=None, workers=DEFAULT_WORKERS):
+        """ Main worker function for multi file command. Servers are configured within this
+        process, at most workers at a time, each in a session of its own.
 
         :param mpfile: configuration file
         :type mpfile: string.
@@ -280,138 +285,43 @@ class LoadCommand():
         :type lfile: string.
         :param outputdir: custom output directory
         :type outputdir: string.
+        :param workers: maximum number of servers configured concurrently
+        :type workers: int.
         """
-        # self.logoutobj.run("")
-        data = self.validatempfile(mpfile=mpfile, lfile=lfile)
-
-        if not data:
+        self.rdmc.ui.printer('Checking given server information...\n')
+        if not mpfile:
             return False
 
-        processes = []
-        finalreturncode = True
-        outputform = '%Y-%m-%d-%H-%M-%S'
-
-        if outputdir:
-            if outputdir.endswith(('"', "'")) and outputdir.startswith(('"', "'")):
-                outputdir = outputdir[1:-1]
-
-            if not os.path.isdir(outputdir):
-                self.rdmc.ui.error("The give output folder path does not exist.\n")
-                raise InvalidCommandLineErrorOPTS("")
-
-            dirpath = outputdir
-        else:
-            dirpath = os.getcwd()
-
-        dirname = '%s_%s' % (datetime.now().strftime(outputform), 'MSClogs')
-        createdir = os.path.join(dirpath, dirname)
-        os.mkdir(createdir)
-
-        oofile = open(os.path.join(createdir, 'CompleteOutputfile.txt'), 'w+')
-        self.rdmc.ui.printer('Create multiple processes to load configuration '
-                             'concurrently to all servers...\n')
-
-        while True:
-            if not self.queue.empty():
-                line = self.queue.get()
-            else:
-                break
-
-            finput = '\n' + 'Output for ' + line[line.index('--url') + 1] + ': \n\n'
-            urlvar = line[line.index('--url') + 1]
-
-            if 'python' in os.path.basename(sys.executable.lower()):
-                # If we are running from source we have to add the python file to the command
-                listargforsubprocess = [sys.executable, sys.argv[0]] + line
-            else:
-                listargforsubprocess = [sys.executable] + line
-
-            if os.name != 'nt':
-                listargforsubprocess = " ".join(listargforsubprocess)
-
-            urlfilename = urlvar.split('//')[-1]
-            logfile = open(os.path.join(createdir, urlfilename + ".txt"), "w+")
-            pinput = subprocess.Popen(listargforsubprocess, shell=True,
-                                      stdout=logfile, stderr=logfile)
-
-            processes.append((pinput, finput, urlfilename, logfile))
-
-        for pinput, finput, urlfilename, logfile in processes:
-            pinput.wait()
-            returncode = pinput.returncode
-            finalreturncode = finalreturncode and not returncode
-
-            logfile.close()
-            logfile = open(os.path.join(createdir, urlfilename + ".txt"), "r+")
-            oofile.write(finput + str(logfile.read()))
-            oofile.write('-x+x-' * 16)
-            logfile.close()
+        targets = read_targets(mpfile, minargs=5)
+        createdir = output_directory(outputdir)
+        jobs = [(name, " ".join(['load'] + args + ['-f', str(lfile)])) for name, args in targets]
 
-            if returncode == 0:
-                self.rdmc.ui.printer('Loading Configuration for {} : SUCCESS\n'.format(urlfilename))
-            else:
-                self.rdmc.ui.error('Loading Configuration for {} : FAILED\n'.format(urlfilename))
-                self.rdmc.ui.error('ILOREST return code : {}.\nFor more details please check ' \
-                                   '{}.txt under {} directory.\n'.format(returncode, urlfilename, createdir))
-
-        oofile.close()
+        self.rdmc.ui.printer('Loading configuration to {} servers, {} at a time...\n'.\
+                             format(len(jobs), min(workers, len(jobs))))
+        started = time.time()
+        results = FleetRunner(self.rdmc, workers, task=self.loadtask).\
+            run_logged(jobs, createdir, 'Loading Configuration')
+        finalreturncode = not write_summary(createdir, results, started, file=lfile, \
+                                            workers=workers)['failed']
 
         if finalreturncode:
             self.rdmc.ui.printer('All servers have been successfully configured.\n')
 
         return finalreturncode
 
-    def validatempfile(self, mpfile=None, lfile=None):
-        """ Validate temporary file
+    @staticmethod
+    def loadtask(session, line):
+        """ Loads the configuration of a server with at least verbose level 1, the log of
+        every server keeps the output it had when each server was loaded by a process with -v
 
-        :param mpfile: configuration file
-        :type mpfile: string.
-        :param lfile: custom file name
-        :type lfile: string.
+        :param session: session of the server
+        :type session: RdmcCommand.
+        :param line: load command line of the server
+        :type line: str.
         """
-        self.rdmc.ui.printer('Checking given server information...\n')
-
-        if not mpfile:
-            return False
-
-        if not os.path.isfile(mpfile):
-            raise InvalidFileInputError("File '%s' doesn't exist, please " \
-                                        "create file by running save command." % mpfile)
-
-        try:
-            with open(mpfile, "r") as myfile:
-                data = list()
-                cmdtorun = ['load']
-                cmdargs = ['-f', str(lfile)]
-                globalargs = ['-v', '--nocache']
-
-                while True:
-                    line = myfile.readline()
-
-                    if not line:
-                        break
-
-                    if line.endswith(os.linesep):
-                        line.rstrip(os.linesep)
-
-                    args = shlex.split(line, posix=False)
-
-                    if len(args) < 5:
-                        self.rdmc.ui.error('Incomplete data in input file: {}\n'.format(line))
-                        raise InvalidMSCfileInputError('Please verify the ' \
-                                                       'contents of the %s file' % mpfile)
-                    else:
-                        linelist = globalargs + cmdtorun + args + cmdargs
-                        line = str(line).replace("\n", "")
-                        self.queue.put(linelist)
-                        data.append(linelist)
-        except Exception as excp:
-            raise excp
-
-        if data:
-            return data
-
-        return False
+        session.opts.verbose = max(session.opts.verbose or 0, 1)
+        session.app.verbose = session.ui.verbosity = session.opts.verbose
+        run_line(session, line)
 
     def definearguments(self, customparser):
         """ Wrapper function for new command main function
@@ -448,6 +358,14 @@ class LoadCommand():
             help="""use the provided directory to output data for multiple server configuration""",
             default=None,
         )
+        customparser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            help="Maximum number of servers to configure at the same time with the "
+                 "multiprocessing option. (default: %s)" % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS,
+        )
         customparser.add_argument(
             '--latestschema',
             dest='latestschema',
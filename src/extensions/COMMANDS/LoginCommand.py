@@ -34,6 +34,8 @@ from redfish.ris.rmc_helper import IloResponseError
 from redfish.rest.v1 import ServerDownOrUnreachableError
 from redfish.rest.connections import InvalidCredentialsError
 
+from rdmc_crawl import build_monolith, CRAWL_WORKERS
+
 
 class LoginCommand():
     """ Constructor """
@@ -138,10 +140,25 @@ class LoginCommand():
             if getattr(options, 'force_vnic', False):
                 self.rdmc.ui.printer("\nAttempt to login with Vnic...\n")
 
+            # a lazy crawl only reads the resource directory, types are fetched when selected
+            lazy = getattr(options, 'lazycrawl', False) and not skipbuild and not options.path
+            workers = getattr(options, 'crawlworkers', CRAWL_WORKERS)
+            if workers < 1:
+                raise InvalidCommandLineError("The number of crawl workers must be at least 1.")
+            build = not skipbuild and (lazy or workers > 1)
             self.rdmc.app.login(username=self.username, password=self.password, base_url=self.url,
-                                path=options.path, skipbuild=skipbuild, includelogs=options.includelogs,
+                                path=options.path, skipbuild=skipbuild or build,
+                                includelogs=options.includelogs,
                                 biospassword=self.biospassword, is_redfish=self.rdmc.opts.is_redfish,
                                 proxy=proxy, user_ca_cert_data=user_ca_cert_data, json_out=self.rdmc.json)
+            if build:
+                stats = build_monolith(self.rdmc.app, path=options.path,
+                                       includelogs=options.includelogs, lazy=lazy,
+                                       workers=workers)
+                self.rdmc.app.save()
+                if self.rdmc.opts.verbose:
+                    for reportline in stats.report():
+                        self.rdmc.ui.printer(reportline)
             # else:
             #    if not options.force_url:
             #        self.rdmc.ui.printer("\nAttempt to login with Chif...\n")
@@ -28,8 +28,9 @@ class LogoutCommand():
         self.ident = {
             'name': 'logout',
             'usage': None,
-            'description': 'Run to end the current session and disconnect'
-                     ' from the server\n\tExample: logout',
+            'description': 'Run to end the sessions of every cached server and disconnect'
+                     ' from them\n\tExample: logout\n\n\tTo only end the session of one '
+                     'server include its url.\n\texample: logout --url <iLO url/hostname>',
             'summary': 'Ends the current session and disconnects from the server.',
             'aliases': [],
             'auxcommands': []
@@ -44,15 +45,31 @@ class LogoutCommand():
         :type line: string.
         """
         try:
-            (_, _) = self.rdmc.rdmc_parse_arglist(self, line)
+            (options, _) = self.rdmc.rdmc_parse_arglist(self, line)
         except (InvalidCommandLineErrorOPTS, SystemExit):
             if ("-h" in line) or ("--help" in line):
                 return ReturnCodes.SUCCESS
             else:
                 raise InvalidCommandLineErrorOPTS("")
 
+        if options.url:
+            if not self.rdmc.app.redfishinst:
+                self.rdmc.app.restore()
+            self.rdmc.app.logout("")
+            return
+
         self.rdmc.app.logout("")
 
+        # every target has its own cached session, end the ones of the other targets too
+        cachemanager = self.rdmc.app._cm
+        for url in cachemanager.cached_targets():
+            try:
+                cachemanager.select_target(url)
+                self.rdmc.app.restore()
+                self.rdmc.app.logout("")
+            except Exception as excp:
+                self.rdmc.ui.warn("Unable to log out of %s: %s\n" % (url, excp))
+
     def run(self, line, help_disp=False):
         """ Wrapper function for main logout function
 
@@ -76,3 +93,11 @@ class LogoutCommand():
         """
         if not customparser:
             return
+
+        customparser.add_argument(
+            '--url',
+            dest='url',
+            help="Only end the session of the server at the provided url, by default the "
+                 "sessions of every cached server are ended.",
+            default=None
+        )
@@ -27,6 +27,7 @@ import jsondiff
 from rdmc_base_classes import HARDCODEDLIST
 
 from rdmc_helper import ReturnCodes, InvalidCommandLineError, InvalidCommandLineErrorOPTS
+from rdmc_fetch import concurrent_get, responses
 
 class PendingChangesCommand():
     """ PendingChanges class command """
@@ -92,12 +93,14 @@ class PendingChangesCommand():
 
         self.rdmc.ui.printer('Current Pending Changes:\n')
 
+        # the base and settings resources of every uri are fetched concurrently
+        paths = []
         for uri in settingsuri:
-            diffprint = {}
-            baseuri = uri.split('settings')[0]
+            paths.extend([uri.split('settings')[0], uri])
+        fetched = responses(concurrent_get(self.rdmc.app, paths, service=True))
 
-            base = self.rdmc.app.get_handler(baseuri, service=True, silent=True)
-            settings = self.rdmc.app.get_handler(uri, service=True, silent=True)
+        for base, settings in zip(fetched[::2], fetched[1::2]):
+            diffprint = {}
 
             typestring = self.rdmc.app.monolith.typepath.defs.typestring
             currenttype = '.'.join(base.dict[typestring].split('#')[-1].split('.')[:-1])
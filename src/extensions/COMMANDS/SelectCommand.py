@@ -78,8 +78,7 @@ class SelectCommand():
             selector = self.rdmc.app.selector
 
             if selector:
-                sellist = [sel for sel in self.rdmc.app.\
-                   monolith.typesadded if selector.lower() in sel.lower()]
+                sellist = list(self.rdmc.app.monolith.gettypename(selector))
                 self.rdmc.ui.printer("Current selection: ")
                 self.rdmc.ui.printer('%s\n' % ', '.join(map(str, sellist)))
             else:
@@ -0,0 +1,265 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Serve Command for RDMC """
+
+import os
+import json
+import shlex
+import socket
+import threading
+
+from six.moves import socketserver
+
+from rdmc_cache import command_target, target_key
+from rdmc_helper import ReturnCodes, InvalidCommandLineError, InvalidCommandLineErrorOPTS, \
+    CommandNotEnabledError, ThreadStreamRouter, LOGGER
+
+DEFAULT_SOCKET = '/run/ilorest.sock'
+
+
+def line_target(line):
+    """ Target of a command line, taken from --url or the url argument of login
+
+    :param line: command line
+    :type line: str.
+    :returns: target url or None if the line does not name one
+    """
+    try:
+        return command_target(shlex.split(line))
+    except ValueError:
+        return None
+
+
+class _ResponseStream(object):
+    """ File like object forwarding the output of a request to the client as JSON lines """
+
+    def __init__(self, wfile, name, lock):
+        self.wfile = wfile
+        self.name = name
+        self.lock = lock
+
+    def write(self, data):
+        if not data:
+            return
+        with self.lock:
+            self.wfile.write((json.dumps({'stream': self.name, 'data': data}) + '\n').\
+                             encode('utf-8'))
+            self.wfile.flush()
+
+    def flush(self):
+        pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """ Handles the requests of one client connection """
+
+    def handle(self):
+        # requests without a target go to the target this connection used last
+        target = None
+        lock = threading.Lock()
+        for request in self.rfile:
+            request = request.decode('utf-8').strip()
+            if not request:
+                continue
+            try:
+                if request.startswith('{'):
+                    request = json.loads(request)
+                else:
+                    request = {'command': request}
+                if request.get('action') == 'shutdown':
+                    self._send({'returncode': ReturnCodes.SUCCESS})
+                    threading.Thread(target=self.server.shutdown).start()
+                    return
+                line = request['command']
+                if not line.strip():
+                    raise ValueError("Empty command")
+                target = request.get('target') or line_target(line) or target
+            except (ValueError, KeyError, AttributeError):
+                self._send({'returncode': ReturnCodes.INVALID_COMMAND_LINE_ERROR,
+                            'error': 'Requests are command lines or JSON objects with a '
+                                     '"command" and an optional "target".'})
+                continue
+
+            response = {'target': target_key(target)}
+            if 'id' in request:
+                response['id'] = request['id']
+            response['returncode'] = self.server.serve.run_request(
+                target, line, _ResponseStream(self.wfile, 'stdout', lock),
+                _ResponseStream(self.wfile, 'stderr', lock))
+            with lock:
+                self._send(response)
+
+    def _send(self, message):
+        self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+
+class ServeCommand():
+    """ Keeps sessions open and runs the command lines clients send over a Unix socket """
+
+    def __init__(self):
+        self.ident = {
+            'name': 'serve',
+            'usage': None,
+            'description': 'Runs iLOrest as a daemon listening on a local Unix socket, keeping '
+                           'a logged in session with its\n\tdata cached in memory for every '
+                           'target, so repeated commands do not pay for starting\n\tiLOrest and '
+                           'logging in each time.\n\texample: serve --socket /run/ilorest.sock\n\n'
+                           '\tClients send one request per line, either a command line or a JSON '
+                           'object\n\twith a "command" and optionally a "target" url and an "id":'
+                           '\n\t{"target": "https://<iLO url>", "command": "get Name --select '
+                           'Bios."}\n\tCommand lines go to the target named by --url or the '
+                           'login url, otherwise to the\n\ttarget last used on the connection or '
+                           'the local server. Output is streamed back as\n\tJSON lines {"stream":'
+                           ' "stdout"|"stderr", "data": ...} followed by\n\t{"target": ..., '
+                           '"returncode": ...}. Send {"action": "shutdown"} to stop the daemon.',
+            'summary': 'Runs a daemon executing commands from local clients over a Unix socket.',
+            'aliases': [],
+            'auxcommands': []
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+        self.sessions = dict()
+        self.locks = dict()
+        self.lock = threading.Lock()
+
+    def run(self, line, help_disp=False):
+        """ Main serve worker function
+
+        :param line: command line input
+        :type line: string.
+        :param help_disp: flag to determine to display or not
+        :type help_disp: boolean
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (options, _) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        if not hasattr(socket, 'AF_UNIX'):
+            raise CommandNotEnabledError("The serve command requires Unix socket support.")
+
+        if os.path.exists(options.socket):
+            try:
+                socket.socket(socket.AF_UNIX, socket.SOCK_STREAM).connect(options.socket)
+            except socket.error:
+                os.remove(options.socket)
+            else:
+                raise InvalidCommandLineError("A daemon is already listening on %s." % \
+                                              options.socket)
+
+        # the socket carries credentials, keep it private to the user running the daemon
+        oldmask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(options.socket, _RequestHandler)
+        finally:
+            os.umask(oldmask)
+        server.daemon_threads = True
+        server.serve = self
+
+        ThreadStreamRouter.install()
+        self.rdmc.ui.printer("Listening on %s\n" % options.socket)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            ThreadStreamRouter.uninstall()
+            self.close_sessions()
+            try:
+                os.remove(options.socket)
+            except OSError:
+                pass
+
+        return ReturnCodes.SUCCESS
+
+    def run_request(self, target, line, out, err):
+        """ Runs a command line in the session of a target, with the output of the calling
+        thread sent to out and err
+
+        :param target: target url, the local server if not provided
+        :type target: str.
+        :param line: command line
+        :type line: str.
+        :param out: stream for the standard output of the command
+        :type out: file.
+        :param err: stream for the standard error of the command
+        :type err: file.
+        :returns: ReturnCodes value of the command
+        """
+        key = target_key(target)
+        if line.split()[0] in (self.ident['name'],) + tuple(self.ident['aliases']):
+            err.write("The serve command can not be run by a client.\n")
+            return ReturnCodes.INVALID_COMMAND_LINE_ERROR
+
+        with self.lock:
+            if key not in self.sessions:
+                self.sessions[key] = self.rdmc.new_session()
+                self.locks[key] = threading.Lock()
+            session = self.sessions[key]
+
+        sys_out, sys_err = ThreadStreamRouter.install()
+        with self.locks[key]:
+            sys_out.register(out)
+            sys_err.register(err)
+            try:
+                session.retcode = ReturnCodes.SUCCESS
+                session.run_line(session.opts, line)
+                return session.retcode
+            except SystemExit as excp:
+                # exit and quit log out, start over on the next request
+                with self.lock:
+                    self.sessions.pop(key, None)
+                return excp.code if isinstance(excp.code, int) else session.retcode
+            finally:
+                sys_out.unregister()
+                sys_err.unregister()
+
+    def close_sessions(self):
+        """ Logs out of every target session """
+        for key, session in self.sessions.items():
+            try:
+                session.app.logout()
+            except Exception as excp:
+                LOGGER.info("Unable to log out of %s: %s", key, excp)
+        self.sessions.clear()
+
+    def definearguments(self, customparser):
+        """ Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
+
+        customparser.add_argument(
+            '--socket',
+            dest='socket',
+            help="Path of the Unix socket to listen on (default: %s)." % DEFAULT_SOCKET,
+            default=DEFAULT_SOCKET,
+            metavar='PATH'
+        )
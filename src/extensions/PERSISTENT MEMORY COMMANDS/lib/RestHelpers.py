@@ -22,6 +22,8 @@ import json
 import multiprocessing
 from multiprocessing.dummy import Pool as ThreadPool
 
+from rdmc_fetch import concurrent_map
+
 class RestHelpers(object):
     """This is the helper class with functions that manipulate REST data"""
 
@@ -190,18 +192,17 @@ class RestHelpers(object):
 
     def concurrent_get(self, uri_list):
         """
-        Spawns a Threadpool and sends concurrent GET Requests
+        Sends concurrent GET Requests
         :param uri_list: List of URIs on which the GET Requests
                          are supposed to be made
         :returns: List of responses from the GET Requests
         """
-        # Spawn a pool of worker threads based on the CPU core count and
-        # the number of GET requests to be sent
-        pool = ThreadPool(min(multiprocessing.cpu_count(), len(uri_list)))
-        response_list = pool.map(self.get_resource, uri_list)
-        # Wait for worker threads to complete
-        pool.close()
-        pool.join()
+        # GET Requests run on the worker pool shared by all commands
+        response_list = list()
+        for response, error in concurrent_map(self.get_resource, uri_list):
+            if error is not None:
+                raise error
+            response_list.append(response)
         # Return list of responses obtained via GET requests from worker threads
         return response_list
 
@@ -27,6 +27,7 @@ from rdmc_helper import ReturnCodes, InvalidCommandLineError, Encryption, \
     IncompatableServerTypeError, InvalidCommandLineErrorOPTS, UI
 from redfish.ris.resp_handler import ResponseHandler
 from redfish.ris.utils import iterateandclear
+from rdmc_fetch import collection_members, member_resources
 
 __config_file__ = "smartarray_config.json"
 
@@ -328,14 +329,8 @@ class SmartArrayCommand():
             if single_use:
                 physicaldrives = {}
             found_entries = False
-            for data in self.rdmc.app.get_handler(dd, silent=True).dict.get('Members', {}):
-                try:
-                    tmp = data[self.rdmc.app.typepath.defs.hrefstring]
-                except:
-                    tmp = data[next(iter(data))]
-                finally:
-                    tmp = self.rdmc.app.get_handler(tmp, silent=True).dict
-                    found_entries = True
+            for tmp in collection_members(self.rdmc.app, dd):
+                found_entries = True
                 if confd:
                     for confdd in confd:
                         if confdd.get("Location") == tmp.get("Location"):
@@ -407,14 +402,8 @@ class SmartArrayCommand():
             if single_use:
                 logicaldrives = {}
             found_entries = False
-            for data in self.rdmc.app.get_handler(dd, silent=True).dict.get('Members', {}):
-                try:
-                    tmp = data[self.rdmc.app.typepath.defs.hrefstring]
-                except:
-                    tmp = data[next(iter(data))]
-                finally:
-                    tmp = self.rdmc.app.get_handler(tmp, silent=True).dict
-                    found_entries = True
+            for tmp in collection_members(self.rdmc.app, dd):
+                found_entries = True
                 if confd:
                     for confdd in confd:
                         if confdd.get("LogicalDriveNumber") == tmp.get("LogicalDriveNumber"):
@@ -445,7 +434,7 @@ class SmartArrayCommand():
                 except:
                     tmp2 = tmp['links']['DataDrives'][next(iter(tmp['links']['DataDrives']))]
                 finally:
-                    tmp2 = self.rdmc.app.get_handler(tmp2, silent=True).dict
+                    tmp2 = {'Members': collection_members(self.rdmc.app, tmp2)}
                 if ldrive_ident:
                     data_drives = self.get_data_drives(options, tmp2, print_ctrl, single_use)
                     try:
@@ -489,14 +478,8 @@ class SmartArrayCommand():
         if single_use:
             subsetdrives = {}
         found_entries = False
-        for member in drives.get('Members', {}):
-            try:
-                tmp = member[self.rdmc.app.typepath.defs.hrefstring]
-            except:
-                tmp = member[next(iter(member))]
-            finally:
-                tmp = self.rdmc.app.get_handler(tmp, silent=True).dict
-                found_entries = True
+        for tmp in member_resources(self.rdmc.app, drives.get('Members', {})):
+            found_entries = True
             if single_use:
                 subsetdrives[tmp['Id']] = tmp
             if print_ctrl:
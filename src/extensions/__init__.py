@@ -1,6 +1,8 @@
 """find and add dynamic extensions"""
 import os
 import sys
+import json
+import hashlib
 
 tl = []
 classNames = []
@@ -8,6 +10,10 @@ Commands = {}
 
 extensionDir = os.path.dirname(__file__)
 
+# prebuilt command manifest, generated when packaging with the hidden manifest command
+manifestFile = os.path.join(extensionDir, 'manifest.json')
+MANIFEST_VERSION = 2
+
 if os.name != 'nt':
     replacement = '/'
 else:
@@ -30,3 +36,75 @@ for cwd, names in tl:
             if name+'.pyc' in names:
                 continue
             classNames.append(cn+'.'+name+'.'+name)
+
+
+def command_class_names():
+    """Class names from the extension tree that are loadable commands"""
+    return sorted(name for name in classNames if '__pycache__' not in name and \
+                  'Command' in name.rsplit('.', 1)[-1])
+
+
+_digest = []
+
+
+def tree_digest():
+    """SHA-256 of the names, sizes and modification times of the extension sources, computed
+    once per process as every session checks the manifest"""
+    if _digest:
+        return _digest[0]
+    digest = hashlib.sha256()
+    for cwd, names in sorted(tl):
+        if '__pycache__' in cwd:
+            continue
+        for name in sorted(names):
+            if not name.endswith('.py'):
+                continue
+            stat = os.stat(os.path.join(cwd, name))
+            digest.update(('%s:%d:%d;' % (os.path.relpath(os.path.join(cwd, name), extensionDir).\
+                                          replace(replacement, '/'), stat.st_size,
+                                          int(stat.st_mtime))).encode('utf-8'))
+    _digest.append(digest.hexdigest())
+    return _digest[0]
+
+
+def load_manifest(version=None):
+    """Load the prebuilt command manifest
+
+    :param version: application version the manifest must have been built with
+    :type version: str.
+    :returns: list of manifest entries or None when missing or stale
+    """
+    try:
+        with open(manifestFile, 'r') as manifest:
+            data = json.load(manifest)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if data.get('manifest_version') != MANIFEST_VERSION or \
+            (version and data.get('version') != version):
+        return None
+    if sorted([entry['classname'] for entry in data.get('commands', [])] + \
+              data.get('unavailable', [])) != command_class_names():
+        return None
+    # frozen builds only ship the compiled extensions the manifest was built with
+    if not getattr(sys, 'frozen', False) and data.get('digest') != tree_digest():
+        return None
+
+    return data['commands']
+
+
+def write_manifest(entries, version=None):
+    """Write the command manifest next to the extensions, done when packaging
+
+    :param entries: manifest entries (name, aliases, summary, section, module, classname)
+    :type entries: list.
+    :param version: application version the manifest is built with
+    :type version: str.
+    """
+    loaded = set(entry['classname'] for entry in entries)
+    data = {'manifest_version': MANIFEST_VERSION, 'version': version,
+            'digest': tree_digest(),
+            'commands': sorted(entries, key=lambda entry: entry['classname']),
+            'unavailable': [name for name in command_class_names() if name not in loaded]}
+    with open(manifestFile, 'w') as manifest:
+        json.dump(data, manifest, indent=1, sort_keys=True)
@@ -0,0 +1,192 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Benchmark Command for rdmc """
+
+import json
+
+from rdmc_helper import ReturnCodes, InvalidCommandLineError, InvalidCommandLineErrorOPTS
+from rdmc_benchmark import Benchmark, SCENARIOS, STAGES, BASELINE_FILE, DEFAULT_THRESHOLD, \
+                           load_baseline, save_baseline, compare
+
+class BenchmarkCommand():
+    """ Benchmarks the select, get, save and load pipeline """
+    def __init__(self):
+        self.ident = {
+            'name':'benchmark',
+            'usage': None,
+            'description':'Measures the time and peak memory of select, get, save, load and '
+                          'of printing the\n\tresults as JSON and human readable text against '
+                          'mock servers of growing size.\n\texample: benchmark --max-size 1000'
+                          '\n\n\tThe resources scenario selects %s physical drives and the '
+                          'attributes\n\tscenario %s BIOS attributes. Results are compared with '
+                          'the baseline\n\tand the command fails when a stage fails or regressed '
+                          'by more than the threshold.\n\tUpdate the baseline with '
+                          '--update-baseline along with the change\n\tthat moved it.' % (
+                              '-'.join(str(size) for size in SCENARIOS['resources'][2][::3]),
+                              '-'.join(str(size) for size in SCENARIOS['attributes'][2][::2])),
+            'summary':'Benchmarks the select, get, save and load pipeline, not customer facing.',
+            'aliases': [],
+            'auxcommands': []
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+
+    def run(self, line, help_disp=False):
+        """ Main benchmark worker function
+
+        :param line: string of arguments passed in
+        :type line: str.
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (options, _) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        scenarios = options.scenarios if options.scenarios else sorted(SCENARIOS)
+        for scenario in scenarios:
+            if scenario not in SCENARIOS:
+                raise InvalidCommandLineError("Unknown scenario %s, choose from %s." % \
+                                              (scenario, ', '.join(sorted(SCENARIOS))))
+        if options.repeat < 1 or options.threshold < 0:
+            raise InvalidCommandLineError("The repeat count is at least 1 and the threshold "
+                                          "can not be negative.")
+
+        self.rdmc.ui.printer("%-18s %-7s %10s %10s  %s\n" % ('SIZE', 'STAGE', 'SECONDS',
+                                                             'PEAK KiB', 'BASELINE'))
+        baseline = load_baseline(options.baseline)
+
+        def progress(name, stages):
+            for stage in STAGES:
+                result = stages[stage]
+                previous = baseline.get(name, {}).get(stage)
+                self.rdmc.ui.printer("%-18s %-7s %10.4f %10s  %s\n" % (
+                    name, stage, result['seconds'], self.kib(result['peak']),
+                    result.get('error') or ('%.4fs %s KiB' % (previous['seconds'], self.kib(
+                        previous['peak'])) if previous else '-')))
+
+        results = Benchmark(self.rdmc, repeat=options.repeat).run(
+            scenarios=scenarios, maxsize=options.maxsize, progress=progress)
+
+        if options.output:
+            with open(options.output, 'w') as outfile:
+                json.dump(results, outfile, indent=2, sort_keys=True)
+        failed = [(name, stage) for name, stages in sorted(results.items()) for stage in STAGES
+                  if stages[stage].get('error')]
+        if options.update and failed:
+            for name, stage in failed:
+                self.rdmc.ui.error("%s %s fails: %s\n" % (name, stage,
+                                                          results[name][stage]['error']))
+            self.rdmc.ui.error("The baseline is not updated with failing stages.\n")
+            return ReturnCodes.GENERAL_ERROR
+        if options.update:
+            save_baseline(results, options.baseline)
+            self.rdmc.ui.printer("Baseline updated in %s\n" % options.baseline)
+            return ReturnCodes.SUCCESS
+
+        regressions = compare(results, baseline, options.threshold)
+        for name, stage, measurement, before, after in regressions:
+            if measurement == 'error':
+                self.rdmc.ui.error("%s %s fails: %s\n" % (name, stage, after))
+            elif measurement == 'baseline':
+                self.rdmc.ui.error("%s %s failed in the baseline: %s, update the baseline to "
+                                   "compare it.\n" % (name, stage, before))
+            else:
+                self.rdmc.ui.error("%s %s %s regressed from %s to %s\n" % (name, stage,
+                                                                          measurement, before,
+                                                                          after))
+        if regressions:
+            return ReturnCodes.GENERAL_ERROR
+        self.rdmc.ui.printer("No regression over %d%% of the baseline.\n" % \
+                             round(options.threshold * 100))
+        return ReturnCodes.SUCCESS
+
+    @staticmethod
+    def kib(peak):
+        """ Peak memory in KiB, '-' where it was not measured
+
+        :param peak: bytes
+        :type peak: int.
+        :returns: str
+        """
+        return '-' if peak is None else str(peak // 1024)
+
+    def definearguments(self, customparser):
+        """ Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
+
+        customparser.add_argument(
+            '--scenario',
+            dest='scenarios',
+            action='append',
+            help="Scenario to run, resources or attributes, can be repeated. (default: both)",
+            default=None
+        )
+        customparser.add_argument(
+            '--max-size',
+            dest='maxsize',
+            type=int,
+            help="Skip the sizes over this number of resources or attributes.",
+            default=None
+        )
+        customparser.add_argument(
+            '--repeat',
+            dest='repeat',
+            type=int,
+            help="Runs of every stage, the fastest is reported. (default: 1)",
+            default=1
+        )
+        customparser.add_argument(
+            '--threshold',
+            dest='threshold',
+            type=float,
+            help="Fraction over the baseline reported as a regression. (default: %s)" % \
+                 DEFAULT_THRESHOLD,
+            default=DEFAULT_THRESHOLD
+        )
+        customparser.add_argument(
+            '--baseline',
+            dest='baseline',
+            help="Baseline file. (default: %s)" % BASELINE_FILE,
+            default=BASELINE_FILE
+        )
+        customparser.add_argument(
+            '--update-baseline',
+            dest='update',
+            action="store_true",
+            help="Write the results of the sizes run to the baseline instead of comparing.",
+            default=False
+        )
+        customparser.add_argument(
+            '-o',
+            '--output',
+            dest='output',
+            help="Also write the results to this JSON file.",
+            default=None
+        )
@@ -0,0 +1,79 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Manifest Command for rdmc """
+
+import extensions
+import versioning
+
+from rdmc_helper import ReturnCodes, InvalidCommandLineErrorOPTS, InvalidFileInputError
+
+class ManifestCommand():
+    """ Builds the command manifest when packaging """
+    def __init__(self):
+        self.ident = {
+            'name':'manifest',
+            'usage': None,
+            'description':'Imports every extension and writes the command manifest next to '
+                          'them, so iLOrest\n\tstarts without importing the extensions. Run '
+                          'when packaging, the manifest\n\tis ignored once the extensions or '
+                          'the version change.\n\texample: manifest',
+            'summary':'Builds the command manifest when packaging, not customer facing.',
+            'aliases': [],
+            'auxcommands': []
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+
+    def run(self, line, help_disp=False):
+        """ Main manifest worker function
+
+        :param line: string of arguments passed in
+        :type line: str.
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (_, _) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        entries = self.rdmc.import_extensions()
+        try:
+            extensions.write_manifest(entries, version=versioning.__version__)
+        except (IOError, OSError) as excp:
+            raise InvalidFileInputError("Unable to write the command manifest %s: %s" % \
+                                        (extensions.manifestFile, excp))
+
+        self.rdmc.ui.printer("Command manifest of %s commands written to %s\n" % \
+                             (len(entries), extensions.manifestFile))
+
+        return ReturnCodes.SUCCESS
+
+    def definearguments(self, customparser):
+        """ Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
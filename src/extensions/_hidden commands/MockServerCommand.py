@@ -0,0 +1,214 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Mock Server Command for rdmc """
+
+import socket
+import subprocess
+
+from rdmc_helper import ReturnCodes, InvalidCommandLineError, InvalidCommandLineErrorOPTS
+from rdmc_mockserver import MockServer, MockTree, DEFAULT_PORT, MOCK_USERNAME, MOCK_PASSWORD
+
+class MockServerCommand():
+    """ Runs a mock iLO 5 server """
+    def __init__(self):
+        self.ident = {
+            'name':'mockserver',
+            'usage': None,
+            'description':'Serves a synthetic iLO 5 resource tree over HTTPS to test and '
+                          'benchmark iLOrest without a server.\n\texample: mockserver --drives 64 '
+                          '--log-entries 1000 --latency 20\n\n\tLogin to it from another '
+                          'shell with:\n\tilorest login https://127.0.0.1:%s -u %s -p %s\n\n\t'
+                          'Collections support $expand, GETs return ETags and honour '
+                          'If-None-Match,\n\tuploads and SimpleUpdate walk the update service '
+                          'through its states\n\tand tasks of the update task queue move from '
+                          'Pending to Complete as\n\tthey are read.' % (DEFAULT_PORT,
+                                                                         MOCK_USERNAME,
+                                                                         MOCK_PASSWORD),
+            'summary':'Runs a mock iLO 5 server for testing and benchmarking, not customer '
+                      'facing.',
+            'aliases': [],
+            'auxcommands': []
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+
+    def run(self, line, help_disp=False):
+        """ Main mock server worker function
+
+        :param line: string of arguments passed in
+        :type line: str.
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (options, _) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        if min(options.drives, options.entries, options.attributes, options.ahssize,
+               options.latency, options.updatereads) < 0 or not 0 <= options.errors <= 1:
+            raise InvalidCommandLineError("Sizes and the latency can not be negative and the "
+                                          "error rate is between 0 and 1.")
+        if bool(options.certfile) != bool(options.keyfile):
+            raise InvalidCommandLineError("--certfile and --keyfile are used together.")
+
+        tree = MockTree(drives=options.drives, entries=options.entries,
+                        attributes=options.attributes, ahssize=options.ahssize * 1024,
+                        updatereads=options.updatereads,
+                        directory=not options.nodirectory, seed=options.seed)
+        try:
+            server = MockServer(tree, host=options.host, port=options.port,
+                                latency=options.latency / 1000.0, errors=options.errors,
+                                seed=options.seed, certfile=options.certfile,
+                                keyfile=options.keyfile, secure=not options.http)
+        except subprocess.CalledProcessError:
+            raise InvalidCommandLineError("Unable to create a certificate with openssl, provide "
+                                          "one with --certfile and --keyfile.")
+        except (socket.error, OSError) as excp:
+            raise InvalidCommandLineError("Unable to start the mock server on %s:%s: %s" % \
+                                          (options.host, options.port, excp))
+
+        self.rdmc.ui.printer("Mock iLO 5 server listening on %s with %s resources, login with "
+                             "-u %s -p %s\n" % (server.url, len(tree.resources), MOCK_USERNAME,
+                                                MOCK_PASSWORD))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.rdmc.ui.printer("Served %(requests)s requests, %(unavailable)s 503s, "
+                                 "%(notmodified)s 304s, %(uploads)s uploads, %(bytessent)s bytes "
+                                 "sent\n" % server.stats)
+
+        return ReturnCodes.SUCCESS
+
+    def definearguments(self, customparser):
+        """ Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
+
+        customparser.add_argument(
+            '--host',
+            dest='host',
+            help="Address to listen on. (default: 127.0.0.1)",
+            default='127.0.0.1'
+        )
+        customparser.add_argument(
+            '--port',
+            dest='port',
+            type=int,
+            help="Port to listen on. (default: %s)" % DEFAULT_PORT,
+            default=DEFAULT_PORT
+        )
+        customparser.add_argument(
+            '--drives',
+            dest='drives',
+            type=int,
+            help="Number of physical drives of the array controller. (default: 8)",
+            default=8
+        )
+        customparser.add_argument(
+            '--log-entries',
+            dest='entries',
+            type=int,
+            help="Number of entries of the IML and of the IEL. (default: 50)",
+            default=50
+        )
+        customparser.add_argument(
+            '--bios-attributes',
+            dest='attributes',
+            type=int,
+            help="Number of BIOS attributes and attribute registry entries. (default: 500)",
+            default=500
+        )
+        customparser.add_argument(
+            '--ahs-size',
+            dest='ahssize',
+            type=int,
+            help="Size of the AHS download in KiB. (default: 1024)",
+            default=1024
+        )
+        customparser.add_argument(
+            '--update-reads',
+            dest='updatereads',
+            type=int,
+            help="Reads of the update service an upload or update spends in each of the "
+                 "Verifying and Flashing states before it is Complete. (default: 1)",
+            default=1
+        )
+        customparser.add_argument(
+            '--latency',
+            dest='latency',
+            type=float,
+            help="Milliseconds added to every request. (default: 0)",
+            default=0
+        )
+        customparser.add_argument(
+            '--error-rate',
+            dest='errors',
+            type=float,
+            help="Fraction of the requests answered with 503 Service Unavailable, from 0 to 1. "
+                 "(default: 0)",
+            default=0
+        )
+        customparser.add_argument(
+            '--seed',
+            dest='seed',
+            type=int,
+            help="Seed of the generated data and of the requests failing with --error-rate, "
+                 "so runs can be repeated. (default: 0)",
+            default=0
+        )
+        customparser.add_argument(
+            '--no-resource-directory',
+            dest='nodirectory',
+            action="store_true",
+            help="Do not serve the resource directory, so logins crawl the whole tree.",
+            default=False
+        )
+        customparser.add_argument(
+            '--certfile',
+            dest='certfile',
+            help="TLS certificate to serve, a self signed certificate is created with openssl "
+                 "if not provided.",
+            default=None
+        )
+        customparser.add_argument(
+            '--keyfile',
+            dest='keyfile',
+            help="Private key of --certfile.",
+            default=None
+        )
+        customparser.add_argument(
+            '--http',
+            dest='http',
+            action="store_true",
+            help="Serve plain HTTP instead of HTTPS, for clients of the library. The login "
+                 "command only connects over HTTPS.",
+            default=False
+        )
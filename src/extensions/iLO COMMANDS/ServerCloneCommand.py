@@ -309,23 +309,19 @@ class ServerCloneCommand():
                 del supported_types_dict['HpeSmartStorage']
         unsupported_types_list = ['Collection', 'PowerMeter', 'BiosMapping', 'Controller']
 
-        # supported types comparison
+        # supported types comparison, once per type name rather than per version of it
+        supported = [stype.lower() for stype in supported_types_dict if \
+                     self.curr_iloversion in supported_types_dict[stype]]
+        unsupported = [ustype.lower() for ustype in unsupported_types_list]
+        bynames = dict()
+        for _type in set(self.rdmc.app.types('--fulltypes')):
+            bynames.setdefault(_type.lstrip('#').split('.')[0].lower(), []).append(_type)
+
         types_accepted = set()
-        for _type in sorted(set(self.rdmc.app.types('--fulltypes'))):
-            if _type[:1].split('.')[0] == '#':
-                _type_mod = _type[1:].split('.')[0]
-            else:
-                _type_mod = _type.split('.')[0]
-            for stype in supported_types_dict:
-                if stype.lower() in _type_mod.lower():
-                    found = False
-                    for ustype in unsupported_types_list:
-                        if ustype.lower() in _type_mod.lower():
-                            found = True
-                            break
-                    if not found:
-                        if self.curr_iloversion in supported_types_dict[stype]:
-                            types_accepted.add(_type)
+        for _type_mod, _types in bynames.items():
+            if any(stype in _type_mod for stype in supported) and \
+                    not any(ustype in _type_mod for ustype in unsupported):
+                types_accepted.update(_types)
 
         return sorted(types_accepted)
 
@@ -23,24 +23,25 @@ import json
 import time
 import ctypes
 import string
-import shlex
 import tempfile
 import datetime
 import platform
 import itertools
 import subprocess
 from argparse import ArgumentParser, SUPPRESS
-from six.moves import queue
 
 import redfish.hpilo.risblobstore2 as risblobstore2
 from redfish.ris.utils import filter_output
 from redfish.rest.connections import SecurityStateError
 
 from rdmc_helper import ReturnCodes, InvalidCommandLineError, UI, InvalidKeyError, \
-    InvalidMSCfileInputError, InvalidCommandLineErrorOPTS, InvalidFileInputError, \
+    InvalidCommandLineErrorOPTS, InvalidFileInputError, \
     LOGGER, InvalidCListFileError, NoContentsFoundForOperationError, \
     IncompatibleiLOVersionError, Encryption, PartitionMoutingError, \
     MultipleServerConfigError, UnabletoFindDriveError
+from rdmc_fleet import FleetRunner, DEFAULT_WORKERS, read_targets, output_directory, \
+    write_summary
+from rdmc_fetch import member_resources
 
 if os.name == 'nt':
     import win32api
@@ -96,7 +97,6 @@ class ServerlogsCommand():
         self.rdmc = None
         self.auxcommands = dict()
         self.dontunmount = None
-        self.queue = queue.Queue()
         self.abspath = None
         self.lib = None
 
@@ -192,6 +192,9 @@ class ServerlogsCommand():
             mfile = options.mpfilename
             outputdir = None
 
+            if options.workers < 1:
+                raise InvalidCommandLineError("The number of workers must be at least 1.")
+
             if options.outdirectory:
                 outputdir = options.outdirectory
 
@@ -210,141 +213,37 @@ class ServerlogsCommand():
         """
         self.logoutobj.run("")
         LOGGER.info("Validating input server collection file.")
-        data = self.validatempfile(mpfile=mpfile, options=options)
-
-        if not data:
-            return False
-
-        processes = []
-        finalreturncode = True
-        outputform = '%Y-%m-%d-%H-%M-%S'
-
-        if outputdir:
-            if outputdir.endswith(('"', "'")) and outputdir.startswith(('"', "'")):
-                outputdir = outputdir[1:-1]
-
-            if not os.path.isdir(outputdir):
-                raise InvalidCommandLineError("The given output folder path does not exist.")
-
-            dirpath = outputdir
-        else:
-            dirpath = os.getcwd()
-
-        dirname = '%s_%s' % (datetime.datetime.now().strftime(outputform), 'MSClogs')
-        createdir = os.path.join(dirpath, dirname)
-        os.mkdir(createdir)
-
-        oofile = open(os.path.join(createdir, 'CompleteOutputfile.txt'), 'w+')
-        self.rdmc.ui.printer('Creating multiple processes to load configuration '
-                             'concurrently to all servers...\n')
-
-        while True:
-            if not self.queue.empty():
-                line = self.queue.get()
-            else:
-                break
-
-            finput = '\n' + 'Output for ' + line[line.index('--url') + 1] + ': \n\n'
-            urlvar = line[line.index('--url') + 1]
-            urlfilename = urlvar.split('//')[-1]
-            line[line.index('-f') + 1] = str(line[line.index('-f') + 1]) + urlfilename
-
-            if 'python' in os.path.basename(sys.executable.lower()):
-                # If we are running from source we have to add the python file to the command
-                listargforsubprocess = [sys.executable, sys.argv[0]] + line
-            else:
-                listargforsubprocess = [sys.executable] + line
-
-            if os.name != 'nt':
-                listargforsubprocess = " ".join(listargforsubprocess)
-
-            logfile = open(os.path.join(createdir, urlfilename + ".txt"), "w+")
-            pinput = subprocess.Popen(listargforsubprocess, shell=True,
-                                      stdout=logfile, stderr=logfile)
-
-            processes.append((pinput, finput, urlvar, logfile))
-
-        for pinput, finput, urlvar, logfile in processes:
-            pinput.wait()
-            returncode = pinput.returncode
-            finalreturncode = finalreturncode and not returncode
-
-            logfile.close()
-            logfile = open(os.path.join(createdir, urlvar + ".txt"), "r+")
-            oofile.write(finput + str(logfile.read()))
-            oofile.write('-x+x-' * 16)
-            logfile.close()
-
-            if returncode == 0:
-                self.rdmc.ui.printer('Loading Configuration for {} : SUCCESS\n'.format(urlvar))
-            else:
-                self.rdmc.ui.error('Loading Configuration for {} : FAILED\n'.format(urlvar))
-                self.rdmc.ui.error('ILOREST return code : {}.\nFor more details please check {}' \
-                                   '.txt under {} directory.\n'.format(returncode, urlvar, createdir))
-
-        oofile.close()
-
-        if finalreturncode:
-            self.rdmc.ui.printer('All servers have been successfully configured.\n')
-
-        return finalreturncode
-
-    def validatempfile(self, mpfile=None, options=None):
-        """ Validate temporary file
-
-        :param mpfile: configuration file
-        :type mpfile: string.
-        :param lfile: custom file name
-        :type lfile: string.
-        """
         self.rdmc.ui.printer('Checking given server information...\n')
 
         if not mpfile:
             return False
-        elif mpfile.startswith(('"', "'")) and mpfile[0] == mpfile[-1]:
-            mpfile = mpfile[1:-1]
 
-        if not os.path.isfile(mpfile) or not options.mplog:
+        if not options.mplog:
             raise InvalidFileInputError("File '%s' doesn't exist, please " \
                                         "create file by running save command." % mpfile)
 
         logs = self.checkmplog(options)
+        targets = read_targets(mpfile, minargs=5)
+        createdir = output_directory(outputdir)
+
+        jobs = []
+        for name, args in targets:
+            for logval in logs:
+                cmdargs = ['--selectlog=' + str(logval), '-f', str(logval) + name]
+                jobs.append(('%s-%s' % (name, logval), " ".join(['serverlogs'] + args + cmdargs)))
+
+        self.rdmc.ui.printer('Downloading logs from {} servers, {} at a time...\n'.\
+                             format(len(targets), min(options.workers, len(jobs))))
+        started = time.time()
+        results = FleetRunner(self.rdmc, options.workers).run_logged(jobs, createdir, \
+                                                                     'Downloading logs')
+        finalreturncode = not write_summary(createdir, results, started, logs=logs, \
+                                            workers=options.workers)['failed']
 
-        try:
-            with open(mpfile, "r") as myfile:
-                data = list()
-                cmdtorun = ['serverlogs']
-                globalargs = ['-v', '--nocache']
-
-                while True:
-                    line = myfile.readline()
-                    if not line:
-                        break
-
-                    for logval in logs:
-                        cmdargs = ['--selectlog=' + str(logval), '-f', str(logval)]
-                        if line.endswith(os.linesep):
-                            line.rstrip(os.linesep)
-
-                        args = shlex.split(line, posix=False)
-
-                        if len(args) < 5:
-                            self.rdmc.ui.error('Incomplete data in input file: {}\n'.format(line))
-                            raise InvalidMSCfileInputError('Please verify the ' \
-                                                           'contents of the %s file' % mpfile)
-                        else:
-                            linelist = globalargs + cmdtorun + args + cmdargs
-                            line = str(line).replace("\n", "")
-                            self.queue.put(linelist)
-                            data.append(linelist)
-        except Exception as excp:
-            LOGGER.info("%s", str(excp))
-            raise excp
-
-        if data:
-            return data
+        if finalreturncode:
+            self.rdmc.ui.printer('Logs have been downloaded from all servers.\n')
 
-        return False
+        return finalreturncode
 
     def checkmplog(self, options):
         """Function to validate mplogs options
@@ -495,17 +394,10 @@ class ServerlogsCommand():
                             raise NoContentsFoundForOperationError("Unable to retrieve logs.")
                     else:
                         morepages = False
-            else:
-                datadict = list()
-
-                for members in completedatadictlist:
-                    if len(list(members.keys())) == 1:
-                        memberpath = members[self.rdmc.app.typepath.defs.hrefstring]
-                        data = self.rdmc.app.get_handler(memberpath, silent=True)
-                        datadict = datadict + [data.dict]
-                    else:
-                        datadict = datadict + [members]
-                completedatadictlist = datadict
+            elif completedatadictlist and any(len(list(members.keys())) == 1 for members \
+                                              in completedatadictlist):
+                # only links came back, fetch the members of the page already read
+                completedatadictlist = member_resources(self.rdmc.app, completedatadictlist)
 
             if completedatadictlist:
                 try:
@@ -1357,6 +1249,14 @@ class ServerlogsCommand():
                  """Allowable values: IEL, IML, AHS, all or combination of any two.""",
             default=None,
         )
+        customparser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            help="Maximum number of downloads to run at the same time on multiple servers. "
+                 "(default: %s)" % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS,
+        )
         customparser.add_argument(
             '--repair',
             '-r',
@@ -19,6 +19,7 @@
 
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, Encryption, \
                         InvalidCommandLineErrorOPTS, InvalidCommandLineError
+from rdmc_fetch import collection_members
 
 class DeleteComponentCommand():
     """ Main download command class """
@@ -69,8 +70,8 @@ class DeleteComponentCommand():
             raise IncompatibleiLOVersionError('iLO Repository commands are '
                                               'only available on iLO 5.')
 
-        comps = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/ComponentRepository/')
+        comps = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/ComponentRepository/')
 
         if not comps:
             self.rdmc.ui.printer('No components found to delete\n')
@@ -19,9 +19,12 @@
 
 import os
 import json
+import math
+import time
 import shutil
 import zipfile
 import tempfile
+import functools
 
 import ctypes
 from ctypes import c_char_p, c_int, c_bool
@@ -30,7 +33,14 @@ from redfish.hpilo.risblobstore2 import BlobStore2
 
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, Encryption, \
                         InvalidCommandLineErrorOPTS, InvalidCommandLineError,\
-                        InvalidFileInputError, UploadError, TaskQueueError, FirmwareUpdateError
+                        InvalidFileInputError, UploadError, TaskQueueError, FirmwareUpdateError, \
+                        MultipleServerConfigError
+from rdmc_fetch import collection_members
+from rdmc_fleet import FleetRunner, DEFAULT_WORKERS, select_targets, output_directory, \
+                        write_summary, login_line
+
+# list of the servers a paused rollout did not get to, in the multiple server file format
+PENDING_FILE = 'pending.txt'
 
 def _get_comp_type(payload):
     """ Get's the component type and returns it
@@ -61,6 +71,26 @@ def _get_comp_type(payload):
 
     return ctype
 
+def _rollout_waves(count, canary, percent):
+    """ Sizes of the waves of a rollout, the canary wave first and then batches of a
+    percentage of the servers
+
+    :param count: number of servers
+    :type count: int.
+    :param canary: number of servers in the first wave
+    :type canary: int.
+    :param percent: size of the following waves as a percentage of the servers
+    :type percent: float.
+    :returns: list of wave sizes adding up to count
+    """
+    waves = []
+    if canary and count:
+        waves.append(min(canary, count))
+    batch = max(1, int(math.ceil(count * percent / 100.0)))
+    while sum(waves) < count:
+        waves.append(min(batch, count - sum(waves)))
+    return waves
+
 class FwpkgCommand():
     """ Fwpkg command class """
     def __init__(self):
@@ -72,7 +102,10 @@ class FwpkgCommand():
                     'queue to flash.\n\texample: flashfwpkg component.fwpkg.\n\n\t'
                     'Skip extra checks before adding taskqueue. (Useful when adding '
                     'many flashfwpkg taskqueue items in sequence.)\n\texample: flashfwpkg '
-                    'component.fwpkg --ignorechecks',
+                    'component.fwpkg --ignorechecks\n\n\tRoll the component out to the servers '
+                    'of a multiple server file in waves,\n\tone canary server first and then 25% '
+                    'of the servers at a time.\n\texample: flashfwpkg component.fwpkg --rollout '
+                    'servers.txt --canary 1 --wave 25',
             'summary':'Flashes fwpkg components using the iLO repository.',
             'aliases': ['fwpkg'],
             'auxcommands': ['UploadComponentCommand', 'UpdateTaskQueueCommand',
@@ -104,8 +137,41 @@ class FwpkgCommand():
             else:
                 raise InvalidCommandLineErrorOPTS("")
 
+        if not options.fwpkg.endswith('.fwpkg'):
+            raise InvalidFileInputError("Invalid file type. Please make sure the file "
+                                  "provided is a valid .fwpkg file type.")
+
+        if options.rollout:
+            return self.rollout(options)
+
         self.fwpkgvalidation(options)
+        self.ilocheck(options)
+
+        tempdir = ''
+        try:
+            components, tempdir, comptype = self.preparefwpkg(self, options.fwpkg)
+            if comptype == 'D':
+                raise InvalidFileInputError("Unable to flash this fwpkg file.")
+            self.queuecheck(options, comptype)
+            self.flashtarget(options, components, tempdir, comptype)
 
+        except (FirmwareUpdateError, UploadError) as excp:
+            raise excp
+
+        finally:
+            if tempdir:
+                shutil.rmtree(tempdir)
+
+        self.cmdbase.logout_routine(self, options)
+        #Return code
+        return ReturnCodes.SUCCESS
+
+    def ilocheck(self, options):
+        """ Checks the iLO of the logged in server supports the component
+
+        :param options: command line options
+        :type options: list.
+        """
         if self.rdmc.app.typepath.defs.isgen9:
             raise IncompatibleiLOVersionError(
                 'iLO Repository commands are only available on iLO 5.')
@@ -113,48 +179,171 @@ class FwpkgCommand():
         if self.rdmc.app.getiloversion() <= 5.120 and options.fwpkg.lower().startswith('iegen10'):
             raise IncompatibleiLOVersionError('Please upgrade to iLO 5 1.20 or '
                                               'greater to ensure correct flash of this firmware.')
-        tempdir = ''
-        if not options.fwpkg.endswith('.fwpkg'):
-            InvalidFileInputError("Invalid file type. Please make sure the file "
-                                  "provided is a valid .fwpkg file type.")
 
+    def queuecheck(self, options, comptype):
+        """ Checks the task queue of the logged in server for type C components
+
+        :param options: command line options
+        :type options: list.
+        :param comptype: type of component. Either A,B,C, or D.
+        :type comptype: str.
+        """
+        if comptype == 'C':
+            try:
+                self.taskqueuecheck()
+            except TaskQueueError as excp:
+                if options.ignore:
+                    self.rdmc.ui.warn(str(excp)+'\n')
+                else:
+                    raise excp
+
+    def flashtarget(self, options, components, tempdir, comptype):
+        """ Flashes prepared components on the logged in server
+
+        :param options: command line options
+        :type options: list.
+        :param components: components to upload
+        :type components: list.
+        :param tempdir: path to temp directory
+        :type tempdir: string.
+        :param comptype: type of component. Either A,B,C, or D.
+        :type comptype: str.
+        """
+        self.applyfwpkg(options, tempdir, components, comptype)
+
+        if comptype == 'A':
+            message = "Firmware has successfully been flashed.\n"
+            if 'ilo' in options.fwpkg.lower():
+                message += "iLO will reboot to complete flashing. Session will be"\
+                            " terminated.\n"
+        elif comptype == 'B':
+            message = "Firmware has successfully been flashed and a reboot is required for "\
+                                                            "this firmware to take effect.\n"
+        elif comptype == 'C':
+            message = "This firmware is set to flash on reboot.\n"
+        self.rdmc.ui.printer(message)
+
+    def rollout(self, options):
+        """ Flashes the component on the servers of --rollout. The fwpkg file is unpacked once,
+        every server is checked in parallel and the ones passing are flashed in waves with at
+        most --max-flashes at a time. The rollout pauses when the ratio of failed servers goes
+        over --failure-threshold.
+
+        :param options: command line options
+        :type options: list.
+        """
+        if options.canary < 0 or options.maxflashes < 1 or not 0 < options.wave <= 100 or \
+                not 0 <= options.threshold <= 1:
+            raise InvalidCommandLineError("The rollout needs a canary of 0 or more servers, "
+                                          "waves of 1 to 100 percent, at least 1 flash at a "
+                                          "time and a failure threshold from 0 to 1.")
+
+        targets = select_targets(options.rollout, self.rdmc.config.inventory())
+        arguments = dict(targets)
+        components, tempdir, comptype = self.unpackfwpkg(options.fwpkg)
         try:
-            components, tempdir, comptype = self.preparefwpkg(self, options.fwpkg)
             if comptype == 'D':
                 raise InvalidFileInputError("Unable to flash this fwpkg file.")
-            elif comptype == 'C':
-                try:
-                    self.taskqueuecheck()
-                except TaskQueueError as excp:
-                    if options.ignore:
-                        self.rdmc.ui.warn(str(excp)+'\n')
-                    else:
-                        raise excp
-            self.applyfwpkg(options, tempdir, components, comptype)
-
-            if comptype == 'A':
-                message = "Firmware has successfully been flashed.\n"
-                if 'ilo' in options.fwpkg.lower():
-                    message += "iLO will reboot to complete flashing. Session will be"\
-                                " terminated.\n"
-            elif comptype == 'B':
-                message = "Firmware has successfully been flashed and a reboot is required for "\
-                                                                "this firmware to take effect.\n"
-            elif comptype == 'C':
-                message = "This firmware is set to flash on reboot.\n"
-            self.rdmc.ui.printer(message)
 
-        except (FirmwareUpdateError, UploadError) as excp:
-            raise excp
+            createdir = output_directory(options.outdirectory)
+            started = time.time()
+            jobs = [(name, login_line(args)) for name, args in targets]
+
+            self.rdmc.ui.printer("Checking {} servers...\n".format(len(jobs)))
+            checks = FleetRunner(self.rdmc, getattr(self.rdmc.opts, 'parallel', DEFAULT_WORKERS),
+                                 task=functools.partial(self.rollouttask, options, comptype,
+                                                        None, None)).\
+                run_logged(jobs, createdir, 'Checking server', suffix='-check')
+            results = dict((result['name'], result) for result in checks)
+            ready = [result['name'] for result in checks if result['status'] == 'SUCCESS']
+            for result in checks:
+                if result['status'] != 'SUCCESS':
+                    result['status'] = 'CHECK_FAILED'
+
+            attempted = failed = 0
+            paused = None
+            flash = FleetRunner(self.rdmc, options.maxflashes,
+                                task=functools.partial(self.rollouttask, options, comptype,
+                                                       components, tempdir))
+            waves = _rollout_waves(len(ready), options.canary, options.wave)
+            for wave, size in enumerate(waves, 1):
+                names = ready[attempted:attempted + size]
+                self.rdmc.ui.printer("Wave {} of {}: flashing {} servers...\n".format(\
+                    wave, len(waves), len(names)))
+                for result in flash.run_logged([(name, login_line(arguments[name])) \
+                                                for name in names], createdir, 'Flashing'):
+                    result['wave'] = wave
+                    result['check'] = results[result['name']]['log']
+                    results[result['name']] = result
+                    failed += result['status'] != 'SUCCESS'
+                attempted += len(names)
+
+                if attempted < len(ready) and failed > options.threshold * attempted:
+                    paused = wave
+                    break
 
+            pending = ready[attempted:]
+            for name in pending:
+                results[name] = {'name': name, 'returncode': None, 'status': 'PENDING',
+                                 'check': results[name]['log']}
+            if pending:
+                pendingfile = os.path.join(createdir, PENDING_FILE)
+                with os.fdopen(os.open(pendingfile, os.O_WRONLY | os.O_CREAT, 0o600), 'w') as \
+                        pendingfh:
+                    pendingfh.write("".join(" ".join(arguments[name]) + "\n" for name in pending))
+
+            summary = write_summary(createdir, [results[name] for name, _ in targets], started,
+                                    fwpkg=os.path.basename(options.fwpkg), type=comptype,
+                                    canary=options.canary, wave=options.wave,
+                                    maxflashes=options.maxflashes,
+                                    threshold=options.threshold, paused=paused)
         finally:
             if tempdir:
                 shutil.rmtree(tempdir)
 
-        self.cmdbase.logout_routine(self, options)
-        #Return code
+        self.rdmc.ui.printer("{} servers flashed, {} failed, {} pending. Details are under the "
+                             "{} directory.\n".format(summary['succeeded'], summary['failed'],
+                                                       summary['pending'], createdir))
+        if paused:
+            raise FirmwareUpdateError("The rollout was paused after wave {}, {} of the {} "
+                                      "servers flashed failed. Run the rollout again with "
+                                      "--rollout {} to continue.".format(paused, failed,
+                                                                         attempted, pendingfile))
+        if summary['failed']:
+            raise MultipleServerConfigError("One or more servers failed to flash the firmware.")
+
         return ReturnCodes.SUCCESS
 
+    def rollouttask(self, options, comptype, components, tempdir, session, line):
+        """ Work of a rollout on one server, running in the session of the server: logs in and
+        checks the server, then flashes the components if they are provided
+
+        :param options: command line options
+        :type options: list.
+        :param comptype: type of component. Either A,B,C, or D.
+        :type comptype: str.
+        :param components: components to upload, None to only check the server
+        :type components: list.
+        :param tempdir: path to temp directory
+        :type tempdir: string.
+        :param session: session of the server
+        :type session: RdmcCommand.
+        :param line: login command line of the server
+        :type line: str.
+        """
+        session.run_line(session.opts, line)
+        if session.retcode != ReturnCodes.SUCCESS:
+            return
+
+        fwpkg = session.load_command(session.search_commands(self.__class__.__name__))
+        try:
+            fwpkg.ilocheck(options)
+            fwpkg.queuecheck(options, comptype)
+            if components is not None:
+                fwpkg.flashtarget(options, components, tempdir, comptype)
+        except Exception as excp:
+            session.handle_exceptions(excp)
+
     def taskqueuecheck(self):
         """ Check taskqueue for potential issues before starting """
 
@@ -167,8 +356,8 @@ class FwpkgCommand():
             pass
 
         powerstate = results.resp.dict['PowerState']
-        tasks = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/UpdateTaskQueue/')
+        tasks = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/UpdateTaskQueue/')
 
         for task in tasks:
             if task['State'] == 'Exception':
@@ -192,6 +381,40 @@ class FwpkgCommand():
     def preparefwpkg(self, pkgfile):
         """ Prepare fwpkg file for flashing
 
+        :param pkgfile: Location of the .fwpkg file
+        :type pkgfile: string.
+        :returns: returns the files needed to flash, directory they are located
+                                                            in, and type of file.
+        :rtype: string, string, string
+        """
+        imagefiles, tempdir, comptype = FwpkgCommand.unpackfwpkg(pkgfile)
+
+        results = None
+        if comptype != 'C':
+            results = self.rdmc.app.getprops(selector="UpdateService.",
+                                             props=['Oem/Hpe/Capabilities'])
+
+        if "blobstore" in self.rdmc.app.redfishinst.base_url and comptype in ['A','B'] and results and \
+                                                        'UpdateFWPKG' in results[0]['Oem']['Hpe']['Capabilities']:
+            dll = BlobStore2.gethprestchifhandle()
+            dll.isFwpkg20.argtypes = [c_char_p, c_int]
+            dll.isFwpkg20.restype = c_bool
+
+            with open(pkgfile, 'rb') as fwpkgfile:
+                fwpkgdata = fwpkgfile.read()
+
+            fwpkg_buffer = ctypes.create_string_buffer(fwpkgdata)
+            if dll.isFwpkg20(fwpkg_buffer, 2048):
+                shutil.rmtree(tempdir)
+                imagefiles = [pkgfile]
+                tempdir = ''
+
+        return imagefiles, tempdir, comptype
+
+    @staticmethod
+    def unpackfwpkg(pkgfile):
+        """ Unpacks a fwpkg file to a temporary directory, no server is needed
+
         :param pkgfile: Location of the .fwpkg file
         :type pkgfile: string.
         :returns: returns the files needed to flash, directory they are located
@@ -222,33 +445,17 @@ class FwpkgCommand():
         comptype = _get_comp_type(payloaddata)
 
         if comptype == 'C':
-            imagefiles = [self.auxcommands['flashfwpkg'].type_c_change(tempdir, pkgfile)]
+            imagefiles = [FwpkgCommand.type_c_change(tempdir, pkgfile)]
         else:
-            results = self.rdmc.app.getprops(selector="UpdateService.",
-                                             props=['Oem/Hpe/Capabilities'])
-
             for device in payloaddata['Devices']['Device']:
                 for firmwareimage in device['FirmwareImages']:
                     if firmwareimage['FileName'] not in imagefiles:
                         imagefiles.append(firmwareimage['FileName'])
 
-        if "blobstore" in self.rdmc.app.redfishinst.base_url and comptype in ['A','B'] and results and \
-                                                        'UpdateFWPKG' in results[0]['Oem']['Hpe']['Capabilities']:
-            dll = BlobStore2.gethprestchifhandle()
-            dll.isFwpkg20.argtypes = [c_char_p, c_int]
-            dll.isFwpkg20.restype = c_bool
-
-            with open(pkgfile, 'rb') as fwpkgfile:
-                fwpkgdata = fwpkgfile.read()
-
-            fwpkg_buffer = ctypes.create_string_buffer(fwpkgdata)
-            if dll.isFwpkg20(fwpkg_buffer, 2048):
-                imagefiles = [pkgfile]
-                tempdir = ''
-
         return imagefiles, tempdir, comptype
 
-    def type_c_change(self, tdir, pkgloc):
+    @staticmethod
+    def type_c_change(tdir, pkgloc):
         """ Special changes for type C
 
         :param tempdir: path to temp directory
@@ -383,3 +590,55 @@ class FwpkgCommand():
                  "NOTE: This requires an account login with the system recovery set privilege.",
             default=False
         )
+        customparser.add_argument(
+            '--rollout',
+            dest='rollout',
+            help="Flash the servers of SOURCE in waves instead of the logged in server. SOURCE "
+                 "is a multiple server file (--url <iLO url> -u <user> -p <password> per line) "
+                 "or comma separated names or patterns of the [targets] section of the "
+                 "configuration file.",
+            default=None,
+            metavar='SOURCE'
+        )
+        customparser.add_argument(
+            '--canary',
+            dest='canary',
+            type=int,
+            help="Used with --rollout, the number of servers flashed in the first wave. "
+                 "(default: 1)",
+            default=1
+        )
+        customparser.add_argument(
+            '--wave',
+            dest='wave',
+            type=float,
+            help="Used with --rollout, the percentage of the servers flashed in each wave "
+                 "after the canary wave. (default: 25)",
+            default=25,
+            metavar='PERCENT'
+        )
+        customparser.add_argument(
+            '--max-flashes',
+            dest='maxflashes',
+            type=int,
+            help="Used with --rollout, the number of servers flashed at the same time. "
+                 "(default: %s)" % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS
+        )
+        customparser.add_argument(
+            '--failure-threshold',
+            dest='threshold',
+            type=float,
+            help="Used with --rollout, the ratio of failed servers, from 0 to 1, that pauses "
+                 "the rollout before the next wave. (default: 0.1)",
+            default=0.1,
+            metavar='RATIO'
+        )
+        customparser.add_argument(
+            '-o',
+            '--outputdirectory',
+            dest='outdirectory',
+            help="Used with --rollout, the directory for the logs and the summary of the "
+                 "rollout. (default: current directory)",
+            default=None
+        )
@@ -26,6 +26,7 @@ from argparse import RawDescriptionHelpFormatter
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, Encryption,\
                         InvalidCommandLineErrorOPTS, InvalidCommandLineError,\
                         NoContentsFoundForOperationError, InvalidFileInputError
+from rdmc_fetch import collection_members
 
 class InstallSetCommand():
     """ Main download command class """
@@ -115,10 +116,10 @@ class InstallSetCommand():
         :type name: str.
         """
         path = '/redfish/v1/UpdateService/InstallSets/'
-        comps = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/ComponentRepository/')
+        comps = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/ComponentRepository/')
 
-        sets = self.rdmc.app.getcollectionmembers(path)
+        sets = collection_members(self.rdmc.app, path)
 
         if not name:
             name = str(datetime.now())
@@ -166,8 +167,8 @@ class InstallSetCommand():
         """
         path = None
         name = options.name
-        sets = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/InstallSets/')
+        sets = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/InstallSets/')
 
         for setvar in sets:
             if setvar['Name'] == name:
@@ -189,7 +190,7 @@ class InstallSetCommand():
         :type name: str.
         """
         path = None
-        sets = self.rdmc.app.getcollectionmembers('/redfish/v1/UpdateService/InstallSets/')
+        sets = collection_members(self.rdmc.app, '/redfish/v1/UpdateService/InstallSets/')
 
         for setvar in sets:
             if setvar['Name'] == name:
@@ -203,7 +204,7 @@ class InstallSetCommand():
 
     def removeinstallsets(self):
         """Removes all install sets """
-        sets = self.rdmc.app.getcollectionmembers('/redfish/v1/UpdateService/InstallSets/')
+        sets = collection_members(self.rdmc.app, '/redfish/v1/UpdateService/InstallSets/')
 
         if not sets:
             self.rdmc.ui.printer('No install sets found.\n')
@@ -219,7 +220,7 @@ class InstallSetCommand():
 
     def printinstallsets(self, options):
         """Prints install sets """
-        sets = self.rdmc.app.getcollectionmembers('/redfish/v1/UpdateService/InstallSets/')
+        sets = collection_members(self.rdmc.app, '/redfish/v1/UpdateService/InstallSets/')
         if not options.json:
             self.rdmc.ui.printer('Install Sets:\n')
 
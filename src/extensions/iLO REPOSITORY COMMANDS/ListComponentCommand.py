@@ -21,6 +21,7 @@ import json
 
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, InvalidCommandLineErrorOPTS, \
                         Encryption
+from rdmc_fetch import collection_members
 
 class ListComponentCommand():
     """ Main download command class """
@@ -63,8 +64,8 @@ class ListComponentCommand():
             raise IncompatibleiLOVersionError('iLO Repository commands are '
                                               'only available on iLO 5.')
 
-        comps = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/ComponentRepository/')
+        comps = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/ComponentRepository/')
 
         if comps:
             self.printcomponents(comps, options)
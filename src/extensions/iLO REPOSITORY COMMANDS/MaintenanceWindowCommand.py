@@ -27,6 +27,7 @@ from redfish.ris.rmc_helper import ValidationError
 
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, NoContentsFoundForOperationError,\
                         InvalidCommandLineErrorOPTS, InvalidCommandLineError, Encryption
+from rdmc_fetch import collection_members
 
 __subparsers__ = ['add', 'delete']
 
@@ -74,8 +75,8 @@ class MaintenanceWindowCommand():
             raise IncompatibleiLOVersionError(
                 'iLO Repository commands are only available on iLO 5.')
 
-        windows = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/MaintenanceWindows/')
+        windows = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/MaintenanceWindows/')
 
         if options.command.lower() == 'add':
             self.addmaintenancewindow(options, windows, options.time_window)
@@ -24,6 +24,7 @@ from six.moves import input
 
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, \
     InvalidCommandLineErrorOPTS, InvalidCommandLineError
+from rdmc_fetch import collection_members
 
 
 class MakeInstallSetCommand():
@@ -105,8 +106,8 @@ class MakeInstallSetCommand():
         self.rdmc.ui.warn("Entering new shell, type quit to leave!\n")
         if self.loggedin:
             self.rdmc.ui.printer("Running in logged in mode.")
-            self.comps = self.rdmc.app.getcollectionmembers(
-                '/redfish/v1/UpdateService/ComponentRepository/')
+            self.comps = collection_members(
+                self.rdmc.app, '/redfish/v1/UpdateService/ComponentRepository/')
         else:
             self.rdmc.ui.printer("Running in basic guidance mode.")
         while True:
@@ -25,6 +25,7 @@ from redfish.ris.rmc_helper import IdTokenError
 from rdmc_helper import IncompatibleiLOVersionError, ReturnCodes, NoContentsFoundForOperationError, \
     InvalidCommandLineErrorOPTS, InvalidCommandLineError, Encryption, \
     TaskQueueError
+from rdmc_fetch import collection_members
 
 __subparsers__ = ['create']
 
@@ -99,7 +100,7 @@ class UpdateTaskQueueCommand():
 
     def resetqueue(self):
         """ Deletes everything in the update task queue"""
-        tasks = self.rdmc.app.getcollectionmembers('/redfish/v1/UpdateService/UpdateTaskQueue/')
+        tasks = collection_members(self.rdmc.app, '/redfish/v1/UpdateService/UpdateTaskQueue/')
         if not tasks:
             self.rdmc.ui.printer('No tasks found.\n')
 
@@ -111,7 +112,7 @@ class UpdateTaskQueueCommand():
 
     def cleanqueue(self):
         """ Deletes all finished or errored tasks in the update task queue"""
-        tasks = self.rdmc.app.getcollectionmembers('/redfish/v1/UpdateService/UpdateTaskQueue/')
+        tasks = collection_members(self.rdmc.app, '/redfish/v1/UpdateService/UpdateTaskQueue/')
         if not tasks:
             self.rdmc.ui.printer('No tasks found.\n')
 
@@ -134,10 +135,10 @@ class UpdateTaskQueueCommand():
         tpmflag = None
 
         path = '/redfish/v1/UpdateService/UpdateTaskQueue/'
-        comps = self.rdmc.app.getcollectionmembers('/redfish/v1/UpdateService/'
-                                                   'ComponentRepository/')
-        curr_tasks = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/UpdateTaskQueue/')
+        comps = collection_members(self.rdmc.app, '/redfish/v1/UpdateService/'
+                                                  'ComponentRepository/')
+        curr_tasks = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/UpdateTaskQueue/')
         for task in tasks:
             usedcomp = None
             newtask = None
@@ -201,8 +202,8 @@ class UpdateTaskQueueCommand():
         :param options: command line options
         :type options: list.
         """
-        tasks = self.rdmc.app.getcollectionmembers(
-            '/redfish/v1/UpdateService/UpdateTaskQueue/')
+        tasks = collection_members(
+            self.rdmc.app, '/redfish/v1/UpdateService/UpdateTaskQueue/')
         if not tasks:
             self.rdmc.ui.printer('No tasks found.\n')
             return
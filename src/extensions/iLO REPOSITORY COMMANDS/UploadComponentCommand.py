@@ -21,6 +21,7 @@ import os
 import json
 import time
 import shutil
+import tempfile
 from random import choice
 from string import ascii_lowercase
 import ctypes
@@ -224,7 +225,7 @@ class UploadComponentCommand():
             if self.rdmc.app.cache:
                 tempdir = os.path.join(self.rdmc.app.cachedir, tempfoldername)
             else:
-                tempdir = os.path.join(sys.executable, tempfoldername)
+                tempdir = os.path.join(tempfile.gettempdir(), tempfoldername)
 
             self.rdmc.ui.printer("Spliting component. Temporary " \
                                  "cache directory at %s\n" % tempdir)
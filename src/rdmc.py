@@ -22,28 +22,30 @@ This is the main module for Redfish Utility which handles all of the CLI and UI
 # ---------Imports---------
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
+import sys
+
+# the startup profiler has to hook imports before anything else is loaded
+from rdmc_profiler import PROFILER
+if PROFILER.requested(sys.argv[1:]):
+    PROFILER.start()
+
 from builtins import (bytes, str, open, super, range, input, int, object)
 import os
-import sys
 import six
 import ssl
 import copy
 import glob
+import json
 import errno
 import shlex
 import ctypes
 import logging
+import threading
 import traceback
 import importlib
 import collections
 
-from six.moves import input
-from prompt_toolkit import PromptSession
-from prompt_toolkit.history import InMemoryHistory
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.shortcuts import CompleteStyle
-from prompt_toolkit.output import Output
-from prompt_toolkit.formatted_text import HTML
+from six.moves import input, shlex_quote
 from argparse import RawTextHelpFormatter
 
 import redfish.ris
@@ -70,11 +72,17 @@ from rdmc_helper import ReturnCodes, RdmcError, ConfigurationFileError, CommandN
     TimeOutError, DownloadError, UploadError, BirthcertParseError, ResourceExists, \
     IncompatableServerTypeError, IloLicenseError, InvalidKeyError, \
     UnableToDecodeError, UnabletoFindDriveError, Encryption, PathUnavailableError, \
-    TaskQueueError, UsernamePasswordRequiredError, TabAndHistoryCompletionClass, iLORisCorruptionError, \
+    TaskQueueError, UsernamePasswordRequiredError, iLORisCorruptionError, \
     CloudConnectTimeoutError, CloudConnectFailedError, ProxyConfigFailedError, AlreadyCloudConnectedError
 
 from argparse import ArgumentParser
 from rdmc_base_classes import RdmcCommandBase, RdmcOptionParser, HARDCODEDLIST
+from rdmc_cache import RdmcCacheManager, command_target
+from rdmc_monolith import RdmcApp, TYPEPATH
+from rdmc_fleet import FleetRunner, select_targets, target_name, json_output
+from rdmc_transport import TRANSPORT, RATE_LIMITER, CONDITIONAL_CACHE
+from rdmc_trace import HTTP_TRACER
+from rdmc_cassette import Recorder, Player
 
 from contextlib import contextmanager
 
@@ -101,12 +109,13 @@ try:
     # enable fips mode if our special functions are available in _ssl and OS is
     # in FIPS mode
     FIPSSTR = ""
-    if Encryption.check_fips_mode_os() and not Encryption.check_fips_mode_ssl():
-        ssl.FIPS_mode_set(int(1))
-        if ssl.FIPS_mode():
-            FIPSSTR = "FIPS mode enabled using openssl version %s.\n" % ssl.OPENSSL_VERSION
-        else:
-            sys.stderr.write("WARNING: Unable to enable FIPS mode!\n")
+    with PROFILER.timed('startup', 'fips mode check'):
+        if Encryption.check_fips_mode_os() and not Encryption.check_fips_mode_ssl():
+            ssl.FIPS_mode_set(int(1))
+            if ssl.FIPS_mode():
+                FIPSSTR = "FIPS mode enabled using openssl version %s.\n" % ssl.OPENSSL_VERSION
+            else:
+                sys.stderr.write("WARNING: Unable to enable FIPS mode!\n")
 except AttributeError:
     pass
 
@@ -125,23 +134,58 @@ class RdmcCommand(RdmcCommandBase):
         self.opts = None
         self.encoding = None
         self.config = RdmcConfig()
-        self.app = redfish.ris.RmcApp(showwarnings=True)
+        self.app = RdmcApp(showwarnings=True)
+        self.app._cm = RdmcCacheManager(self.app)
         self.retcode = 0
         self.candidates = dict()
         self.comm_map = dict()  # point command id names or alias to handle
         self.commlist = list()
         self._redobj = None
-        self.loaded_commands = []
-
-        # import all extensions dynamically
+        self._tab_thread = None  # background refresh of the tab completion lists
+        self._tab_cache = dict()  # completion lists per selection of _tab_monolith
+        self._tab_monolith = None
+        self._tab_changes = None  # changes of _tab_monolith the cached lists were built with
+        self._tab_key = None
+        self.loaded_commands = dict()  # command name to instance with its parser already built
+        self.manifest = dict()  # command class name to manifest entry
+
+        # resolve extensions from the manifest built when packaging, import them all when it is
+        # missing or does not match the extensions
+        with PROFILER.timed('startup', 'command manifest'):
+            entries = extensions.load_manifest(version=versioning.__version__)
+        if entries is None:
+            with PROFILER.timed('startup', 'import extensions'):
+                entries = self.import_extensions()
+
+        entries = dict((entry['classname'], entry) for entry in entries)
         for name in extensions.classNames:
+            if name not in entries:
+                continue
+            entry = entries[name]
+            cName = name.rsplit('.', 1)[-1]
+            self.manifest[cName] = entry
+            self.add_command(cName, section=entry['section'])
+
+            # command mapping
+            self.comm_map[entry['name']] = cName
+            for alias in entry['aliases']:
+                self.comm_map[alias] = cName
+
+        # ---------End of imports---------
+
+    def import_extensions(self):
+        """ Imports and instantiates every extension command, used without a manifest and to
+        build it
+
+        :returns: list of manifest entries for the commands that initialized
+        """
+        entries = []
+        for name in extensions.command_class_names():
             pkgName, cName = name.rsplit('.', 1)
             pkgName = 'extensions' + pkgName
             try:
-                if '__pycache__' not in pkgName and 'Command' in cName:
+                with PROFILER.timed('extension', pkgName):
                     self.commands_dict[cName] = getattr(importlib.import_module(pkgName), cName)()
-                    sName = pkgName.split('.')[1]
-                    self.add_command(cName, section=sName)
             except cliutils.ResourceAllocationError as excp:
                 self.ui.error(excp)
                 retcode = ReturnCodes.RESOURCE_ALLOCATION_ISSUES_ERROR
@@ -150,25 +194,56 @@ class RdmcCommand(RdmcCommandBase):
                 sys.exit(retcode)
             except Exception as excp:
                 self.ui.error(("loading command: %s" % cName), None)
+                continue
 
-        # command mapping
-        commands_to_remove = []
-        for command in self.commands_dict:
             try:
-                self.comm_map[self.commands_dict[command].ident.get('name')] = command
-                for alias in self.commands_dict[command].ident.get('aliases'):
-                    self.comm_map[alias] = command
+                ident = self.commands_dict[cName].ident
+                entries.append({'classname': name, 'module': pkgName, 'section': pkgName.split('.')[1],
+                                'name': ident['name'], 'aliases': list(ident.get('aliases')),
+                                'summary': ident['summary']})
             except Exception as excp:
                 self.ui.command_not_enabled(("Command \'%s\' unable to be "
-                                             "initialized...Removing" % command), excp)
-                commands_to_remove.append(command)
+                                             "initialized...Removing" % cName), excp)
+                del self.commands_dict[cName]
 
-        # removing commands marked for deletion
-        for cmd in commands_to_remove:
-            del self.commands_dict[cmd]
-        del commands_to_remove
+        return entries
 
-        # ---------End of imports---------
+    def _import_command(self, cName):
+        """ Imports and instantiates a single command listed in the manifest
+
+        :param cName: command class name
+        :type cName: str.
+        :returns: command instance
+        """
+        try:
+            with PROFILER.timed('extension', self.manifest[cName]['module']):
+                return getattr(importlib.import_module(self.manifest[cName]['module']), cName)()
+        except cliutils.ResourceAllocationError:
+            raise
+        except Exception as excp:
+            self.ui.error(("loading command: %s" % cName), None)
+            raise cliutils.CommandNotFoundException(cName)
+
+    def new_session(self):
+        """ Creates a command engine sharing the options and configuration of this one but
+        with its own RmcApp and command instances, so several targets can stay logged in
+        within one process. Data is kept in memory only.
+
+        :returns: new RdmcCommand instance
+        """
+        session = type(self)(name=self.name, usage=self.parser.usage, summary=self.summary,
+                             aliases=self.aliases, argparser=RdmcOptionParser())
+        session.opts = copy.copy(self.opts)
+        session.opts.nologo = True
+        session.config = self.config
+        session.interactive = True
+        session.encoding = self.encoding
+        session.app.verbose = session.ui.verbosity = self.opts.verbose
+        session.app.typepath.adminpriv = self.app.typepath.adminpriv
+        if self.encoding:
+            session.app.set_encode_funct(Encryption.encode_credentials)
+            session.app.set_decode_funct(Encryption.decode_credentials)
+        return session
 
     def add_command(self, command_name, section=None):
         """ Handles to addition of new commands
@@ -194,40 +269,77 @@ class RdmcCommand(RdmcCommandBase):
         :type cmdname: str.
         """
 
-        try:
-            tmp = self.comm_map.get(cmdname)
-            if not tmp:
-                tmp = cmdname
-            return self.commands_dict[tmp]
-        except KeyError:
-            raise cliutils.CommandNotFoundException(cmdname)
+        tmp = self.comm_map.get(cmdname)
+        if not tmp:
+            tmp = cmdname
+        if tmp not in self.commands_dict:
+            if tmp not in self.manifest:
+                raise cliutils.CommandNotFoundException(cmdname)
+            self.commands_dict[tmp] = self._import_command(tmp)
+        return self.commands_dict[tmp]
+
+    def command_info(self, cmdname):
+        """ Returns the manifest entry of a command without importing it
+
+        :param cmdname: command class name
+        :type cmdname: str.
+        :returns: dictionary with name, aliases, summary, section and module
+        """
+        return self.manifest[cmdname]
 
     def load_command(self, cmd):
-        """ Fully Loads command and returns the class instance
+        """ Fully Loads command and returns the class instance. The parser and aux command
+        wiring are built once per process and reused until invalidate_commands is called.
 
         :param cmd: command identifier
         :type opts: class
         :returns: defined class instance
 
         """
+        name = cmd.ident['name']
+        if self.loaded_commands.get(name) is cmd:
+            return cmd
+
         try:
-            cmd.cmdbase = RdmcCommandBase(cmd.ident['name'], cmd.ident['usage'],
-                                          cmd.ident['summary'], cmd.ident['aliases'])
-            cmd.parser = ArgumentParser(prog=cmd.ident['name'], usage=cmd.ident['usage'],
-                                        description=cmd.ident['description'], formatter_class=RawTextHelpFormatter)
-            cmd.rdmc = self
-            cmd.definearguments(cmd.parser)
-            for auxcmd in cmd.ident['auxcommands']:
-                auxcmd = self.search_commands(auxcmd)
-                if auxcmd not in self.loaded_commands:
-                    self.loaded_commands.append(auxcmd)
+            with PROFILER.timed('load_command', name):
+                cmd.cmdbase = RdmcCommandBase(name, cmd.ident['usage'],
+                                              cmd.ident['summary'], cmd.ident['aliases'])
+                cmd.parser = ArgumentParser(prog=name, usage=cmd.ident['usage'],
+                                            description=cmd.ident['description'], formatter_class=RawTextHelpFormatter)
+                cmd.rdmc = self
+                with PROFILER.timed('arguments', name):
+                    cmd.definearguments(cmd.parser)
+                # registered before the aux commands so commands referencing each other terminate
+                self.loaded_commands[name] = cmd
+                for auxcmd in cmd.ident['auxcommands']:
+                    auxcmd = self.search_commands(auxcmd)
                     cmd.auxcommands[auxcmd.ident['name']] = self.load_command(auxcmd)
-                else:
-                    cmd.auxcommands[auxcmd.ident['name']] = self.commands_dict[self.comm_map \
-                        [auxcmd.ident['name']]]
             return cmd
         except Exception as excp:
-            raise RdmcError("Unable to load command {}: {}".format(cmd.ident['name'], excp))
+            self.loaded_commands.pop(name, None)
+            raise RdmcError("Unable to load command {}: {}".format(name, excp))
+
+    def command_flags(self, cmdname):
+        """ Option flags of a command, for tab completion
+
+        :param cmdname: command name or alias
+        :type cmdname: str.
+        :returns: sorted list of flags
+        """
+        cmd = self.load_command(self.search_commands(cmdname))
+        return sorted(flag for action in cmd.parser._actions for flag in action.option_strings)
+
+    def invalidate_commands(self, names=None):
+        """ Drops cached parsers so the next load_command rebuilds them
+
+        :param names: command names to invalidate, all commands if not provided
+        :type names: list.
+        """
+        if names is None:
+            self.loaded_commands.clear()
+        else:
+            for name in names:
+                self.loaded_commands.pop(name, None)
 
     def _run_command(self, opts, args, help_disp):
         """ Calls the commands run function
@@ -240,6 +352,7 @@ class RdmcCommand(RdmcCommandBase):
         cmd = self.search_commands(args[0])
 
         self.load_command(cmd)
+        TYPEPATH.use(self.app.typepath)
 
         if opts.debug:
             LOGGER.setLevel(logging.DEBUG)
@@ -247,10 +360,11 @@ class RdmcCommand(RdmcCommandBase):
 
         if not opts.nologo and not self.interactive:
             CLI.version(self._progname, versioning.__version__, versioning.__extracontent__)
-        if len(args) > 1:
-            return cmd.run(args[1:], help_disp)
+        with PROFILER.timed('run', cmd.ident['name']), HTTP_TRACER.command(cmd.ident['name']):
+            if len(args) > 1:
+                return cmd.run(args[1:], help_disp)
 
-        return cmd.run([], help_disp=help_disp)
+            return cmd.run([], help_disp=help_disp)
 
     def run(self, line, help_disp=False):
         """ Main rdmc command worker function
@@ -299,8 +413,8 @@ class RdmcCommand(RdmcCommandBase):
                 else:
                     self.parser.epilog = self.parser.epilog + "\n\n" + key + "\n"
                 for cmd in cmddict[key]:
-                    c_help = "%-25s - %s\n" % (self.commands_dict[cmd].ident['name'],
-                                               self.commands_dict[cmd].ident['summary'])
+                    c_help = "%-25s - %s\n" % (self.manifest[cmd]['name'],
+                                               self.manifest[cmd]['summary'])
                     self.parser.epilog = self.parser.epilog + c_help
 
         (self.opts, nargv) = self.parser.parse_known_args(line)
@@ -323,7 +437,8 @@ class RdmcCommand(RdmcCommandBase):
 
         try:
             # Test encoding functions are there
-            Encryption.encode_credentials('test')
+            with PROFILER.timed('startup', 'encoding check'):
+                Encryption.encode_credentials('test')
             self.app.set_encode_funct(Encryption.encode_credentials)
             self.app.set_decode_funct(Encryption.decode_credentials)
             self.encoding = True
@@ -344,7 +459,8 @@ class RdmcCommand(RdmcCommandBase):
         if not os.path.isfile(self.config.configfile):
             LOGGER.warning("Config file '%s' not found\n\n", self.config.configfile)
 
-        self.config.load()
+        with PROFILER.timed('config', self.config.configfile):
+            self.config.load()
 
         cachedir = None
         if not self.opts.nocache:
@@ -352,7 +468,6 @@ class RdmcCommand(RdmcCommandBase):
             cachedir = self.config.cachedir
 
         if cachedir:
-            self.app.cachedir = cachedir
             try:
                 os.makedirs(cachedir)
             except OSError as ex:
@@ -360,6 +475,11 @@ class RdmcCommand(RdmcCommandBase):
                     pass
                 else:
                     raise
+            self.app._cm.set_root(cachedir, command_target(line))
+            try:
+                self.app._cm.set_format(self.config.cacheformat)
+            except ValueError as excp:
+                LOGGER.warning("%s Using json.", excp)
 
         if self.opts.logdir and self.opts.debug:
             logdir = self.opts.logdir
@@ -387,17 +507,48 @@ class RdmcCommand(RdmcCommandBase):
             LOGGER.addHandler(lfile)
             self.app.LOGGER = LOGGER
 
+        try:
+            self.install_transport(cachedir)
+        except InvalidCommandLineError as excp:
+            self.ui.error("%s\n" % excp)
+            return ReturnCodes.INVALID_COMMAND_LINE_ERROR
+        except InvalidFileInputError as excp:
+            self.ui.error("%s\n" % excp)
+            return ReturnCodes.INVALID_FILE_INPUT_ERROR
+
+        if self.opts.targets:
+            if self.opts.script or not nargv:
+                self.ui.error("A command is required with --targets and it can not be "
+                              "combined with --script.\n")
+                return ReturnCodes.INVALID_COMMAND_LINE_ERROR
+            self.retcode = self.run_targets(self.opts, nargv)
+            return self.retcode
+
+        # logout --url restores the session of the target to end it
         if ("login" in line or any(x.startswith("--url") for x in line) or not line) \
-                and not (any(x.startswith(("-h", "--h")) for x in nargv) or "help" in line):
+                and not (any(x.startswith(("-h", "--h")) for x in nargv) or "help" in line) \
+                and nargv[:1] != ['logout']:
             if not any(x.startswith("--sessionid") for x in line):
                 self.app.logout()
         else:
             creds, enc = self._pull_creds(nargv)
-            self.app.restore(creds=creds, enc=enc)
+            with PROFILER.timed('session', 'restore'):
+                self.app.restore(creds=creds, enc=enc)
             self.opts.is_redfish = self.app.typepath.updatedefinesflag(
                 redfishflag=self.opts.is_redfish)
 
-        if nargv:
+        if self.opts.script:
+            if nargv:
+                self.ui.error("A command can not be combined with --script.\n")
+                return ReturnCodes.INVALID_COMMAND_LINE_ERROR
+            self.retcode = self.run_script(self.opts)
+
+            if self.app.cache:
+                self.app.save()
+            else:
+                self.app.logout()
+            return self.retcode
+        elif nargv:
             try:
                 self.retcode = self._run_command(self.opts, nargv, help_disp)
                 if self.app.cache:
@@ -427,6 +578,14 @@ class RdmcCommand(RdmcCommandBase):
         :param opts: command options
         :type opts: options.
         """
+        # interactive only dependencies, one-shot commands never pay for them
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+        from prompt_toolkit.shortcuts import CompleteStyle
+        from prompt_toolkit.formatted_text import HTML
+
+        from rdmc_completer import TabAndHistoryCompletionClass
+
         self.interactive = True
 
         if not opts.nologo:
@@ -440,8 +599,8 @@ class RdmcCommand(RdmcCommandBase):
             LOGGER.setLevel(logging.DEBUG)
             LERR.setLevel(logging.DEBUG)
 
-        for command, values in self.commands_dict.items():
-            self.commlist.append(values.ident['name'])
+        for command, values in self.manifest.items():
+            self.commlist.append(values['name'])
 
         for item in self.commlist:
             if item == "help":
@@ -449,7 +608,7 @@ class RdmcCommand(RdmcCommandBase):
             else:
                 self.candidates[item] = []
 
-        self._redobj = TabAndHistoryCompletionClass(dict(self.candidates))
+        self._redobj = TabAndHistoryCompletionClass(dict(self.candidates), self.command_flags)
 
         def bottom_toolbar():
             return HTML('<b>Restful Interface Tool</b>')
@@ -482,30 +641,184 @@ class RdmcCommand(RdmcCommandBase):
 
             if not len(line):
                 continue
-            elif line.endswith(os.linesep):
-                line.rstrip(os.linesep)
-
-            shlex.escape = ''
-            nargv = shlex.shlex(line, posix=True)
-            nargv.escape = ''
-            nargv.whitespace_split = True
-            nargv = list(nargv)
-            try:
-                if not (any(x.startswith("-h") for x in nargv) or
-                        any(x.startswith("--h") for x in nargv) or "help" in line):
-                    if "login " in line or line == 'login' or \
-                            any(x.startswith("--url") for x in nargv):
-                        self.app.logout()
-                self.retcode = self._run_command(opts, nargv, help_disp=False)
+
+            nargv = self.run_line(opts, line)
+            if nargv:
                 self.check_for_tab_lists(nargv)
-            except Exception as excp:
-                self.handle_exceptions(excp)
 
             if self.opts.verbose:
                 sys.stdout.write("iLOrest return code: %s\n" % self.retcode)
 
         return self.retcode
 
+    def run_line(self, opts, line):
+        """ Runs a single command line in the current session, the way the interactive
+        shell does
+
+        :param opts: command options
+        :type opts: options.
+        :param line: command line
+        :type line: str.
+        :returns: list of the parsed arguments if the command completed, None otherwise
+        """
+        if line.endswith(os.linesep):
+            line = line.rstrip(os.linesep)
+
+        shlex.escape = ''
+        nargv = shlex.shlex(line, posix=True)
+        nargv.escape = ''
+        nargv.whitespace_split = True
+        nargv = list(nargv)
+        # the completion refresh reads the monolith, let it finish before it changes
+        self.wait_for_tab_lists()
+        try:
+            if not (any(x.startswith("-h") for x in nargv) or
+                    any(x.startswith("--h") for x in nargv) or "help" in line):
+                if "login " in line or line == 'login' or \
+                        any(x.startswith("--url") for x in nargv):
+                    self.app.logout()
+                    self.app._cm.select_target(command_target(nargv))
+            self.retcode = self._run_command(opts, nargv, help_disp=False)
+        except Exception as excp:
+            self.handle_exceptions(excp)
+            return None
+
+        return nargv
+
+    def run_script(self, opts):
+        """ Script mode worker function, runs every line of the script file in one session
+
+        :param opts: command options
+        :type opts: options.
+        :returns: first non-zero return code or SUCCESS
+        """
+        if opts.script == '-':
+            lines = sys.stdin.readlines()
+        else:
+            try:
+                with open(opts.script, 'r') as scriptfile:
+                    lines = scriptfile.readlines()
+            except IOError:
+                self.ui.error("Unable to read the script file '%s'.\n" % opts.script)
+                return ReturnCodes.INVALID_FILE_INPUT_ERROR
+
+        # the session is shared by all lines, as in the interactive shell
+        self.interactive = True
+        if not opts.nologo:
+            CLI.version(self._progname, versioning.__version__, versioning.__extracontent__)
+
+        retcode = ReturnCodes.SUCCESS
+        for lineno, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            self.retcode = ReturnCodes.SUCCESS
+            self.run_line(opts, line)
+            # only the command name, the arguments may hold credentials
+            sys.stderr.write("iLOrest return code for line %s (%s): %s\n" % \
+                             (lineno, line.split()[0], self.retcode))
+
+            if self.retcode != ReturnCodes.SUCCESS:
+                if retcode == ReturnCodes.SUCCESS:
+                    retcode = self.retcode
+                if opts.stoponerror:
+                    break
+
+        return retcode
+
+    def install_transport(self, cachedir):
+        """ Installs the transport layers the options and configuration ask for, outermost
+        first: the conditional request cache, the rate limiter, the tracer and the recorder or
+        player of a cassette, which stands in for the server
+
+        :param cachedir: cache directory, None when caching is disabled
+        :type cachedir: str.
+        """
+        if self.opts.record and self.opts.replay:
+            raise InvalidCommandLineError("--record and --replay can not be combined.")
+
+        cassette = None
+        if self.opts.replay:
+            cassette = Player(self.opts.replay, latency=(self.opts.replay_latency or 0) / 1000.0)
+        elif self.opts.record:
+            cassette = Recorder(self.opts.record)
+
+        # GETs are sent with the ETags of earlier responses when asked for, kept between runs
+        # with the session of the server they came from. Not with a cassette, a replay must not
+        # depend on the ETags saved by earlier runs.
+        if not cassette and (self.opts.etagcache or self.config.etagcache):
+            CONDITIONAL_CACHE.configure(self.app._cm.target_client_dir if cachedir else None)
+            TRANSPORT.add(CONDITIONAL_CACHE)
+
+        if not self.opts.replay:
+            try:
+                RATE_LIMITER.configure(self.config.ratelimit, self.config.ratelimitburst,
+                                       self.config.globalratelimit,
+                                       self.config.globalratelimitburst)
+            except ValueError as excp:
+                LOGGER.warning("%s Requests are not rate limited.", excp)
+            if RATE_LIMITER.enabled:
+                TRANSPORT.add(RATE_LIMITER)
+
+        # after the rate limiter, so it times what goes on the wire without the waits
+        if self.opts.trace_http:
+            HTTP_TRACER.start()
+            TRANSPORT.add(HTTP_TRACER)
+
+        if cassette:
+            TRANSPORT.add(cassette)
+
+    def run_targets(self, opts, nargv):
+        """ Fleet mode worker function, runs the command on every server of --targets in a
+        session of its own, at most --parallel at a time. A JSON line is printed for every
+        server as soon as it completes.
+
+        :param opts: command options
+        :type opts: options.
+        :param nargv: command and its arguments
+        :type nargv: list.
+        :returns: SUCCESS if the command succeeded on every server
+        """
+        try:
+            if opts.parallel < 1:
+                raise InvalidCommandLineError("The number of parallel servers must be at "
+                                              "least 1.")
+            if any(x.startswith(("--url", "--sessionid")) for x in nargv):
+                raise InvalidCommandLineError("The servers are given by --targets, the "
+                                              "command can not include login arguments.")
+            targets = select_targets(opts.targets, self.config.inventory())
+        except Exception as excp:
+            self.handle_exceptions(excp)
+            return self.retcode
+
+        line = " ".join(shlex_quote(arg) for arg in nargv)
+        jobs = [(name, " ".join([line] + args), six.StringIO(), six.StringIO()) \
+                for name, args in targets]
+        streams = dict((job[0], job[2:]) for job in jobs)
+        urls = dict((name, target_name(args)) for name, args in targets)
+
+        retcode = ReturnCodes.SUCCESS
+        for result in FleetRunner(self, opts.parallel).run(jobs):
+            out, err = streams[result['name']]
+            record = {'target': result['name'],
+                      'host': urls[result['name']],
+                      'returncode': result['returncode'],
+                      'status': result['status'],
+                      'seconds': result['seconds'],
+                      'stdout': out.getvalue(),
+                      'stderr': err.getvalue()}
+            data = json_output(record['stdout'])
+            if data is not None:
+                record['data'] = data
+            sys.stdout.write(json.dumps(record) + '\n')
+            sys.stdout.flush()
+
+            if result['returncode'] != ReturnCodes.SUCCESS:
+                retcode = ReturnCodes.MULTIPLE_SERVER_CONFIG_FAIL
+
+        return retcode
+
     def handle_exceptions(self, excp):
         """ Main exception handler for both shell and interactive modes
 
@@ -813,21 +1126,68 @@ class RdmcCommand(RdmcCommandBase):
                 traceback.print_exc(file=sys.stderr)
 
     def check_for_tab_lists(self, command=None):
-        """ Function to generate available options for tab tab
+        """ Function to update the options for tab tab. The lists are built once per selection
+        in a background thread, so the prompt returns right away, and reused afterwards until
+        the monolith changes, by set, commit or load for instance.
+
         :param command: command for auto tab completion
         :type command: string.
         """
-        # TODO: don't always update, only when we have a different selector.
-        # Try to use args to get specific nested posibilities?
+        monolith = self.app.monolith
+        changes = getattr(monolith, 'changes', None)
+        if monolith is not self._tab_monolith or changes != self._tab_changes:
+            self._tab_monolith = monolith
+            self._tab_changes = changes
+            self._tab_cache = dict()
+            self._tab_key = None
+        key = self.app.selector
+        if key == self._tab_key:
+            return
+        self._tab_key = key
+
+        if key in self._tab_cache:
+            self._redobj.updates_tab_completion_lists(self._tab_cache[key])
+            return
+
+        self.wait_for_tab_lists()
+        self._tab_thread = threading.Thread(target=self._refresh_tab_lists, args=(key,))
+        self._tab_thread.daemon = True
+        self._tab_thread.start()
+
+    def wait_for_tab_lists(self):
+        """ Waits for the background refresh of the tab lists to finish """
+        if self._tab_thread:
+            self._tab_thread.join()
+            self._tab_thread = None
+
+    def _refresh_tab_lists(self, key):
+        """ Builds the tab lists of a selection and hands them to the completer
+
+        :param key: selection the lists are built for
+        :type key: str.
+        """
+        try:
+            changes = self.get_tab_lists()
+        except Exception as excp:
+            LOGGER.debug("Unable to update the tab completion lists: %s", excp)
+            return
+        # members refreshed while building are in the lists already
+        self._tab_changes = getattr(self._tab_monolith, 'changes', None)
+        self._tab_cache[key] = changes
+        if changes and self._redobj:
+            self._redobj.updates_tab_completion_lists(changes)
+
+    def get_tab_lists(self):
+        """ Function to generate available options for tab tab
+
+        :returns: dictionary of completion lists
+        """
         changes = dict()
 
         # select options
-        typeslist = list()
-
         try:
-            typeslist = sorted(set(self.app.types()))
-            changes["select"] = typeslist
-        except:
+            changes["select"] = sorted(set(self.app.types()))
+        except Exception:
             pass
 
         # get/set/info options
@@ -855,28 +1215,27 @@ class RdmcCommand(RdmcCommandBase):
 
             getlist.sort()
 
-            # if select command, get possible values
+            # possible values
             infovals = dict()
+            schema = None
 
-            if 'select' in command:
+            if typestr in dictcopy:
+                (_, attributeregistry) = self.app.get_selection(setenable=True)
+                schema, reg = self.app.get_model(dictcopy, attributeregistry)
 
-                if typestr in dictcopy:
-                    (_, attributeregistry) = self.app.get_selection(setenable=True)
-                    schema, reg = self.app.get_model(dictcopy, attributeregistry)
+                if reg:
+                    if "Attributes" in reg:
+                        reg = reg['Attributes']
+                    for item in getlist:
+                        for attribute in reg:
+                            if item == attribute:
+                                infovals.update({item: reg[attribute]})
+                                break
 
-                    if reg:
-                        if "Attributes" in reg:
-                            reg = reg['Attributes']
-                        for item in getlist:
-                            for attribute in reg:
-                                if item == attribute:
-                                    infovals.update({item: reg[attribute]})
-                                    break
+                    changes["nestedinfo"] = infovals
 
-                        changes["nestedinfo"] = infovals
-
-                    elif schema:
-                        changes["nestedinfo"] = schema
+                elif schema:
+                    changes["nestedinfo"] = schema
 
             changes["get"] = getlist
             changes["nestedprop"] = dictcopy['Attributes'] if 'Attributes' in dictcopy else dictcopy
@@ -886,7 +1245,7 @@ class RdmcCommand(RdmcCommandBase):
 
             readonly_list = []
 
-            for info in schema:
+            for info in schema or {}:
                 for checkread in schema[info]:
                     if 'readonly' in checkread and schema[info]['readonly'] is True:
                         readonly_list.append(info)
@@ -895,11 +1254,10 @@ class RdmcCommand(RdmcCommandBase):
 
             changes["set"] = set_list
 
-        except:
+        except Exception:
             pass
 
-        if changes:
-            self._redobj.updates_tab_completion_lists(changes)
+        return changes
 
     def _pull_creds(self, args):
         """Pull creds from the arguments for blobstore"""
@@ -1019,7 +1377,30 @@ if __name__ == '__main__':
 
         setproctitle.setproctitle(VARIABLE)
 
-    RDMC.retcode = RDMC.run(ARGUMENTS)
+    try:
+        RDMC.retcode = RDMC.run(ARGUMENTS)
+    finally:
+        CONDITIONAL_CACHE.save()
+
+    if PROFILER.enabled:
+        PROFILER.report(filename=RDMC.opts.profile_startup if RDMC.opts and \
+                        isinstance(RDMC.opts.profile_startup, six.string_types) else None)
+
+    if HTTP_TRACER.enabled:
+        HTTP_TRACER.report(filename=RDMC.opts.trace_http if \
+                           isinstance(RDMC.opts.trace_http, six.string_types) else None)
+
+    if RDMC.opts and RDMC.opts.verbose and CONDITIONAL_CACHE.hits + CONDITIONAL_CACHE.misses:
+        RDMC.ui.printer("Conditional request cache: " + CONDITIONAL_CACHE.report())
+
+    if RATE_LIMITER.stats:
+        for REPORTLINE in RATE_LIMITER.report():
+            LOGGER.info("Rate limiter %s", REPORTLINE.strip())
+        if RDMC.opts and RDMC.opts.verbose:
+            RDMC.ui.printer("Time spent throttled by the rate limiter: %.2fs\n" % \
+                            RATE_LIMITER.throttled())
+            for REPORTLINE in RATE_LIMITER.report():
+                RDMC.ui.printer("  " + REPORTLINE)
 
     if RDMC.opts:
         if RDMC.opts.verbose:
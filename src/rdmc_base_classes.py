@@ -32,6 +32,8 @@ import cliutils
 import versioning
 import rdmc_helper
 from rdmc_helper import InvalidCommandLineErrorOPTS
+from rdmc_fleet import DEFAULT_WORKERS
+from rdmc_crawl import CRAWL_WORKERS
 
 # from extensions.COMMANDS import LoginCommand, SelectCommand
 
@@ -181,6 +183,10 @@ class RdmcCommandBase(CommandBase):
                 inputline.extend(["--includelogs"])
             if options.path:
                 inputline.extend(["--path", options.path])
+            if getattr(options, 'lazycrawl', False):
+                inputline.extend(["--lazy-crawl"])
+            if getattr(options, 'crawlworkers', CRAWL_WORKERS) != CRAWL_WORKERS:
+                inputline.extend(["--crawl-workers", str(options.crawlworkers)])
 
         if getattr(options, 'biospassword', False):
             inputline.extend(["--biospassword", options.biospassword])
@@ -340,6 +346,21 @@ If you do not specify a starting point, the default path will be /redfish/v1/.
 Note: The path flag can only be specified at the time of login.
 Warning: Only for advanced users, and generally not needed for normal operations.""",
             default=None)
+        group.add_argument(
+            '--lazy-crawl',
+            dest='lazycrawl',
+            action="store_true",
+            help="Optionally only read the resource directory during login. The resources of "
+                 "a type are retrieved the first time a command selects it.",
+            default=False)
+        group.add_argument(
+            '--crawl-workers',
+            dest='crawlworkers',
+            type=int,
+            help="Optionally set the number of resources retrieved at the same time while "
+                 "crawling the data during login. 1 crawls one resource at a time. "
+                 "(default: %s)" % CRAWL_WORKERS,
+            default=CRAWL_WORKERS)
         group.add_argument(
             '--force_vnic',
             dest='force_vnic',
@@ -467,4 +488,86 @@ class RdmcOptionParser(ArgumentParser):
             default=None,
             const=True,
             metavar='REDIRECT CONSOLE')
+        self.add_argument(
+            '--profile-startup',
+            dest='profile_startup',
+            help="Optionally include this flag to report the time spent importing modules, "
+                 "loading commands, reading the configuration and restoring the session. "
+                 "Prints a table to stderr or writes JSON to the provided FILE.",
+            nargs='?',
+            default=None,
+            const=True,
+            metavar='FILE')
+        self.add_argument(
+            '--trace-http',
+            dest='trace_http',
+            help="Optionally include this flag to record every request sent to the server "
+                 "with its status, size and latency. Prints the request count, bytes, latency "
+                 "percentiles, time per command, slowest requests and duplicate fetches to "
+                 "stderr at exit, or writes JSON with every request to the provided FILE.",
+            nargs='?',
+            default=None,
+            const=True,
+            metavar='FILE')
+        self.add_argument(
+            '--record',
+            dest='record',
+            help="Record every request and its response, headers and binary bodies included, "
+                 "to a cassette in DIR for --replay. Session tokens and request bodies are not "
+                 "recorded.",
+            default=None,
+            metavar='DIR')
+        self.add_argument(
+            '--replay',
+            dest='replay',
+            help="Answer every request from the cassette recorded in DIR instead of the "
+                 "server, to benchmark and test without a server. Use with --url and --nocache "
+                 "for runs that only depend on the cassette.",
+            default=None,
+            metavar='DIR')
+        self.add_argument(
+            '--replay-latency',
+            dest='replay_latency',
+            type=float,
+            help="Used with --replay, milliseconds added to every replayed request. (default: 0)",
+            default=0,
+            metavar='MS')
+        self.add_argument(
+            '--etag-cache',
+            dest='etagcache',
+            action="store_true",
+            help="Send GETs with the ETag of the last response of the resource and reuse its "
+                 "body when the server answers 304 Not Modified. The ETags are kept with the "
+                 "session of every server.",
+            default=False)
+        self.add_argument(
+            '--script',
+            dest='script',
+            help="Run the command lines in FILE, or stdin if FILE is '-', in a single session. "
+                 "Lines starting with '#' are ignored.",
+            default=None,
+            metavar='FILE')
+        self.add_argument(
+            '--stop-on-error',
+            dest='stoponerror',
+            action="store_true",
+            help="Used with --script, stop at the first command line that fails.",
+            default=False)
+        self.add_argument(
+            '--targets',
+            dest='targets',
+            help="Run the command on every server of SOURCE, a file with the login arguments "
+                 "of one server per line (--url <iLO url> -u <user> -p <password>), or comma "
+                 "separated names or patterns of the [targets] section of the configuration "
+                 "file. Prints one JSON line per server.",
+            default=None,
+            metavar='SOURCE')
+        self.add_argument(
+            '--parallel',
+            dest='parallel',
+            type=int,
+            help="Used with --targets, the number of servers the command runs on at the same "
+                 "time. (default: %s)" % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS,
+            metavar='N')
         self.add_argument_group(globalgroup)
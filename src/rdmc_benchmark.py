@@ -0,0 +1,316 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Benchmarks of the select, get, save and load pipeline of RDMC against synthetic monoliths of
+the mock server, reporting the time and peak memory of every stage and comparing them with a
+baseline."""
+
+# ---------Imports---------
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import tempfile
+
+from redfish.rest.containers import RestRequest, StaticRestResponse
+
+from rdmc_helper import UI, LOGGER, ReturnCodes, RdmcError, NoDifferencesFoundError
+from rdmc_mockserver import MockServer, MockTree, MOCK_USERNAME, MOCK_PASSWORD
+
+# ---------End of imports---------
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'benchmark_baseline.json')
+STAGES = ('select', 'get', 'save', 'load', 'json', 'human')
+# scenario: (MockTree argument scaled, selector, sizes)
+SCENARIOS = {
+    'resources': ('drives', 'HpeSmartStorageDiskDrive.', (100, 1000, 10000, 50000)),
+    'attributes': ('attributes', 'Bios.', (100, 1000, 10000)),
+}
+DEFAULT_THRESHOLD = 0.25
+# differences under these are noise, whatever the threshold
+MIN_SECONDS = 0.05
+MIN_PEAK = 1048576
+
+
+class _NullStream(object):
+    """ Output stream counting the characters written to it """
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+    def flush(self):
+        pass
+
+
+def measure(function, *args, **kwargs):
+    """ Runs a function measuring its time and, where tracemalloc is available, the peak of
+    the memory it allocates. Output printed meanwhile is discarded.
+
+    :param function: function to run
+    :type function: function.
+    :returns: tuple of the result, seconds, peak bytes or None and the error or None
+    """
+    result = error = peak = None
+    stdout = sys.stdout
+    sys.stdout = _NullStream()
+    gc.collect()
+    if tracemalloc:
+        tracemalloc.start()
+    started = time.time()
+    try:
+        result = function(*args, **kwargs)
+    except Exception as excp:
+        error = '%s: %s' % (excp.__class__.__name__, str(excp).strip() or 'failed')
+        LOGGER.info("Benchmark stage failed: %s", error)
+    finally:
+        seconds = time.time() - started
+        if tracemalloc:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        sys.stdout = stdout
+    return result, seconds, peak, error
+
+
+def populate(app, tree):
+    """ Adds every resource of a tree to the monolith of a logged in app, as if it had been
+    crawled, without requests
+
+    :param app: logged in RmcApp
+    :type app: RmcApp.
+    :param tree: tree served to the app
+    :type tree: MockTree.
+    """
+    for key, resource in list(tree.resources.items()):
+        if '@odata.type' not in resource or '/sessions/' in key:
+            continue
+        path = resource['@odata.id']
+        resp = StaticRestResponse(restreq=RestRequest(path, 'GET'), Status=200,
+                                  Headers={'ETag': tree.etag(key),
+                                           'Content-Type': 'application/json'},
+                                  Content=resource)
+        app.monolith.update_member(resp=resp, path=path, init=False)
+
+
+class Benchmark(object):
+    """ Runs the stages of the pipeline against monoliths of growing size. Every size gets a
+    fresh mock server and session, the monolith is filled in memory so only the client side
+    is measured. Load reloads the saved configuration, so it compares every instance with the
+    server and finds nothing to patch. """
+
+    def __init__(self, rdmc, repeat=1):
+        """
+        :param rdmc: command engine the sessions are created from
+        :type rdmc: RdmcCommand.
+        :param repeat: runs of every stage, the fastest one is kept
+        :type repeat: int.
+        """
+        self.rdmc = rdmc
+        self.repeat = max(1, repeat)
+        self.contents = None
+
+    def run(self, scenarios=None, maxsize=None, progress=None):
+        """ Runs the scenarios for all of their sizes
+
+        :param scenarios: names of the scenarios, all if not provided
+        :type scenarios: list.
+        :param maxsize: largest size to run
+        :type maxsize: int.
+        :param progress: function called with the name and results of every size run
+        :type progress: function.
+        :returns: dictionary of the results by '<scenario>/<size>'
+        """
+        results = dict()
+        for scenario in scenarios or sorted(SCENARIOS):
+            for size in SCENARIOS[scenario][2]:
+                if maxsize and size > maxsize:
+                    continue
+                name = '%s/%s' % (scenario, size)
+                results[name] = self.run_size(scenario, size)
+                if progress:
+                    progress(name, results[name])
+        return results
+
+    def run_size(self, scenario, size):
+        """ Runs every stage for one size of a scenario
+
+        :param scenario: scenario name
+        :type scenario: str.
+        :param size: number of resources or attributes
+        :type size: int.
+        :returns: dictionary of the seconds, peak and error of every stage
+        """
+        argument, selector, _ = SCENARIOS[scenario]
+        kwargs = {'drives': 8, 'entries': 10, 'attributes': 100, 'ahssize': 0,
+                  'updatereads': 0}
+        kwargs[argument] = size
+        tree = MockTree(**kwargs)
+        server = MockServer(tree, port=0).start()
+        session = self.rdmc.new_session()
+        tempdir = tempfile.mkdtemp(prefix='rdmcbench')
+        stages = dict()
+        try:
+            session.retcode = ReturnCodes.SUCCESS
+            _, _, _, error = measure(session.run_line, session.opts, 'login %s -u %s -p %s' % \
+                                     (server.url, MOCK_USERNAME, MOCK_PASSWORD))
+            if error or session.retcode != ReturnCodes.SUCCESS or not session.app.monolith:
+                raise RdmcError("Unable to log in to the mock server at %s." % server.url)
+            populate(session.app, tree)
+            gc.collect()
+            for stage in STAGES:
+                best = None
+                for _ in range(self.repeat):
+                    seconds, peak, error = self.run_stage(session, stage, selector, tempdir)
+                    if best is None or seconds < best['seconds']:
+                        best = {'seconds': round(seconds, 4), 'peak': peak}
+                        if error:
+                            best['error'] = error
+                stages[stage] = best
+        finally:
+            try:
+                session.app.logout()
+            except Exception as excp:
+                LOGGER.info("Unable to log out of the mock server: %s", excp)
+            server.stop()
+            shutil.rmtree(tempdir, ignore_errors=True)
+        return stages
+
+    def run_stage(self, session, stage, selector, tempdir):
+        """ Runs one stage, the stages before it have run in the session
+
+        :param session: logged in session
+        :type session: RdmcCommand.
+        :param stage: stage name, one of STAGES
+        :type stage: str.
+        :param selector: type selected
+        :type selector: str.
+        :param tempdir: directory for the saved file
+        :type tempdir: str.
+        :returns: tuple of the seconds, peak bytes and error
+        """
+        command = lambda name: session.load_command(session.search_commands(name))
+        filename = os.path.join(tempdir, 'ilorest.json')
+        if stage == 'select':
+            result = measure(command('SelectCommand').selectfunction, [selector])
+        elif stage == 'get':
+            result = measure(command('GetCommand').getworkerfunction, None, None, results=True)
+            self.contents = result[0]
+        elif stage == 'save':
+            save = command('SaveCommand')
+            result = measure(save.saveworkerfunction)
+            if result[0]:
+                with open(filename, 'w') as outfile:
+                    json.dump(save.add_save_file_header(result[0]), outfile, indent=2)
+        elif stage == 'load':
+            if not os.path.isfile(filename):
+                return 0.0, None, 'nothing saved to load'
+            result = measure(self.load, command('LoadCommand'), filename)
+        elif stage == 'json':
+            result = measure(UI().print_out_json, self.contents)
+        else:
+            result = measure(UI().print_out_human_readable, self.contents)
+        return result[1:]
+
+    @staticmethod
+    def load(command, filename):
+        """ Loads the saved configuration, unchanged so no differences is its result
+
+        :param command: load command of the session
+        :type command: LoadCommand.
+        :param filename: saved file
+        :type filename: str.
+        :returns: return code
+        """
+        try:
+            return command.run(['-f', filename])
+        except NoDifferencesFoundError:
+            return ReturnCodes.SUCCESS
+
+
+def load_baseline(filename=BASELINE_FILE):
+    """ Results of a previous run kept as the baseline
+
+    :param filename: baseline file
+    :type filename: str.
+    :returns: dictionary of the results, empty if there is no baseline
+    """
+    try:
+        with open(filename, 'r') as baselinefh:
+            return json.load(baselinefh).get('results', {})
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def save_baseline(results, filename=BASELINE_FILE):
+    """ Keeps results as the baseline, merged into the results of the sizes not run
+
+    :param results: dictionary of the results by '<scenario>/<size>'
+    :type results: dict.
+    :param filename: baseline file
+    :type filename: str.
+    """
+    baseline = load_baseline(filename)
+    baseline.update(results)
+    with open(filename, 'w') as baselinefh:
+        json.dump({'python': '%s.%s.%s' % sys.version_info[:3], 'results': baseline},
+                  baselinefh, indent=2, sort_keys=True)
+        baselinefh.write('\n')
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """ Stages slower or using more memory than in the baseline by more than the threshold,
+    failing now or failing in the baseline. A stage failing in the baseline has nothing to be
+    compared with, so the baseline has to be updated.
+
+    :param results: dictionary of the results by '<scenario>/<size>'
+    :type results: dict.
+    :param baseline: dictionary of the baseline results
+    :type baseline: dict.
+    :param threshold: fraction over the baseline considered a regression
+    :type threshold: float.
+    :returns: list of tuples of the name, stage, measure, baseline and current values
+    """
+    regressions = []
+    for name, stages in sorted(results.items()):
+        for stage in STAGES:
+            current = stages.get(stage, {})
+            previous = baseline.get(name, {}).get(stage, {})
+            if current.get('error'):
+                regressions.append((name, stage, 'error', previous.get('error'),
+                                    current['error']))
+                continue
+            if previous.get('error'):
+                regressions.append((name, stage, 'baseline', previous['error'], None))
+                continue
+            for measurement, noise in (('seconds', MIN_SECONDS), ('peak', MIN_PEAK)):
+                before, after = previous.get(measurement), current.get(measurement)
+                if before is None or after is None:
+                    continue
+                if after > before * (1 + threshold) and after - before > noise:
+                    regressions.append((name, stage, measurement, before, after))
+    return regressions
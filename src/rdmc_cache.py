@@ -0,0 +1,1271 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Segmented session cache for RDMC. The monolith is stored split by resource type, restored
+lazily one type at a time and only the types touched by a command are written back. The
+members are kept either as one JSON file per type or in a single compressed pack file that is
+memory mapped and decoded one resource at a time."""
+
+# ---------Imports---------
+
+import os
+import json
+import mmap
+import time
+import zlib
+import errno
+import shutil
+import struct
+import hashlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from redfish.rest.v1 import RestClient
+from redfish.rest.containers import RestRequest, StaticRestResponse
+from redfish.ris.ris import RisMonolithMemberv100
+from redfish.ris.rmc_helper import RmcFileCacheManager
+from redfish.ris.sharedtypes import JSONEncoder
+
+from rdmc_helper import LOGGER
+from rdmc_crawl import PartialMonolith
+from rdmc_monolith import IndexedMonolith
+
+# ---------End of imports---------
+
+CACHE_LAYOUT = 'segments'
+SESSION_FILE = 'session.json'
+MONOLITH_FILE = 'monolith.json'
+SEGMENT_DIR = 'resps'
+PACK_FILE = 'resps.pack'
+PACK_MAGIC = b'RDMCPACK'
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct('>8sHI')
+LOCAL_TARGET = 'blobstore://.'
+NAMESPACE_DIR = 'targets'
+CURRENT_FILE = 'current'
+SHARED_DIR = 'shared'
+SHARED_INDEX = 'index.json'
+SHARED_SEGMENT = 'shared:'
+# resources that only change with the iLO firmware, shared by the sessions of every target
+SHARED_PATHS = ('/redfish/v1/schemas/', '/redfish/v1/registries/', '/redfish/v1/schemastore/',
+                '/redfish/v1/registrystore/')
+
+
+def atomic_write(filename, data):
+    """ Writes a file through a temporary file and a rename, readers never see partial data
+
+    :param filename: file to write
+    :type filename: str.
+    :param data: file contents
+    :type data: str or bytes.
+    """
+    tmpfile = '%s.%s.tmp' % (filename, os.getpid())
+    try:
+        with open(tmpfile, 'wb' if isinstance(data, bytes) else 'w') as outfile:
+            outfile.write(data)
+        os.replace(tmpfile, filename)
+    except (IOError, OSError):
+        try:
+            os.remove(tmpfile)
+        except OSError:
+            pass
+        raise
+
+
+def target_key(url):
+    """ Normalized key of a target url
+
+    :param url: iLO url, hostname or address
+    :type url: str.
+    :returns: key used to look up the session of the target
+    """
+    if not url:
+        return LOCAL_TARGET
+    if '://' not in url:
+        url = 'https://' + url
+    return url.rstrip('/')
+
+
+def command_target(tokens):
+    """ Target of a command, taken from --url or the url argument of login
+
+    :param tokens: command line arguments
+    :type tokens: list.
+    :returns: target url or None if the command does not name one
+    """
+    for indx, token in enumerate(tokens):
+        if token == '--url' and indx + 1 < len(tokens):
+            return tokens[indx + 1]
+        elif token.startswith('--url='):
+            return token.split('=', 1)[1]
+    if 'login' in tokens:
+        following = tokens[tokens.index('login') + 1:]
+        if following and not following[0].startswith('-'):
+            return following[0]
+        return LOCAL_TARGET
+    return None
+
+
+class CacheLock(object):
+    """ Advisory lock on a file, shared between readers or held by a single writer. Windows
+    only has exclusive locks, shared requests are exclusive there. """
+
+    def __init__(self, filename, shared=False):
+        """
+        :param filename: lock file, created if missing
+        :type filename: str.
+        :param shared: take a shared (read) lock instead of an exclusive one
+        :type shared: bool.
+        """
+        self.filename = filename
+        self.shared = shared
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.filename, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except (IOError, OSError):
+                        # LK_LOCK gives up after 10 seconds, keep waiting for the writer
+                        time.sleep(0.1)
+        except BaseException:
+            self._file.close()
+            raise
+        return self
+
+    def __exit__(self, *args):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def url_hash(url):
+    """ Name of the cache entry of a url, same as the one used by the redfish library """
+    shaobj = hashlib.new("SHA256")
+    shaobj.update(url.encode("utf-8"))
+    return shaobj.hexdigest()
+
+
+def segment_name(majtype):
+    """ File name of the segment holding the members of a type """
+    return hashlib.sha1(str(majtype).encode('utf-8')).hexdigest()[:20] + '.json'
+
+
+def member_fingerprint(member):
+    """ Objects that change when a member is reloaded, patched or marked modified. The objects
+    themselves are kept, not their ids, so a replaced member can never match by id reuse. """
+    resp = member.resp
+    return (member, resp, getattr(resp, '_read', None), member.patches, len(member.patches),
+            member.modified)
+
+
+def member_types(member):
+    """ Type and major type of a member, restored members know them without parsing the body
+
+    :param member: monolith member
+    :type member: RisMonolithMemberv100
+    :returns: tuple of type and major type
+    """
+    if member._type is not None and member.deftype:
+        return member._type, member.deftype
+    return member.type, member.maj_type
+
+
+def member_to_dict(member):
+    """ Same as RisMonolithMemberv100.to_dict, but keeps the body as the response text so
+    it is not parsed and serialized again
+
+    :param member: monolith member
+    :type member: RisMonolithMemberv100
+    :returns: dictionary accepted by RisMonolithMemberv100.load_from_dict
+    """
+    mtype, majtype = member_types(member)
+    if not majtype:
+        return {}
+
+    result = {'Type': mtype, 'MajType': majtype, 'links': {'href': ''}, 'ETag': member.etag,
+              'OriginalUri': member.path, 'Patches': member.patches, 'modified': member.modified}
+    if member.resp:
+        if majtype == "Collection.1" and "MemberType" in member.resp.dict:
+            result["MemberType"] = member.resp.dict["MemberType"]
+        result['Content'] = member.resp.read
+        result['Status'] = member.resp.status
+        result['Headers'] = member.resp.getheaders()
+    return result
+
+
+class LazyPaths(dict):
+    """ paths dictionary of a restored monolith. Paths are known up front, their members are
+    read from the type segment holding them on first access. """
+
+    def __init__(self, loader, pending):
+        """
+        :param loader: function returning the members of a segment as a path to member dict
+        :type loader: function.
+        :param pending: path to segment name of every member not loaded yet
+        :type pending: dict.
+        """
+        super(LazyPaths, self).__init__()
+        self._loader = loader
+        self._pending = pending
+        self._bysegment = dict()
+        for path, segment in pending.items():
+            self._bysegment.setdefault(segment, []).append(path)
+
+    def load_segment(self, segment):
+        """ Loads the members of a segment, keeping members already replaced in memory
+
+        :param segment: segment name
+        :type segment: str.
+        """
+        paths = self._bysegment.pop(segment, None)
+        if paths is None:
+            return
+        for path, member in self._loader(segment).items():
+            if self._pending.get(path) == segment:
+                del self._pending[path]
+                dict.__setitem__(self, path, member)
+        for path in paths:
+            if self._pending.get(path) == segment:
+                # listed but missing from the segment file
+                del self._pending[path]
+
+    def load_all(self):
+        """ Loads every pending segment """
+        for segment in set(self._pending.values()):
+            self.load_segment(segment)
+
+    def pending_segment(self, path):
+        """ Segment of a path that is not loaded yet, None otherwise """
+        return self._pending.get(path)
+
+    def _load_path(self, path):
+        segment = self._pending.get(path)
+        if segment is not None:
+            self.load_segment(segment)
+
+    def __getitem__(self, path):
+        self._load_path(path)
+        return dict.__getitem__(self, path)
+
+    def __setitem__(self, path, member):
+        self._pending.pop(path, None)
+        dict.__setitem__(self, path, member)
+
+    def __delitem__(self, path):
+        if self._pending.pop(path, None) is not None and not dict.__contains__(self, path):
+            return
+        dict.__delitem__(self, path)
+
+    def __contains__(self, path):
+        return path in self._pending or dict.__contains__(self, path)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._pending)
+
+    def get(self, path, default=None):
+        self._load_path(path)
+        return dict.get(self, path, default)
+
+    def pop(self, path, *default):
+        self._load_path(path)
+        return dict.pop(self, path, *default)
+
+    def setdefault(self, path, default=None):
+        self._load_path(path)
+        return dict.setdefault(self, path, default)
+
+    def update(self, *args, **kwargs):
+        for path, member in dict(*args, **kwargs).items():
+            self[path] = member
+
+    def keys(self):
+        return list(dict.keys(self)) + list(self._pending)
+
+    def values(self):
+        self.load_all()
+        return dict.values(self)
+
+    def items(self):
+        self.load_all()
+        return dict.items(self)
+
+    def copy(self):
+        self.load_all()
+        return dict(dict.items(self))
+
+
+def firmware_version(root):
+    """ Firmware of the manager the session belongs to, taken from the service root
+
+    :param root: service root response body
+    :type root: dict.
+    :returns: firmware version string, empty if the root does not name one
+    """
+    oem = (root or {}).get('Oem', {})
+    manager = (oem.get('Hpe') or oem.get('Hp') or {}).get('Manager') or [{}]
+    try:
+        return str(manager[0].get('ManagerFirmwareVersion') or manager[0].get('ManagerType') or '')
+    except (AttributeError, IndexError, KeyError):
+        return ''
+
+
+def pack_member(member):
+    """ Compressed blob of a member. The metadata is JSON, the body follows it as it was
+    received so it is not escaped into a JSON string.
+
+    :param member: monolith member
+    :type member: RisMonolithMemberv100
+    :returns: bytes
+    """
+    data = member_to_dict(member)
+    content = data.pop('Content', None) or ''
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return zlib.compress(json.dumps(data, cls=JSONEncoder).encode('utf-8') + b'\n' + content)
+
+
+def unpack_member(blob):
+    """ Reverse of pack_member
+
+    :param blob: compressed member
+    :type blob: bytes.
+    :returns: dictionary accepted by RisMonolithMemberv100.load_from_dict
+    """
+    meta, _, content = zlib.decompress(blob).partition(b'\n')
+    data = json.loads(meta.decode('utf-8'))
+    if 'Status' in data:
+        data['Content'] = content.decode('utf-8')
+    return data
+
+
+class PackReader(object):
+    """ Memory mapped pack file. Only the header and the index are parsed when it is opened,
+    members are decompressed one at a time on request. """
+
+    def __init__(self, filename):
+        """
+        :param filename: pack file
+        :type filename: str.
+        """
+        self._file = open(filename, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                magic, self.version, size = PACK_HEADER.unpack_from(self._map, 0)
+            except struct.error:
+                raise ValueError("%s is cut short" % filename)
+            if magic != PACK_MAGIC:
+                raise ValueError("%s is not a cache pack file" % filename)
+            header = json.loads(self._map[PACK_HEADER.size:PACK_HEADER.size + size].\
+                                decode('utf-8'))
+        except BaseException:
+            self.close()
+            raise
+        self.firmware = header.get('firmware', '')
+        self.index = header.get('index', {})
+        self._start = PACK_HEADER.size + size
+
+    def blob(self, path):
+        """ Compressed data of a path
+
+        :param path: member path
+        :type path: str.
+        :returns: bytes
+        """
+        offset, length = self.index[path][:2]
+        return self._map[self._start + offset:self._start + offset + length]
+
+    def close(self):
+        """ Unmaps and closes the file, required before it can be replaced on Windows """
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class SegmentStore(object):
+    """ Members stored as one JSON file per resource type """
+
+    name = 'segments'
+
+    def __init__(self):
+        self._segments = dict()
+
+    def open(self, clientdir, data, firmware):
+        """ Starts reading a cached monolith
+
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :param data: monolith metadata
+        :type data: dict.
+        :param firmware: firmware of the cached session
+        :type firmware: str.
+        :returns: path to segment name of every cached member
+        """
+        self._segments = dict((segment, set(paths)) for segment, paths in \
+                              data.get("segments", {}).items())
+        return dict((path, segment) for segment, paths in self._segments.items() \
+                    for path in paths)
+
+    def read(self, clientdir, segment):
+        """ Reads a segment file
+
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :param segment: segment name
+        :type segment: str.
+        :returns: path to member dictionary
+        """
+        try:
+            with open(os.path.join(clientdir, SEGMENT_DIR, segment), 'r') as segmentfh:
+                return json.load(segmentfh)
+        except (IOError, OSError, ValueError) as excp:
+            LOGGER.warning("Unable to read cache data %s", excp)
+            return dict()
+
+    def save(self, clientdir, paths, isclean, firmware, skip=()):
+        """ Writes the segments holding members that changed
+
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :param paths: paths of the monolith
+        :type paths: dict.
+        :param isclean: function telling whether a loaded member matches the cache
+        :type isclean: function.
+        :param firmware: firmware of the session
+        :type firmware: str.
+        :param skip: paths that are not stored
+        :type skip: set.
+        :returns: metadata to store with the monolith
+        """
+        try:
+            os.makedirs(os.path.join(clientdir, SEGMENT_DIR))
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+
+        segments = dict()
+        for path in paths.keys():
+            if path in skip:
+                continue
+            segment = paths.pending_segment(path) if isinstance(paths, LazyPaths) else None
+            if segment is None:
+                segment = segment_name(member_types(dict.get(paths, path))[1])
+            segments.setdefault(segment, set()).add(path)
+
+        written = []
+        for segment, segpaths in segments.items():
+            if segpaths == self._segments.get(segment) and all(isclean(path) for path in \
+                                            segpaths if dict.__contains__(paths, path)):
+                continue
+            if isinstance(paths, LazyPaths):
+                paths.load_segment(segment)
+            members = dict((path, dict.get(paths, path)) for path in segpaths)
+            atomic_write(os.path.join(clientdir, SEGMENT_DIR, segment), json.dumps(dict( \
+                (path, member_to_dict(member)) for path, member in members.items()),
+                                                                          cls=JSONEncoder))
+            written.extend(segpaths)
+
+        for segment in set(self._segments) - set(segments):
+            try:
+                os.remove(os.path.join(clientdir, SEGMENT_DIR, segment))
+            except OSError:
+                pass
+        self._segments = segments
+        return written, dict(segments=dict((key, sorted(val)) for key, val in \
+                                           sorted(segments.items())))
+
+    def clear(self, clientdir):
+        """ Removes the files of the store """
+        shutil.rmtree(os.path.join(clientdir, SEGMENT_DIR), ignore_errors=True)
+        self._segments = dict()
+
+
+class PackStore(object):
+    """ Members stored compressed in a single memory mapped pack file, with an index of the
+    path, type, offset and length of each one """
+
+    name = 'pack'
+
+    def __init__(self):
+        self._reader = None
+
+    def open(self, clientdir, data, firmware):
+        """ Starts reading a cached monolith, a pack written by another format version or for
+        another firmware is rejected
+
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :param data: monolith metadata
+        :type data: dict.
+        :param firmware: firmware of the cached session
+        :type firmware: str.
+        :returns: path to segment name of every cached member, the path itself for packs
+        """
+        self.close()
+        reader = PackReader(os.path.join(clientdir, PACK_FILE))
+        if reader.version != PACK_VERSION or reader.firmware != firmware:
+            reader.close()
+            raise ValueError("Cache pack written for firmware %s (format %s), the session "
+                             "has firmware %s" % (reader.firmware, reader.version, firmware))
+        self._reader = reader
+        return dict((path, path) for path in reader.index)
+
+    def read(self, clientdir, path):
+        """ Decodes a single member
+
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :param path: member path
+        :type path: str.
+        :returns: path to member dictionary
+        """
+        try:
+            return {path: unpack_member(self._reader.blob(path))}
+        except (KeyError, AttributeError, ValueError, zlib.error) as excp:
+            LOGGER.warning("Unable to read cache data %s", excp)
+            return dict()
+
+    def save(self, clientdir, paths, isclean, firmware, skip=()):
+        """ Rewrites the pack if any member changed, members that did not change are copied
+        without being decoded
+
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :param paths: paths of the monolith
+        :type paths: dict.
+        :param isclean: function telling whether a loaded member matches the cache
+        :type isclean: function.
+        :param firmware: firmware of the session
+        :type firmware: str.
+        :param skip: paths that are not stored
+        :type skip: set.
+        :returns: metadata to store with the monolith
+        """
+        reader = self._reader
+        keys = [path for path in paths.keys() if path not in skip]
+        dirty = [path for path in keys if dict.__contains__(paths, path) and not isclean(path)]
+        if reader and not dirty and reader.firmware == firmware and \
+                len(keys) == len(reader.index) and all(path in reader.index for path in keys):
+            return [], dict()
+
+        index = dict()
+        blobs = []
+        offset = 0
+        dirty = set(dirty)
+        for path in sorted(keys):
+            if reader and path in reader.index and path not in dirty:
+                blob = reader.blob(path)
+                majtype = reader.index[path][2]
+            else:
+                member = paths[path]
+                blob = pack_member(member)
+                majtype = member_types(member)[1]
+            index[path] = [offset, len(blob), majtype]
+            blobs.append(blob)
+            offset += len(blob)
+
+        header = json.dumps(dict(firmware=firmware, index=index)).encode('utf-8')
+        data = PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(header)) + header + b''.join(blobs)
+        self.close()
+        atomic_write(os.path.join(clientdir, PACK_FILE), data)
+        self._reader = PackReader(os.path.join(clientdir, PACK_FILE))
+        return sorted(dirty), dict()
+
+    def close(self):
+        """ Closes the mapped pack file """
+        if self._reader:
+            self._reader.close()
+            self._reader = None
+
+    def clear(self, clientdir):
+        """ Removes the files of the store """
+        self.close()
+        try:
+            os.remove(os.path.join(clientdir, PACK_FILE))
+        except OSError:
+            pass
+
+
+class SharedPool(object):
+    """ Resources shared by the sessions of every target running the same firmware, such as
+    schemas and registries. Members are written once and never modified, the index is merged
+    under a lock so processes can add to it concurrently. """
+
+    def __init__(self, directory):
+        """
+        :param directory: pool directory, one per firmware
+        :type directory: str.
+        """
+        self.directory = directory
+        self._index = None
+
+    def index(self):
+        """ Path to [type, major type] of every member in the pool """
+        if self._index is None:
+            try:
+                with open(os.path.join(self.directory, SHARED_INDEX), 'r') as indexfh:
+                    self._index = json.load(indexfh)
+            except (IOError, OSError, ValueError):
+                self._index = dict()
+        return self._index
+
+    def read(self, path):
+        """ Reads a member
+
+        :param path: member path
+        :type path: str.
+        :returns: path to member dictionary
+        """
+        try:
+            with open(os.path.join(self.directory, url_hash(path) + '.json'), 'r') as memberfh:
+                return {path: json.load(memberfh)}
+        except (IOError, OSError, ValueError) as excp:
+            LOGGER.warning("Unable to read cache data %s", excp)
+            return dict()
+
+    def add(self, members):
+        """ Adds members the pool does not hold yet
+
+        :param members: path to member dictionary
+        :type members: dict.
+        """
+        try:
+            os.makedirs(self.directory)
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+        with CacheLock(self.directory + '.lock'):
+            self._index = None
+            index = self.index()
+            for path, member in members.items():
+                if path in index:
+                    continue
+                atomic_write(os.path.join(self.directory, url_hash(path) + '.json'),
+                             json.dumps(member_to_dict(member), cls=JSONEncoder))
+                index[path] = list(member_types(member))
+            atomic_write(os.path.join(self.directory, SHARED_INDEX), json.dumps(index))
+
+    def read_json(self, name):
+        """ Reads a JSON document kept next to the members, such as facts learned about the
+        firmware
+
+        :param name: file name
+        :type name: str.
+        :returns: the document, an empty dictionary if there is none
+        """
+        try:
+            with open(os.path.join(self.directory, name), 'r') as jsonfh:
+                return json.load(jsonfh)
+        except (IOError, OSError, ValueError):
+            return dict()
+
+    def update_json(self, name, entries):
+        """ Merges entries into a JSON document kept next to the members
+
+        :param name: file name
+        :type name: str.
+        :param entries: keys and values to set
+        :type entries: dict.
+        """
+        try:
+            os.makedirs(self.directory)
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+        with CacheLock(self.directory + '.lock'):
+            document = self.read_json(name)
+            document.update(entries)
+            atomic_write(os.path.join(self.directory, name), json.dumps(document))
+
+
+CACHE_STORES = {'json': SegmentStore, SegmentStore.name: SegmentStore,
+                'binary': PackStore, PackStore.name: PackStore}
+
+
+class RdmcCacheManager(RmcFileCacheManager):
+    """ Cache manager writing one directory per session: the login data, the monolith metadata
+    and the members, either as one segment file per resource type or as a single pack file.
+    Caches written in the single file format of the redfish library are still restored.
+
+    With a cache root set, every target gets its own namespace below it so processes working
+    on different targets do not overwrite each other, and members that only depend on the
+    firmware are shared between the namespaces. """
+
+    def __init__(self, rmc):
+        super(RdmcCacheManager, self).__init__(rmc)
+        self._monolith = None
+        self._restored = None
+        self._written = dict()
+        self._snapshot = dict()
+        self._shared = set()
+        self.store = SegmentStore()
+        self.cacheroot = None
+
+    def set_root(self, root, url=None):
+        """ Enables per target namespaces below a cache directory and selects the namespace of
+        a target
+
+        :param root: cache directory
+        :type root: str.
+        :param url: target url, the target saved last if not provided
+        :type url: str.
+        """
+        self.cacheroot = root
+        self.select_target(url)
+
+    def namespace(self, url):
+        """ Cache directory of a target
+
+        :param url: target url, the local server if not provided
+        :type url: str.
+        """
+        return os.path.join(self.cacheroot, NAMESPACE_DIR, url_hash(target_key(url))[:20])
+
+    def select_target(self, url=None):
+        """ Points the cache at the namespace of a target, or of the target saved last if none
+        is provided. Nothing is done without a cache root.
+
+        :param url: target url
+        :type url: str.
+        """
+        if not self.cacheroot:
+            return
+        if url:
+            cachedir = self.namespace(url)
+        else:
+            try:
+                with open(os.path.join(self.cacheroot, CURRENT_FILE), 'r') as currentfh:
+                    cachedir = os.path.join(self.cacheroot, NAMESPACE_DIR, currentfh.read().strip())
+            except (IOError, OSError):
+                # nothing saved yet, or a cache written before namespaces were used
+                cachedir = self.cacheroot if os.path.isfile(os.path.join(self.cacheroot, \
+                                                    "index")) else self.namespace(None)
+        if cachedir != self._rmc.cachedir:
+            self._monolith = None
+            self._written = dict()
+        self._rmc.cachedir = cachedir
+
+    def lock(self, shared=False):
+        """ Lock of the current cache directory, taken next to it so removing the directory
+        does not remove the lock
+
+        :param shared: lock for reading
+        :type shared: bool.
+        :returns: CacheLock
+        """
+        parent = os.path.dirname(os.path.normpath(self._rmc.cachedir))
+        try:
+            os.makedirs(parent)
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+        return CacheLock(os.path.normpath(self._rmc.cachedir) + '.lock', shared=shared)
+
+    def shared_pool(self, redfishinst):
+        """ Pool of the members shared by the targets running the firmware of a session, None
+        if sharing is not possible
+
+        :param redfishinst: client of the session
+        :type redfishinst: RestClient
+        :returns: SharedPool
+        """
+        root = redfishinst.root
+        if not self.cacheroot or not firmware_version(root.dict if root else None):
+            return None
+        key = hashlib.sha1(self.firmware(redfishinst).encode('utf-8')).hexdigest()[:20]
+        return SharedPool(os.path.join(self.cacheroot, SHARED_DIR, key))
+
+    def client_dir(self, url):
+        """ Cache directory of a client
+
+        :param url: base url of the client
+        :type url: str.
+        """
+        return os.path.join(self._rmc.cachedir, url_hash(url))
+
+    def target_client_dir(self, url):
+        """ Cache directory of a client in the namespace of its target, whichever target is
+        selected
+
+        :param url: base url of the client
+        :type url: str.
+        """
+        return os.path.join(self.namespace(url), url_hash(url))
+
+    def cached_targets(self):
+        """ Urls of the targets with a cached session, other than the selected target
+
+        :returns: list of urls
+        """
+        urls = []
+        if not self.cacheroot or not os.path.isdir(os.path.join(self.cacheroot, NAMESPACE_DIR)):
+            return urls
+        for name in sorted(os.listdir(os.path.join(self.cacheroot, NAMESPACE_DIR))):
+            cachedir = os.path.join(self.cacheroot, NAMESPACE_DIR, name)
+            if cachedir == self._rmc.cachedir or not os.path.isdir(cachedir):
+                continue
+            try:
+                with open(os.path.join(cachedir, "index"), 'r') as indexfh:
+                    urls.extend(index["url"] for index in json.load(indexfh))
+            except (IOError, OSError, ValueError, KeyError) as excp:
+                LOGGER.warning("Unable to read cache data %s", excp)
+        return urls
+
+    def _read_index(self):
+        indexfn = os.path.join(self._rmc.cachedir, "index")
+        if not os.path.isfile(indexfn):
+            return []
+        with open(indexfn, 'r') as indexfh:
+            self._written["index"] = indexfh.read()
+        return json.loads(self._written["index"])
+
+    def uncache_rmc(self, creds=None, enc=False, log_dir=None):
+        """ Restores the session and the monolith metadata, members are read lazily
+
+        :param creds: Dictionary of username and password.
+                      Only required for restoring high security local calls.
+        :type creds: dict
+        :param enc: Flag if credentials passed are encoded.
+        :type enc: bool
+        """
+        if not self._rmc.cachedir or not os.path.isdir(self._rmc.cachedir):
+            return
+
+        with self.lock(shared=True):
+            try:
+                index_cache = self._read_index()
+            except (IOError, OSError, ValueError) as excp:
+                LOGGER.warning("Unable to read cache data %s", excp)
+                return
+
+            for index in index_cache:
+                clientdir = os.path.join(self._rmc.cachedir, index["href"])
+                if os.path.isdir(clientdir):
+                    try:
+                        self._uncache_dir(clientdir, creds=creds, enc=enc, log_dir=log_dir)
+                    except (IOError, OSError, ValueError, KeyError) as excp:
+                        LOGGER.warning("Unable to read cache data %s", excp)
+                else:
+                    self._uncache_client(index["href"], creds=creds, enc=enc, log_dir=log_dir)
+
+    def _uncache_dir(self, clientdir, creds=None, enc=False, log_dir=None):
+        """ Restores a client from its cache directory """
+        with open(os.path.join(clientdir, SESSION_FILE), 'r') as sessionfh:
+            sessiontext = sessionfh.read()
+        client = json.loads(sessiontext)
+        login_data = client.get("login", {})
+        if "url" not in login_data:
+            return
+
+        redfishinst = self._restore_client(login_data, creds=creds, enc=enc, log_dir=log_dir)
+        if client.get("selector"):
+            self._rmc.selector = client["selector"]
+
+        root = client.get("root")
+        if root:
+            root["restreq"] = RestRequest(method="GET", path=redfishinst.default_prefix)
+            redfishinst.root = StaticRestResponse(**root)
+
+        with open(os.path.join(clientdir, MONOLITH_FILE), 'r') as monolithfh:
+            monolithtext = monolithfh.read()
+        monolith = self.restore_monolith(redfishinst, json.loads(monolithtext), clientdir)
+
+        self._rmc.monolith = monolith
+        self._rmc.redfishinst = redfishinst
+        _ = redfishinst.root
+        self._rmc.typepath.defineregschemapath(redfishinst.root.dict)
+
+        self._written.update({SESSION_FILE: sessiontext, MONOLITH_FILE: monolithtext})
+
+    def _restore_client(self, login_data, creds=None, enc=False, log_dir=None):
+        """ Builds the RestClient of a cached session, mirrors the redfish library """
+        self._rmc.typepath.getgen(
+            login_data.get("ilo"),
+            url=login_data.get("url"),
+            isredfish=login_data.get("redfish", None),
+            ca_cert_data=login_data.get("ca_cert_data", {}),
+        )
+
+        if creds and login_data.get("url", "").startswith("blobstore://"):
+            if enc:
+                creds["username"] = self.decodefunct(creds["username"])
+                creds["password"] = self.decodefunct(creds["password"])
+            login_data["username"] = creds["username"]
+            login_data["password"] = creds["password"]
+            if isinstance(login_data["username"], bytes):
+                login_data["username"] = login_data["username"].decode("utf-8")
+            if isinstance(login_data["password"], bytes):
+                login_data["password"] = login_data["password"].decode("utf-8")
+
+        redfishinst = RestClient(
+            username=login_data.get("username", "Administrator"),
+            password=login_data.get("password", None),
+            base_url=login_data.get("url", None),
+            biospassword=login_data.get("bios_password", None),
+            is_redfish=login_data.get("redfish", None),
+            default_prefix=self._rmc.typepath.defs.startpath,
+            proxy=login_data.get("proxy", None),
+            ca_cert_data=login_data.get("ca_cert_data", {}),
+            log_dir=log_dir,
+            ilo_generation=login_data.get("ilo"),
+        )
+        if login_data.get("authorization_key"):
+            redfishinst.basic_auth = login_data.get("authorization_key")
+        elif login_data.get("session_key"):
+            redfishinst.session_key = self.decodefunct(login_data.get("session_key"))
+            if isinstance(redfishinst.session_key, bytes):
+                redfishinst.session_key = redfishinst.session_key.decode("utf-8")
+            redfishinst.session_location = login_data.get("session_location")
+
+        redfishinst.iloversion = login_data.get("iloversion") or None
+        self._rmc.typepath.iloversion = redfishinst.iloversion
+        return redfishinst
+
+    def set_format(self, name):
+        """ Selects how the members are written on the next save
+
+        :param name: store name, json or segments for per type JSON files, binary or pack for
+                     the compressed pack file
+        :type name: str.
+        """
+        store = CACHE_STORES.get((name or 'json').lower())
+        if not store:
+            raise ValueError("Unknown cache format %s, expected one of %s." % \
+                             (name, ', '.join(sorted(CACHE_STORES))))
+        if not isinstance(self.store, store):
+            self.store = store()
+
+    def restore_monolith(self, redfishinst, data, clientdir):
+        """ Creates a monolith from its cached metadata with lazily loaded members
+
+        :param redfishinst: client of the monolith
+        :type redfishinst: RestClient
+        :param data: monolith metadata
+        :type data: dict.
+        :param clientdir: cache directory of the client
+        :type clientdir: str.
+        :returns: IndexedMonolith
+        """
+        # a lazy crawl stays lazy until every type of the directory was added
+        monolith = (PartialMonolith if data.get("partial") else IndexedMonolith)(
+            redfishinst, self._rmc.typepath)
+        monolith._type = data["Type"]
+        monolith._name = data["Name"]
+        for key, val in data["typepath"].items():
+            monolith.typesadded[key] = set(val)
+        for key, val in data["ctree"].items():
+            monolith.ctree[key] = set(val)
+        for key, val in data["colls"].items():
+            monolith.colltypes[key] = set(val)
+
+        # read with the store that wrote the cache, save converts it if another one is selected
+        store = self.store if data.get("store", SegmentStore.name) == self.store.name else \
+            CACHE_STORES[data["store"]]()
+        pending = store.open(clientdir, data, self.firmware(redfishinst))
+
+        self._monolith = monolith
+        self._restored = store
+        self._snapshot = dict()
+        self._shared = set()
+
+        pool = self.shared_pool(redfishinst)
+        if pool:
+            for path, types in pool.index().items():
+                if path not in pending:
+                    pending[path] = SHARED_SEGMENT + path
+                    monolith.typesadded[types[1]].add(path)
+                    self._shared.add(path)
+        for path in data.get("shared", []):
+            if path not in pending:
+                # the pool holding it was removed
+                for val in monolith.typesadded.values():
+                    val.discard(path)
+
+        def loader(segment):
+            """ Reads the members of a segment """
+            members = dict()
+            if segment.startswith(SHARED_SEGMENT):
+                read = pool.read(segment[len(SHARED_SEGMENT):])
+            else:
+                read = store.read(clientdir, segment)
+            for path, src in read.items():
+                member = RisMonolithMemberv100(None, monolith.is_redfish)
+                member.load_from_dict(src)
+                members[path] = member
+                self._snapshot[path] = member_fingerprint(member)
+            return members
+
+        monolith.paths = LazyPaths(loader, pending)
+        return monolith
+
+    def firmware(self, redfishinst):
+        """ Generation, version and firmware of the session, a cache written for another
+        firmware is not restored
+
+        :param redfishinst: client of the session
+        :type redfishinst: RestClient
+        :returns: str
+        """
+        root = redfishinst.root
+        return "%s/%s/%s" % (self._rmc.typepath.ilogen, self._rmc.typepath.iloversion,
+                             firmware_version(root.dict if root else None))
+
+    def isclean(self, path):
+        """ True if the loaded member of a path is the one read from, or last written to, the
+        cache and was not changed since
+
+        :param path: member path
+        :type path: str.
+        """
+        member = dict.get(self._monolith.paths, path)
+        return path in self._snapshot and self._snapshot[path][0] is member and \
+            member_fingerprint(member) == self._snapshot[path]
+
+    @staticmethod
+    def shareable(path, member):
+        """ True if a member only depends on the firmware and can go to the shared pool
+
+        :param path: member path
+        :type path: str.
+        :param member: monolith member
+        :type member: RisMonolithMemberv100
+        """
+        if not path.lower().startswith(SHARED_PATHS) or member.patches or member.modified or \
+                not member.resp or member.resp.status != 200:
+            return False
+        majtype = member_types(member)[1]
+        return bool(majtype) and 'Collection' not in majtype
+
+    def _write_if_changed(self, clientdir, name, data):
+        text = json.dumps(data, indent=1, cls=JSONEncoder)
+        if self._written.get(name) != text:
+            atomic_write(os.path.join(clientdir, name), text)
+            self._written[name] = text
+
+    def cache_rmc(self):
+        """ Saves the session, writing only the members that changed """
+        if not self._rmc.cache or not self._rmc.redfishinst:
+            return
+
+        redfishinst = self._rmc.redfishinst
+        monolith = self._rmc.monolith
+        if self.cacheroot and self._rmc.cachedir != self.namespace(redfishinst.base_url):
+            self._move_namespace(self.namespace(redfishinst.base_url))
+
+        with self.lock():
+            self._cache_client(redfishinst, monolith)
+
+        if self.cacheroot:
+            current = os.path.basename(self._rmc.cachedir)
+            if self._written.get(CURRENT_FILE) != current:
+                atomic_write(os.path.join(self.cacheroot, CURRENT_FILE), current)
+                self._written[CURRENT_FILE] = current
+
+    def _move_namespace(self, cachedir):
+        """ Switches to the namespace of the logged in target. A cache restored from another
+        directory is read completely first so all of it gets written to the new one. """
+        if self._monolith is not None and isinstance(self._monolith.paths, LazyPaths):
+            self._monolith.paths.load_all()
+        if self._rmc.cachedir == self.cacheroot:
+            # cache written before namespaces were used
+            for index in self._read_index():
+                shutil.rmtree(os.path.join(self.cacheroot, index["href"]), ignore_errors=True)
+            os.remove(os.path.join(self.cacheroot, "index"))
+        if isinstance(self._restored, PackStore):
+            self._restored.close()
+        self.store = type(self.store)()
+        self._restored = self.store
+        self._snapshot = dict()
+        self._written = dict()
+        self._rmc.cachedir = cachedir
+
+    def _cache_client(self, redfishinst, monolith):
+        """ Writes the cache directory of a client """
+        clientdir = self.client_dir(redfishinst.base_url)
+        if os.path.isfile(clientdir):
+            # single file cache of the redfish library
+            os.remove(clientdir)
+        for directory in (self._rmc.cachedir, clientdir):
+            try:
+                os.makedirs(directory)
+            except OSError as ex:
+                if ex.errno != errno.EEXIST:
+                    raise
+
+        if monolith is not self._monolith:
+            # new login or crawl, nothing on disk belongs to this monolith
+            for store in (self._restored, self.store):
+                if isinstance(store, PackStore):
+                    store.close()
+            for store in set(CACHE_STORES.values()):
+                store().clear(clientdir)
+            self._monolith = monolith
+            self._restored = self.store
+            self._snapshot = dict()
+            self._shared = set()
+            self._written = dict((name, text) for name, text in self._written.items() \
+                                 if name == CURRENT_FILE)
+        elif self._restored is not self.store:
+            # written in another format, read it all before replacing it
+            if isinstance(monolith.paths, LazyPaths):
+                monolith.paths.load_all()
+            self._restored.clear(clientdir)
+            self._restored = self.store
+            self._snapshot = dict()
+
+        paths = monolith.paths
+        pool = self.shared_pool(redfishinst)
+        if pool:
+            index = pool.index()
+            members = dict((path, member) for path, member in dict.items(paths) if \
+                           path not in index and self.shareable(path, member))
+            if members:
+                pool.add(members)
+                for path, member in members.items():
+                    self._shared.add(path)
+                    self._snapshot[path] = member_fingerprint(member)
+        # pool members not loaded, or loaded and unchanged, are not stored with the session
+        skip = set(path for path in self._shared if path in paths and \
+                   (not dict.__contains__(paths, path) or self.isclean(path)))
+
+        written, metadata = self.store.save(clientdir, paths, self.isclean,
+                                            self.firmware(redfishinst), skip)
+        for path in written:
+            member = dict.get(paths, path)
+            if member is not None:
+                self._snapshot[path] = member_fingerprint(member)
+
+        def sortedsets(data):
+            """ sets as sorted lists, so unchanged metadata serializes the same """
+            return dict((key, sorted(val)) for key, val in data.items())
+
+        monolithdata = dict(
+            Type=monolith.type, Name=monolith.name, typepath=sortedsets(monolith.typesadded),
+            ctree=sortedsets(monolith.ctree), colls=sortedsets(monolith.colltypes),
+            store=self.store.name, shared=sorted(skip),
+            partial=isinstance(monolith, PartialMonolith) and monolith.partial)
+        monolithdata.update(metadata)
+        self._write_if_changed(clientdir, MONOLITH_FILE, monolithdata)
+
+        root = redfishinst.root
+        self._write_if_changed(clientdir, SESSION_FILE, dict(
+            layout=CACHE_LAYOUT,
+            selector=self._rmc.selector,
+            login=dict(
+                username=None,
+                password=None,
+                url=redfishinst.base_url,
+                session_key=self.encodefunct(redfishinst.session_key),
+                session_location=redfishinst.session_location,
+                authorization_key=redfishinst.basic_auth,
+                bios_password=redfishinst.bios_password,
+                redfish=monolith.is_redfish,
+                ilo=self._rmc.typepath.ilogen,
+                iloversion=self._rmc.typepath.iloversion,
+                proxy=redfishinst.proxy,
+                ca_cert_data=redfishinst._cert_data if redfishinst._cert_data else dict(),
+            ),
+            root=dict(Content=root.read, Status=root.status, Headers=root.getheaders()) \
+                if root else None))
+
+        self._write_if_changed(self._rmc.cachedir, "index", [dict(
+            url=redfishinst.base_url, href=url_hash(redfishinst.base_url))])
+
+    def logout_del_function(self, url=None):
+        """ Removes cached sessions and returns the ones RmcApp should log out of
+
+        :param url: The URL to pass back for logout.
+        :type url: str
+        """
+        sessionlocs = []
+        if not self._rmc.cache:
+            return sessionlocs
+
+        with self.lock():
+            return self._logout_clients(url)
+
+    def _logout_clients(self, url):
+        """ Removes the cached clients of the current cache directory """
+        sessionlocs = []
+        try:
+            index_cache = self._read_index()
+        except (IOError, OSError, ValueError) as excp:
+            LOGGER.warning("Unable to read cache data %s", excp)
+            return sessionlocs
+
+        for index in index_cache:
+            if url and url not in index["url"]:
+                continue
+            clientfn = os.path.join(self._rmc.cachedir, index["href"])
+            try:
+                if os.path.isdir(clientfn):
+                    for store in (self.store, self._restored):
+                        if isinstance(store, PackStore):
+                            store.close()
+                    with open(os.path.join(clientfn, SESSION_FILE), 'r') as sessionfh:
+                        data = json.load(sessionfh)
+                    shutil.rmtree(clientfn, ignore_errors=True)
+                elif os.path.isfile(clientfn):
+                    with open(clientfn, 'r') as clientfh:
+                        data = json.load(clientfh)
+                    os.remove(clientfn)
+                else:
+                    continue
+            except (IOError, OSError, ValueError, KeyError) as excp:
+                LOGGER.warning("Unable to read cache data %s", excp)
+                continue
+
+            if url:
+                break
+            login = data.get("login", {})
+            if login.get("session_location") is None:
+                continue
+            if "blobstore" in login["url"]:
+                loc = login["session_location"].split("//")[-1]
+                sesurl = None
+            else:
+                loc = login["session_location"].split(login["url"])[-1]
+                sesurl = login["url"]
+            sessionlocs.append((loc, sesurl, self.decodefunct(login["session_key"])))
+
+        self._monolith = None
+        self._written = dict()
+        return sessionlocs
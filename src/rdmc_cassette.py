@@ -0,0 +1,151 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Record and replay of REST traffic for RDMC. A cassette is a directory holding the responses
+of a real run, which can then be served back without a server, to benchmark and test the
+client side offline."""
+
+# ---------Imports---------
+
+import os
+import json
+import time
+import base64
+import threading
+
+from redfish.rest.containers import RestRequest, RestResponse
+
+from rdmc_helper import InvalidFileInputError, LOGGER
+
+# ---------End of imports---------
+
+CASSETTE_FILE = 'cassette.jsonl'
+REDACTED_HEADERS = ('x-auth-token', 'set-cookie')
+REPLAY_TOKEN = 'replay-token'
+
+
+def interaction_key(method, path, args=None):
+    """ Key matching a request to its recorded responses, the host, headers and request body
+    are not part of it so a cassette can be replayed against any url and credentials
+
+    :param method: HTTP method
+    :type method: str.
+    :param path: request path
+    :type path: str.
+    :param args: query arguments
+    :type args: dict.
+    :returns: str
+    """
+    return '%s %s%s' % (method, path, '?' + json.dumps(args, sort_keys=True) if args else '')
+
+
+class _RecordedResponse(object):
+    """ Stand in for the urllib3 response of a recorded interaction """
+
+    def __init__(self, status, reason, headers, data):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+
+class Recorder(object):
+    """ Transport layer appending every request and its response to the cassette of a
+    directory. Session tokens and cookies are replaced and request bodies, which may hold
+    credentials, are not written. """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.count = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def request(self, send, connection, path, method, args, body, headers):
+        """ Transport layer entry, see Transport """
+        started = time.time()
+        response = send(connection, path, method, args, body, headers)
+        seconds = time.time() - started
+        data = response.ori if response.ori is not None else b''
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        respheaders = dict((name, REPLAY_TOKEN if name.lower() in REDACTED_HEADERS else value) \
+                           for name, value in response.getheaders().items())
+        interaction = {'key': interaction_key(method, path, args), 'status': response.status,
+                       'reason': getattr(response._http_response, 'reason', ''),
+                       'headers': respheaders, 'seconds': round(seconds, 6),
+                       'body': base64.b64encode(data).decode('ascii')}
+
+        filename = os.path.join(self.directory, CASSETTE_FILE)
+        with self.lock:
+            # the responses may hold anything the session could read, keep them private
+            handle = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            with os.fdopen(handle, 'a') as cassette:
+                cassette.write(json.dumps(interaction) + '\n')
+            self.count += 1
+        return response
+
+
+class Player(object):
+    """ Transport layer answering requests from the cassette of a directory instead of the
+    server. The responses recorded for a request are served in their recorded order, the last
+    one again once they are used up. Requests that were not recorded get a 404. The replay is
+    deterministic, the only delay is the optional latency added to every request. """
+
+    def __init__(self, directory, latency=0.0):
+        """
+        :param directory: cassette directory
+        :type directory: str.
+        :param latency: seconds added to every request
+        :type latency: float.
+        """
+        filename = os.path.join(directory, CASSETTE_FILE)
+        if not os.path.isfile(filename):
+            raise InvalidFileInputError("No recorded traffic found in %s, record it with "
+                                        "--record first." % directory)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.interactions = dict()
+        self.served = dict()
+        self.missed = 0
+        with open(filename, 'r') as cassette:
+            for line in cassette:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self.interactions.setdefault(interaction['key'], []).append(interaction)
+
+    def request(self, send, connection, path, method, args, body, headers):
+        """ Transport layer entry, see Transport """
+        key = interaction_key(method, path, args)
+        with self.lock:
+            recorded = self.interactions.get(key)
+            if recorded:
+                index = self.served.get(key, 0)
+                self.served[key] = index + 1
+                interaction = recorded[min(index, len(recorded) - 1)]
+            else:
+                self.missed += 1
+                interaction = {'status': 404, 'reason': 'Not Found', 'body': '',
+                               'headers': {'Content-Type': 'application/json'}}
+                LOGGER.info("No recorded response for %s", key)
+        if self.latency:
+            time.sleep(self.latency)
+
+        return RestResponse(RestRequest(path, method, data=body, url=connection.base_url),
+                            _RecordedResponse(interaction['status'], interaction['reason'],
+                                              dict(interaction['headers']),
+                                              base64.b64decode(interaction['body'])))
@@ -0,0 +1,312 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Tab completion for the RDMC interactive mode. Kept apart from rdmc_helper so one-shot
+commands never import prompt_toolkit."""
+
+# ---------Imports---------
+from __future__ import unicode_literals
+
+import six
+
+from prompt_toolkit.completion import Completer, Completion
+
+from rdmc_base_classes import HARDCODEDLIST
+
+# ---------End of imports---------
+
+
+def hidden_property(name):
+    """ True for the properties the get command does not show """
+    name = name.lower()
+    return name in HARDCODEDLIST or '@odata' in name or '@redfish.allowablevalues' in name
+
+
+def property_paths(data, prefix='', hidden=None):
+    """ Slash separated paths of every key of a nested dictionary
+
+    :param data: nested dictionary
+    :type data: dict.
+    :param prefix: path of the dictionary itself
+    :type prefix: str.
+    :param hidden: function telling which keys to leave out, with everything below them
+    :type hidden: function.
+    :returns: generator of paths
+    """
+    for key, value in data.items():
+        key = six.text_type(key)
+        if hidden and hidden(key):
+            continue
+        path = prefix + key
+        yield path
+        if isinstance(value, dict):
+            for subpath in property_paths(value, path + '/', hidden):
+                yield subpath
+
+
+def enumeration(info):
+    """ Possible values of a property, from its registry entry or its schema
+
+    :param info: registry entry or schema of the property
+    :type info: dict.
+    :returns: list of values
+    """
+    if not isinstance(info, dict):
+        return []
+    if 'Type' in info and six.text_type(info['Type']).lower() == "enumeration":
+        return [six.text_type(value['ValueName']) for value in info.get('Value', [])]
+    info = info.get('properties', info)
+    return [six.text_type(value) for value in info.get('enum', [])] \
+        if isinstance(info, dict) else []
+
+
+class _TrieNode(object):
+    """ Node of a CompletionTrie """
+    __slots__ = ('children', 'end', 'words')
+
+    def __init__(self):
+        self.children = dict()
+        self.end = False
+        self.words = None
+
+
+class CompletionTrie(object):
+    """ Prefix tree of completion words. The sorted completions of a node are kept once
+    computed, so typing one more character only walks one more node. """
+
+    def __init__(self, words=()):
+        self.root = _TrieNode()
+        self.update(words)
+
+    def add(self, word):
+        """ Adds a word
+
+        :param word: word to add
+        :type word: str.
+        """
+        node = self.root
+        node.words = None
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+            node.words = None
+        node.end = True
+
+    def update(self, words):
+        """ Adds words
+
+        :param words: words to add
+        :type words: list.
+        """
+        for word in words:
+            self.add(word)
+
+    def complete(self, prefix, stop=None):
+        """ Words starting with a prefix
+
+        :param prefix: prefix to complete
+        :type prefix: str.
+        :param stop: character the words do not continue past after the prefix, used to
+                     complete one level of a slash separated path
+        :type stop: str.
+        :returns: sorted list of words, shared with later calls so it must not be changed
+        """
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        if node.words is None:
+            node.words = dict()
+        if stop not in node.words:
+            words = []
+            stack = [(node, '')]
+            while stack:
+                current, suffix = stack.pop()
+                if current.end:
+                    words.append(suffix)
+                for char, child in current.children.items():
+                    if char != stop:
+                        stack.append((child, suffix + char))
+            node.words[stop] = sorted(prefix + suffix for suffix in words)
+        return node.words[stop]
+
+
+class TabAndHistoryCompletionClass(Completer):
+    """ Tab and History Class used by interactive mode """
+
+    def __init__(self, options, flags=None):
+        """
+        :param options: command names to their completion lists
+        :type options: dict.
+        :param flags: function returning the option flags of a command
+        :type flags: function.
+        """
+        self.options = options
+        self.commands = sorted(options)
+        self.flags = flags
+        self.toolbar_text = None
+        self.last_complete = None
+        self._tries = dict()
+
+    def _trie(self, key, words):
+        """ Completion index of a list, built on first use after the list was updated """
+        if key not in self._tries:
+            self._tries[key] = CompletionTrie(words)
+        return self._tries[key]
+
+    def _nested_info(self, nestedtokens):
+        """ Registry entry or schema of a nested property """
+        nested_info = self.options.get('nestedinfo', {})
+        for token in nestedtokens:
+            try:
+                if nested_info:
+                    if 'properties' in nested_info:
+                        nested_info = nested_info['properties']
+                    if not 'AttributeName' in nested_info[token]:
+                        nested_info = nested_info['properties'][token] if 'properties' \
+                                                                          in nested_info else nested_info[
+                            token]
+                    else:
+                        nested_info = nested_info[token]
+            except Exception:
+                break
+        return nested_info
+
+    def get_completions(self, document, complete_event):
+        """ Function to return the options for autocomplete """
+        word = ""
+        self.toolbar_text = ""
+        matches = None
+        if document.text:
+            rawtokens = document.text.split()
+            if not document.text.endswith(" ") and rawtokens[-1].startswith('-'):
+                # option flags of the command
+                word = rawtokens[-1]
+                if self.flags and rawtokens[0] in self.options:
+                    if ('flags', rawtokens[0]) not in self._tries:
+                        try:
+                            flags = self.flags(rawtokens[0])
+                        except Exception:
+                            flags = []
+                        self._trie(('flags', rawtokens[0]), flags)
+                    for opt in self._tries[('flags', rawtokens[0])].complete(word):
+                        yield Completion(opt, start_position=-len(word))
+                return
+
+            # We aren't completing options yet
+            tokens = [token for token in rawtokens if not token.startswith('-')]
+            if not tokens:
+                return
+
+            self.last_complete = tokens[-1]
+            nestedtokens = self.last_complete.split('/')
+
+            if not document.text.endswith(" "):
+                tokens.pop()
+                word = document.get_word_under_cursor()
+            else:
+                nestedtokens = []
+            if word == '/':
+                word = ''
+
+            if len(tokens) >= 1:
+                if tokens[0] == 'select':
+                    # only first type
+                    if len(tokens) < 2:
+                        matches = self._trie('select', self.options.get('select', [])).\
+                            complete(word)
+                elif tokens[0] == 'set' and nestedtokens and '=' in nestedtokens[-1]:
+                    # possible values of the property
+                    prop, _, word = self.last_complete.partition('=')
+                    values = enumeration(self._nested_info(prop.split('/')))
+                    self.toolbar_text = "Possible Values:\n" + ' '.join(values) if values else ''
+                    matches = self._trie(('values', prop), values).complete(word)
+                elif tokens[0] in ['get', 'list', 'info', 'set']:
+                    # Match properties, one level of the nested path at a time
+                    if tokens[0] in ['set']:
+                        matches = self._trie('set', self.options.get('set', [])).complete(word)
+                    else:
+                        prefix = '/'.join(nestedtokens[:-1] + [word]) if nestedtokens else word
+                        hidden = hidden_property if tokens[0] == 'get' else None
+                        paths = self._trie(('nestedprop', tokens[0] == 'get'), property_paths(
+                            self.options.get('nestedprop', {}), hidden=hidden)).\
+                            complete(prefix, stop='/')
+                        matches = [path.rsplit('/', 1)[-1] for path in paths] if '/' in prefix \
+                            else paths
+                    nested_info = self._nested_info(nestedtokens)
+
+                    # Try to get info for help bar
+                    help_text = nested_info.get('HelpText', '')
+                    if 'Type' in nested_info and nested_info['Type'].lower() == "enumeration":
+                        help_text += "\nPossible Values:\n"
+                        for value in nested_info['Value']:
+                            help_text += six.u(str(value['ValueName'])) + ' '
+
+                    if not help_text:
+                        try:
+                            nested_info = nested_info['properties']
+                        except KeyError:
+                            pass
+                        help_text = nested_info.get('description', '')
+                        if 'enum' in nested_info:
+                            help_text += "\nPossible Values:\n"
+                            for value in nested_info['enum']:
+                                help_text += six.u(str(value)) + ' '
+                    if isinstance(help_text, str):
+                        help_text = help_text.replace('. ', '.\n')
+                    self.toolbar_text = help_text
+                elif isinstance(self.options.get(tokens[0]), list):
+                    matches = self._trie(tokens[0], self.options[tokens[0]]).complete(word)
+            else:
+                # just match commands
+                matches = self._trie('commands', self.commands).complete(word)
+        else:
+            matches = self._trie('commands', self.commands).complete(word)
+
+        for opt in matches or []:
+            if opt == word:
+                self.last_complete = opt
+            yield Completion(
+                opt + '',
+                start_position=-len(word))
+
+    def bottom_toolbar(self):
+        return self.toolbar_text if self.toolbar_text else None
+
+    def updates_tab_completion_lists(self, options):
+        """ Function to update tab completion lists, the completion indexes of the updated
+        lists are rebuilt here so the next keystroke does not have to
+
+        :param options: options list
+        :type options: list.
+        """
+        # Loop through options passed and add them to them
+        # to the current tab options list
+        for key, value in options.items():
+            self.options[key] = value
+            for trie in [trie for trie in self._tries if isinstance(trie, tuple) and \
+                         (trie[0] == key or (trie[0] == 'values' and key == 'nestedinfo'))]:
+                self._tries.pop(trie, None)
+            if key == 'nestedprop':
+                for hidden in (None, hidden_property):
+                    self._tries[(key, hidden is not None)] = CompletionTrie(
+                        property_paths(value, hidden=hidden))
+            elif key in ('select', 'set'):
+                self._tries[key] = CompletionTrie(value)
+            else:
+                self._tries.pop(key, None)
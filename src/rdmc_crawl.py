@@ -0,0 +1,465 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Monolith crawling for RDMC. The crawl at login walks the links of the tree breadth first
+with a pool of workers, and a lazy crawl only reads the resource directory and fetches the
+resources of a type the first time a command looks the type up."""
+
+# ---------Imports---------
+
+import sys
+import time
+
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+import six
+import jsonpath_rw
+
+from six.moves.urllib.parse import urlparse, urlunparse, ParseResult, quote
+
+from redfish.ris.ris import RisMonolithMemberv100, BiosUnregisteredError, SessionExpired
+
+from rdmc_helper import LOGGER
+from rdmc_fetch import concurrent_map
+from rdmc_monolith import IndexedMonolith
+
+# ---------End of imports---------
+
+# the redfish library loads with as many threads when asked to
+CRAWL_WORKERS = 6
+
+
+def major_type(typename):
+    """ Major type of a full type, #Bios.v1_0_0.Bios gives Bios.v1_0_0, the way the monolith
+    names its types
+
+    :param typename: full type
+    :type typename: str.
+    :returns: str
+    """
+    return ".".join(typename.split(".", 2)[:2]).split("#")[-1]
+
+
+class PartialMonolith(IndexedMonolith):
+    """ Monolith holding the service root and the resource directory, to which the
+    instances of a type listed in the directory are added and fetched when the type is first
+    looked up. Listing every member adds the rest of the directory without fetching it, as the
+    monolith of a regular login does. """
+
+    def __init__(self, client, typepath, directory_load=True):
+        super(PartialMonolith, self).__init__(client, typepath, directory_load=directory_load)
+        self._unresolved = None
+
+    @property
+    def directory(self):
+        """ Resource directory member, None if there is none """
+        member = self.paths.get(self._resourcedir) if self._resourcedir in self.paths else None
+        return member if member and member.resp else None
+
+    @property
+    def unresolved(self):
+        """ Directory instances not added yet, by lowercase major type. Built from the
+        directory on first use, it is not kept with the session. """
+        if self._unresolved is None:
+            self._unresolved = dict()
+            directory = self.directory
+            for item in directory.dict.get("Instances", []) if directory else []:
+                typename = item.get(self.typepath.defs.typestring)
+                path = item.get(self.typepath.defs.hrefstring)
+                if not typename or not path or path in self.paths:
+                    continue
+                self._unresolved.setdefault(major_type(typename).lower(), []).append(
+                    (path, major_type(typename), item.get(self.etagstr)))
+        return self._unresolved
+
+    @property
+    def partial(self):
+        """ True while some directory instances are not in the monolith """
+        return any(self.unresolved.values())
+
+    def index_collections(self):
+        """ Maps the types of the directory to their collection types, as the monolith of a
+        regular login does """
+        directory = self.directory
+        alltypes = set()
+        colls = set()
+        for item in directory.dict.get("Instances", []) if directory else []:
+            typename = item.get(self.typepath.defs.typestring)
+            if typename:
+                (colls if "Collection" in typename else alltypes).add(major_type(typename))
+        for coll in colls:
+            collname = coll.split("Collection")[0]
+            typename = next((name for name in sorted(alltypes) if name.startswith(collname)),
+                            None)
+            self.colltypes[typename].add(coll)
+
+    def resolve(self, typeval=None, fetch=True):
+        """ Adds the directory instances of the types matching typeval, the way gettypename
+        matches them, or of every type
+
+        :param typeval: type looked up, every type if not provided
+        :type typeval: str.
+        :param fetch: flag to fetch the instances added instead of leaving them to be loaded
+                      on access
+        :type fetch: bool.
+        :returns: list of the paths added
+        """
+        unresolved = self.unresolved
+        if not unresolved:
+            return []
+        if typeval:
+            typeval = (typeval[1:] if typeval.startswith("#") else typeval).lower()
+        added = []
+        for key in [key for key in unresolved if not typeval or typeval in key]:
+            for path, typename, etag in unresolved.pop(key):
+                if path in self.paths:
+                    continue
+                member = RisMonolithMemberv100(None, self.is_redfish)
+                member.popdefs(typename, path, etag)
+                self.update_member(member=member, init=False)
+                added.append(path)
+
+        if added and fetch:
+            LOGGER.debug("Fetching %s resources of %s", len(added), typeval)
+            for path, (resp, error) in zip(added, concurrent_map(self.client.get, added)):
+                if error is None and resp.status == 200:
+                    self.update_member(resp=resp, path=path, init=False)
+        return added
+
+    def gettypename(self, types):
+        """ Major types matching types, see RisMonolith.gettypename. Their directory instances
+        are fetched first. """
+        self.resolve(types)
+        return super(PartialMonolith, self).gettypename(types)
+
+    def iter(self, typeval=None):
+        """ Members of a type or every member, see RisMonolith.iter """
+        if not typeval:
+            self.resolve(fetch=False)
+        return super(PartialMonolith, self).iter(typeval)
+
+
+class CrawlStats(object):
+    """ Resources, bytes and request time of a crawl for every top level subtree """
+
+    def __init__(self, prefix='/redfish/v1/'):
+        self.prefix = prefix.rstrip('/') + '/'
+        self.subtrees = dict()
+        self.seconds = 0.0
+        self.workers = 1
+
+    def subtree(self, path):
+        """ Top level subtree of a path, Systems for /redfish/v1/Systems/1/, / for the root
+
+        :param path: resource path
+        :type path: str.
+        :returns: str
+        """
+        path = path.split('?')[0]
+        if path.lower().startswith(self.prefix.lower()):
+            path = path[len(self.prefix):]
+        return path.strip('/').split('/')[0] or '/'
+
+    def add(self, path, size, seconds):
+        """ Counts a fetched resource
+
+        :param path: resource path
+        :type path: str.
+        :param size: characters of the response body
+        :type size: int.
+        :param seconds: time the request took
+        :type seconds: float.
+        """
+        stats = self.subtrees.setdefault(self.subtree(path), {'resources': 0, 'bytes': 0,
+                                                              'seconds': 0.0})
+        stats['resources'] += 1
+        stats['bytes'] += size
+        stats['seconds'] += seconds
+
+    def report(self):
+        """ Lines describing the crawl and every subtree, the slowest first
+
+        :returns: list of strings
+        """
+        lines = ['Crawled %s resources, %.1f KiB in %.2fs with %s workers\n' % (
+            sum(stats['resources'] for stats in self.subtrees.values()),
+            sum(stats['bytes'] for stats in self.subtrees.values()) / 1024.0, self.seconds,
+            self.workers)]
+        lines.append('%-24s %9s %10s %10s\n' % ('SUBTREE', 'RESOURCES', 'KiB', 'SECONDS'))
+        for name, stats in sorted(self.subtrees.items(), key=lambda item: item[1]['seconds'],
+                                  reverse=True):
+            lines.append('%-24s %9s %10.1f %10.2f\n' % (name, stats['resources'],
+                                                        stats['bytes'] / 1024.0,
+                                                        stats['seconds']))
+        return lines
+
+
+class Crawler(object):
+    """ Breadth first crawl of a monolith, the resources of a level of the tree are fetched by
+    a pool of workers and added in the calling thread in the order their links were found.
+    It follows and skips the same links as the sequential load of the redfish library, so the
+    monolith ends up with the same members, types and collection tree. """
+
+    def __init__(self, monolith, workers=CRAWL_WORKERS, stats=None):
+        """
+        :param monolith: monolith to crawl into
+        :type monolith: RisMonolith.
+        :param workers: number of requests in flight
+        :type workers: int.
+        :param stats: statistics to count the crawl in
+        :type stats: CrawlStats.
+        """
+        self.monolith = monolith
+        # requests of the local interface can not be made in parallel
+        self.workers = 1 if monolith.client.base_url.startswith("blobstore://.") else \
+                       max(1, workers)
+        self.stats = stats if stats else CrawlStats(monolith.client.default_prefix)
+        self.stats.workers = self.workers
+        self.visited = None
+        self.children = None
+        defs = monolith.typepath.defs
+        self.linkpath = jsonpath_rw.parse("$..'@odata.id'" if monolith.is_redfish else "$..href")
+        self.memberlink = lambda fullpath: fullpath.endswith(defs.hrefstring) and \
+            fullpath.startswith((monolith.collstr, "Entries"))
+
+    def admit(self, path, includelogs, prevpath=None):
+        """ Path to fetch for a link, None if the link is skipped. The link is added to the
+        collection tree whether it was visited already or not.
+
+        :param path: link found
+        :type path: str.
+        :param includelogs: flag to follow links to logs
+        :type includelogs: bool.
+        :param prevpath: collection the link is a member of
+        :type prevpath: str.
+        :returns: str or None
+        """
+        if path.endswith("?page=1") or path.endswith(".json"):
+            return None
+        elif path == "/" or "telemetry" in path.lower() or not path.startswith("/redfish/v1"):
+            return None
+        elif not includelogs and "/log" in path.lower():
+            return None
+
+        parsed = urlparse(path)
+        path = urlunparse(ParseResult(scheme=parsed.scheme, netloc=parsed.netloc,
+                                      path=quote(parsed.path), params=parsed.params,
+                                      query=parsed.query, fragment=""))
+        if prevpath and prevpath != path:
+            self.monolith.ctree[prevpath].update([path])
+        return path
+
+    def fetch(self, path):
+        """ GETs a path, run by the workers
+
+        :param path: path to fetch
+        :type path: str.
+        :returns: tuple of the response and the seconds it took
+        """
+        started = time.time()
+        resp = self.monolith.client.get(path)
+        return resp, time.time() - started
+
+    def links(self, path, resp, originaluri):
+        """ Links of a fetched resource to follow, the way the sequential load follows them
+
+        :param path: path of the resource
+        :type path: str.
+        :param resp: response of the resource
+        :type resp: RestResponse.
+        :param originaluri: resource the pages of a paged collection belong to
+        :type originaluri: str.
+        :returns: list of tuples of the link, the collection it is a member of and the
+                  original uri
+        """
+        monolith = self.monolith
+        matches = self.linkpath.find(resp.dict)
+        found = []
+        if "links" in resp.dict and "NextPage" in resp.dict["links"]:
+            base = originaluri if originaluri else path
+            found.append(("%s?page=%s" % (base, resp.dict["links"]["NextPage"]["page"]), None,
+                          base))
+
+        if monolith.directory_load and any(match.value == monolith._resourcedir \
+                                           for match in matches):
+            # the resource directory lists the rest, the sequential load stops here too
+            return found + [(monolith._resourcedir, path, originaluri)]
+        for match in matches:
+            fullpath = str(match.full_path)
+            if fullpath in ("Registries.@odata.id", "JsonSchemas.@odata.id"):
+                continue
+            if match.value == path or not isinstance(match.value, six.string_types):
+                continue
+            found.append((match.value, path if self.memberlink(fullpath) else None,
+                          originaluri))
+        return found
+
+    def crawl(self, path=None, includelogs=False, init=True):
+        """ Crawls the tree from path into the monolith
+
+        :param path: path to start from, the service root if not provided
+        :type path: str.
+        :param includelogs: flag to follow links to logs
+        :type includelogs: bool.
+        :param init: flag if this is the initial load, to show progress and populate the
+                     collections of the resource directory
+        :type init: bool.
+        :returns: the statistics of the crawl
+        """
+        monolith = self.monolith
+        started = time.time()
+        if init:
+            sys.stdout.write("Discovering data...")
+            monolith.name = monolith.name + " at %s" % monolith.client.base_url
+        self.visited = set(monolith._visited_urls) | set(monolith.paths.keys())
+        self.children = dict()
+        known = list(monolith.paths.keys())
+        visited = set(self.visited)
+
+        level = []
+        start = self.admit(path if path else monolith.client.default_prefix, includelogs)
+        if start and start.lower() not in self.visited:
+            self.visited.add(start.lower())
+            level.append((start, None))
+        pool = ThreadPool(self.workers) if self.workers > 1 else None
+        try:
+            while level:
+                paths = [item[0] for item in level]
+                if pool:
+                    fetched = pool.map(self.fetch, paths)
+                else:
+                    fetched = [self.fetch(item) for item in paths]
+                nextlevel = []
+                for (path, originaluri), (resp, seconds) in zip(level, fetched):
+                    self.stats.add(path, len(resp.read or ''), seconds)
+                    if resp.status != 200 and path.lower() == monolith.typepath.defs.biospath:
+                        raise BiosUnregisteredError()
+                    elif resp.status == 401:
+                        raise SessionExpired("Invalid session. Please logout and log back in "
+                                             "or include credentials.")
+                    elif resp.status not in (201, 200):
+                        monolith.removepath(path)
+                        continue
+                    monolith.update_member(resp=resp, path=path, init=init)
+                    self.children[path] = []
+                    for link, prevpath, original in self.links(path, resp, originaluri):
+                        link = self.admit(link, includelogs, prevpath)
+                        if not link:
+                            continue
+                        self.children[path].append(link)
+                        if link.lower() not in self.visited:
+                            self.visited.add(link.lower())
+                            nextlevel.append((link, original))
+                level = nextlevel
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+            self.stats.seconds += time.time() - started
+
+        if start in self.children:
+            self.reorder(start, known, visited)
+        if init:
+            sys.stdout.write("Done\n")
+        if monolith.directory_load and init:
+            monolith._populatecollections()
+        return self.stats
+
+
+    def reorder(self, start, known, visited):
+        """ Orders the members, types and collection tree of the monolith the way the depth
+        first sequential load adds them, so both crawls give the same monolith
+
+        :param start: path the crawl started from
+        :type start: str.
+        :param known: paths in the monolith before the crawl
+        :type known: list.
+        :param visited: paths visited before the crawl
+        :type visited: set.
+        """
+        monolith = self.monolith
+        seen = visited | set([start.lower()])
+        order = [start]
+        stack = [(start, iter(self.children[start]))]
+        while stack:
+            link = next(stack[-1][1], None)
+            if link is None:
+                stack.pop()
+                continue
+            if link.lower() in seen or link not in self.children:
+                continue
+            seen.add(link.lower())
+            order.append(link)
+            stack.append((link, iter(self.children[link])))
+
+        paths = monolith.paths
+        ordered = dict((path, paths[path]) for path in known)
+        ordered.update((path, paths[path]) for path in order if path in paths)
+        ordered.update(paths)
+        # assigned once, the paths setter indexes the @odata.id of every member
+        monolith.paths = ordered
+        position = dict((path, index) for index, path in enumerate(monolith.paths))
+        rank = lambda path: position.get(path, len(position))
+        types = sorted(monolith.typesadded, key=lambda key: min(
+            [rank(path) for path in monolith.typesadded[key]] or [len(position)]))
+        monolith.typesadded = defaultdict(set, ((key, set(sorted(monolith.typesadded[key],
+                                                                 key=rank))) for key in types))
+        # members are added to the tree in the order of the links of their collection already
+        monolith.ctree = defaultdict(set, ((key, monolith.ctree[key]) for key in sorted(
+            monolith.ctree, key=rank)))
+
+
+def build_monolith(app, path=None, includelogs=False, lazy=False, workers=CRAWL_WORKERS):
+    """ Builds the monolith of an app logged in with skipbuild. A lazy build only reads the
+    resource directory into a partial monolith, servers without a resource directory are
+    crawled instead.
+
+    :param app: app logged in with skipbuild
+    :type app: RmcApp.
+    :param path: path to start the crawl from, the service root if not provided
+    :type path: str.
+    :param includelogs: flag to include the logs in the crawl
+    :type includelogs: bool.
+    :param lazy: flag to only read the resource directory
+    :type lazy: bool.
+    :param workers: number of requests in flight during the crawl
+    :type workers: int.
+    :returns: the statistics of the crawl
+    """
+    client = app.current_client
+    stats = CrawlStats(client.default_prefix)
+    directory_load = True
+    if lazy and not path:
+        monolith = PartialMonolith(client, app.typepath)
+        started = time.time()
+        resp = client.get(monolith._resourcedir)
+        stats.add(monolith._resourcedir, len(resp.read or ''), time.time() - started)
+        stats.seconds = time.time() - started
+        if resp.status == 200 and "Instances" in resp.dict:
+            monolith.update_member(resp=client.root, path=client.default_prefix, init=False)
+            monolith.update_member(resp=resp, path=monolith._resourcedir, init=False)
+            monolith.index_collections()
+            app.monolith = monolith
+            return stats
+        LOGGER.info("No resource directory at %s, crawling the whole tree.",
+                    monolith._resourcedir)
+        directory_load = False
+
+    app.monolith = IndexedMonolith(client, app.typepath, directory_load=directory_load)
+    return Crawler(app.monolith, workers=workers, stats=stats).crawl(path=path,
+                                                                     includelogs=includelogs)
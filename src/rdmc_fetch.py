@@ -0,0 +1,289 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Concurrent fetching for RDMC commands. Requests run on one pool of threads shared by the
+whole process, so the number of requests in flight stays bounded however many commands,
+sessions or fleet targets fetch at the same time."""
+
+# ---------Imports---------
+
+import sys
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+from rdmc_helper import ThreadStreamRouter, LOGGER
+
+# ---------End of imports---------
+
+# requests wait on the network, not the CPU, the pool is sized for the iLO instead of the host
+FETCH_WORKERS = 8
+EXPAND_QUERY = '?$expand=.'
+EXPAND_FILE = 'expand.json'
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+class FetchResult(object):
+    """ Outcome of one request of a concurrent fetch, the response or the error raised """
+
+    __slots__ = ('path', 'response', 'error')
+
+    def __init__(self, path, response=None, error=None):
+        self.path = path
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self):
+        """ True when the request completed with a 200 status """
+        return self.error is None and getattr(self.response, 'status', None) == 200
+
+    @property
+    def dict(self):
+        """ Body of a successful response, None otherwise """
+        return self.response.dict if self.ok else None
+
+
+def _pool():
+    """ The shared pool, started on first use """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPool(FETCH_WORKERS, initializer=_mark_worker)
+        return _POOL
+
+
+def _mark_worker():
+    _LOCAL.worker = True
+
+
+def _routed(func, streams):
+    """ Wraps func so its output goes to the streams of the thread that submitted it """
+    def call(item):
+        if streams:
+            sys.stdout.register(streams[0])
+            sys.stderr.register(streams[1])
+        try:
+            return func(item)
+        finally:
+            if streams:
+                sys.stdout.unregister()
+                sys.stderr.unregister()
+    return call
+
+
+def concurrent_map(func, items):
+    """ Calls func on every item on the shared pool. Calls made from a pool thread run in
+    that thread one after the other, so nested fetches can not exhaust the pool.
+
+    :param func: function taking one item
+    :type func: function.
+    :param items: items to call func on
+    :type items: list.
+    :returns: list of (result, error) tuples in the order of items, error is the exception
+              raised by func or None
+    """
+    def capture(item):
+        try:
+            return func(item), None
+        except Exception as excp:
+            return None, excp
+
+    items = list(items)
+    if len(items) < 2 or getattr(_LOCAL, 'worker', False):
+        return [capture(item) for item in items]
+
+    streams = None
+    if isinstance(sys.stdout, ThreadStreamRouter) and isinstance(sys.stderr, ThreadStreamRouter):
+        streams = (sys.stdout.current(), sys.stderr.current())
+    return _pool().map(_routed(capture, streams), items)
+
+
+def concurrent_get(app, paths, uncache=False, **kwargs):
+    """ GETs paths concurrently with the client of app, the session of the calling command.
+    Responses are added to the monolith in the calling thread, in the order of paths, unless
+    uncache is set. Requests go through the rate limiter like any other request.
+
+    :param app: application of the session
+    :type app: RmcApp.
+    :param paths: paths to GET
+    :type paths: list.
+    :param uncache: flag to not store the responses in the monolith
+    :type uncache: bool.
+    :param kwargs: further arguments of get_handler, silent=True by default
+    :type kwargs: dict.
+    :returns: list of FetchResult in the order of paths
+    """
+    kwargs.setdefault('silent', True)
+
+    def get(path):
+        return app.get_handler(path, uncache=True, **kwargs)
+
+    paths = list(paths)
+    results = [FetchResult(path, response, error) for path, (response, error) in \
+               zip(paths, concurrent_map(get, paths))]
+
+    if not uncache and app.monolith:
+        for result in results:
+            if result.ok:
+                app.monolith.update_member(resp=result.response, path=result.path, init=False)
+
+    return results
+
+
+def responses(results):
+    """ Responses of a concurrent fetch, for callers treating any failed request as fatal
+
+    :param results: results of concurrent_get
+    :type results: list.
+    :returns: list of the responses in the order of results
+    """
+    for result in results:
+        if result.error is not None:
+            raise result.error
+    return [result.response for result in results]
+
+
+def member_resources(app, members):
+    """ Resources of collection members, members given by their path only are fetched
+    concurrently, the others are already expanded and kept as they are
+
+    :param app: application of the session
+    :type app: RmcApp.
+    :param members: members of a collection
+    :type members: list.
+    :returns: list of the member resources in the order of members
+    """
+    hrefstring = app.typepath.defs.hrefstring
+    links = [member.get(hrefstring) or next(iter(member.values())) for member in members \
+             if len(member) == 1]
+    fetched = iter(responses(concurrent_get(app, links)))
+    return [next(fetched).dict if len(member) == 1 else member for member in members]
+
+
+def collection_template(path):
+    """ Collection path with the resource ids replaced, so the collections of every system,
+    controller or drive share the expand support learned on one of them
+
+    :param path: collection path
+    :type path: str.
+    :returns: str
+    """
+    segments = path.split('?')[0].lower().rstrip('/').split('/')
+    return '/'.join(segments[:3] + ['*' if any(char.isdigit() for char in segment) else segment \
+                                    for segment in segments[3:]]) + '/'
+
+
+class ExpandSupport(object):
+    """ Collections known to honour or to ignore $expand, per firmware. The knowledge lasts
+    for the process and is kept in the shared cache directory of the firmware when the cache
+    is enabled, so later runs against any server on the same firmware start from it. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.firmwares = dict()
+
+    @staticmethod
+    def _firmware(app):
+        cachemanager = getattr(app, '_cm', None)
+        try:
+            return cachemanager.firmware(app.redfishinst), \
+                cachemanager.shared_pool(app.redfishinst)
+        except AttributeError:
+            return str(getattr(app.typepath, 'iloversion', None)), None
+
+    def _known(self, app):
+        firmware, pool = self._firmware(app)
+        with self.lock:
+            if firmware not in self.firmwares:
+                self.firmwares[firmware] = pool.read_json(EXPAND_FILE) if pool else dict()
+            return self.firmwares[firmware], pool
+
+    def supported(self, app, path):
+        """ Whether a collection honours $expand on the firmware of a session
+
+        :param app: application of the session
+        :type app: RmcApp.
+        :param path: collection path
+        :type path: str.
+        :returns: True, False or None when not known yet
+        """
+        return self._known(app)[0].get(collection_template(path))
+
+    def record(self, app, path, supported):
+        """ Records whether a collection honours $expand on the firmware of a session
+
+        :param app: application of the session
+        :type app: RmcApp.
+        :param path: collection path
+        :type path: str.
+        :param supported: True if the members came back expanded
+        :type supported: bool.
+        """
+        known, pool = self._known(app)
+        template = collection_template(path)
+        with self.lock:
+            if known.get(template) == supported:
+                return
+            known[template] = supported
+        LOGGER.info("$expand %s supported by %s", "is" if supported else "is not", template)
+        if pool:
+            try:
+                pool.update_json(EXPAND_FILE, {template: supported})
+            except (IOError, OSError) as excp:
+                LOGGER.warning("Unable to save the expand support of %s: %s", template, excp)
+
+
+EXPAND_SUPPORT = ExpandSupport()
+
+
+def collection_members(app, path):
+    """ Resources of the members of a collection. The collection is fetched with $expand
+    unless its firmware is known to ignore it, members that still come back as links are
+    fetched concurrently. Servers older than Gen10 are never asked for $expand.
+
+    :param app: application of the session
+    :type app: RmcApp.
+    :param path: collection path
+    :type path: str.
+    :returns: list of member resources, empty if the collection can not be read
+    """
+    path = path.split('?')[0]
+    members = None
+    expandfailed = False
+    if app.typepath.defs.isgen10 and EXPAND_SUPPORT.supported(app, path) is not False:
+        resp = app.get_handler(path + (EXPAND_QUERY if path.endswith('/') else \
+                                       '/' + EXPAND_QUERY), service=True, silent=True)
+        if resp and resp.status == 200 and isinstance(resp.dict.get('Members'), list):
+            members = resp.dict['Members']
+            if members:
+                EXPAND_SUPPORT.record(app, path, not any(len(member) == 1 for member in members))
+        else:
+            expandfailed = True
+
+    if members is None:
+        resp = app.get_handler(path, service=True, silent=True)
+        if not resp or resp.status != 200:
+            return []
+        if expandfailed:
+            EXPAND_SUPPORT.record(app, path, False)
+        members = resp.dict.get('Members', [])
+
+    return member_resources(app, members)
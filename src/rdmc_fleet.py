@@ -0,0 +1,347 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Fleet execution for RDMC. Runs command lines against many servers from one process, every
+server in a session of its own and a bounded number of servers at a time."""
+
+# ---------Imports---------
+
+import os
+import sys
+import json
+import time
+import shlex
+import fnmatch
+
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
+
+from rdmc_helper import ReturnCodes, InvalidCommandLineError, InvalidFileInputError, \
+    InvalidMSCfileInputError, ThreadStreamRouter, LOGGER
+from rdmc_transport import RATE_LIMITER
+from rdmc_monolith import TYPEPATH
+
+# ---------End of imports---------
+
+DEFAULT_WORKERS = 8
+SUMMARY_FILE = 'summary.json'
+OUTPUT_FILE = 'CompleteOutputfile.txt'
+
+
+def target_arguments(line):
+    """ Login arguments of a line of a targets file. A line starting with a url instead of an
+    option is taken as --url followed by the rest of the line.
+
+    :param line: line of a targets file
+    :type line: str.
+    :returns: list of arguments, empty for blank lines and comments
+    """
+    args = shlex.split(line.strip(), posix=False)
+    if not args or args[0].startswith('#'):
+        return []
+    if not args[0].startswith('-'):
+        args = ['--url'] + args
+    return args
+
+
+def target_name(args):
+    """ Host name of a target, the --url value without the scheme
+
+    :param args: login arguments of the target
+    :type args: list.
+    :returns: host name or None if the arguments do not have a url
+    """
+    try:
+        url = args[args.index('--url') + 1]
+    except (ValueError, IndexError):
+        return None
+    return url.strip('"\'').split('//')[-1]
+
+
+def login_line(args):
+    """ Login command line of a target, the login command takes the url as its argument
+
+    :param args: login arguments of the target
+    :type args: list.
+    :returns: command line
+    """
+    args = list(args)
+    index = args.index('--url')
+    url = args[index + 1]
+    del args[index:index + 2]
+    return " ".join(['login', url] + args)
+
+
+def json_output(text):
+    """ JSON document printed by a command, skipping the lines written before it such as the
+    login messages and the [200] status line of the raw commands
+
+    :param text: output of the command
+    :type text: str.
+    :returns: the decoded document or None if the output is not JSON
+    """
+    lines = text.splitlines(True)
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith(('{', '[')):
+            try:
+                return json.loads(''.join(lines[index:]))
+            except ValueError:
+                continue
+    return None
+
+
+def read_targets(filename, minargs=2):
+    """ Reads a multiple server file, one server per line given by its login arguments:
+    --url <iLO url/hostname> -u admin -p password
+
+    :param filename: multiple server file
+    :type filename: str.
+    :param minargs: least number of arguments of a line
+    :type minargs: int.
+    :returns: list of (name, arguments) tuples, the names are unique
+    """
+    if filename.startswith(('"', "'")) and filename[0] == filename[-1]:
+        filename = filename[1:-1]
+
+    if not os.path.isfile(filename):
+        raise InvalidFileInputError("File '%s' doesn't exist, please " \
+                                    "create file by running save command." % filename)
+
+    targets = []
+    with open(filename, 'r') as targetfile:
+        for lineno, line in enumerate(targetfile, 1):
+            args = target_arguments(line)
+            if not args:
+                continue
+            if len(args) < minargs or not target_name(args):
+                raise InvalidMSCfileInputError('Incomplete data on line %s, please verify the ' \
+                                               'contents of the %s file' % (lineno, filename))
+            if target_name(args) in [target[0] for target in targets]:
+                raise InvalidFileInputError("Server '%s' on line %s is listed more than once in " \
+                                            "the %s file." % (target_name(args), lineno, filename))
+            targets.append((target_name(args), args))
+
+    if not targets:
+        raise InvalidMSCfileInputError('No servers found in the %s file' % filename)
+
+    return targets
+
+
+def select_targets(source, inventory):
+    """ Targets of the --targets option, read from a file or picked from the inventory of the
+    configuration file by comma separated names or patterns such as rack1-*
+
+    :param source: file name, or names and patterns of inventory targets
+    :type source: str.
+    :param inventory: target names to login argument lines
+    :type inventory: dict.
+    :returns: list of (name, arguments) tuples
+    """
+    if os.path.isfile(source.strip('"\'')) or not inventory:
+        return read_targets(source)
+
+    targets = []
+    for pattern in source.split(','):
+        matched = [name for name in inventory if fnmatch.fnmatch(name, pattern.strip())]
+        if not matched:
+            raise InvalidFileInputError("'%s' is neither a targets file nor a target of the " \
+                                        "[targets] section of the configuration file." % pattern)
+        for name in matched:
+            args = target_arguments(inventory[name])
+            if not target_name(args):
+                raise InvalidMSCfileInputError("Target '%s' of the configuration file does " \
+                                               "not have a url." % name)
+            if name not in [target[0] for target in targets]:
+                targets.append((name, args))
+
+    return targets
+
+
+def output_directory(outputdir=None):
+    """ Creates the time stamped directory holding the logs of a multiple server run
+
+    :param outputdir: parent directory, the current directory if not provided
+    :type outputdir: str.
+    :returns: path of the new directory
+    """
+    if outputdir:
+        if outputdir.endswith(('"', "'")) and outputdir.startswith(('"', "'")):
+            outputdir = outputdir[1:-1]
+
+        if not os.path.isdir(outputdir):
+            raise InvalidCommandLineError("The given output folder path does not exist.")
+    else:
+        outputdir = os.getcwd()
+
+    createdir = os.path.join(outputdir, '%s_%s' % (datetime.now().strftime('%Y-%m-%d-%H-%M-%S'),
+                                                   'MSClogs'))
+    os.mkdir(createdir)
+    return createdir
+
+
+def run_line(session, line):
+    """ Default task of a FleetRunner, runs the command line in the session
+
+    :param session: session of the target
+    :type session: RdmcCommand.
+    :param line: command line
+    :type line: str.
+    """
+    session.run_line(session.opts, line)
+
+
+def write_summary(createdir, results, started, **summary):
+    """ Writes CompleteOutputfile.txt with the logs of the results and summary.json, which
+    includes the seconds requests waited for the rate limiter when it is enabled
+
+    :param createdir: directory holding the log files
+    :type createdir: str.
+    :param results: results of the targets, the ones with a log are written to the output file
+    :type results: list.
+    :param started: start time of the run
+    :type started: float.
+    :param summary: additional entries of summary.json
+    :type summary: dict.
+    :returns: the summary
+    """
+    with open(os.path.join(createdir, OUTPUT_FILE), 'w+') as oofile:
+        for result in results:
+            if not result.get('log'):
+                continue
+            oofile.write('\n' + 'Output for ' + result['name'] + ': \n\n')
+            with open(os.path.join(createdir, result['log']), 'r') as logfile:
+                oofile.write(logfile.read())
+            oofile.write('-x+x-' * 16)
+
+    statuses = [result['status'] for result in results]
+    summary.update({'seconds': round(time.time() - started, 3),
+                    'succeeded': statuses.count('SUCCESS'),
+                    'failed': len(statuses) - statuses.count('SUCCESS') - \
+                              statuses.count('PENDING'),
+                    'pending': statuses.count('PENDING'),
+                    'targets': results})
+    if RATE_LIMITER.enabled:
+        summary['throttled'] = round(RATE_LIMITER.throttled(), 3)
+    with open(os.path.join(createdir, SUMMARY_FILE), 'w') as summaryfile:
+        json.dump(summary, summaryfile, indent=2)
+
+    return summary
+
+
+class FleetRunner(object):
+    """ Runs command lines in sessions of their own on a bounded pool of threads. The output
+    of every thread is routed to the streams given with its command line. """
+
+    def __init__(self, rdmc, workers=DEFAULT_WORKERS, task=run_line):
+        self.rdmc = rdmc
+        self.workers = workers
+        self.task = task
+
+    def run(self, jobs):
+        """ Runs jobs, yielding their results as they complete
+
+        :param jobs: tuples of a name, a command line and the output and error streams
+        :type jobs: list.
+        :returns: iterator of dictionaries with the name, return code, status and duration
+        """
+        installed = not isinstance(sys.stdout, ThreadStreamRouter)
+        ThreadStreamRouter.install()
+        pool = ThreadPool(max(1, min(self.workers, len(jobs))))
+        try:
+            for result in pool.imap_unordered(self.run_job, jobs):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+            if installed:
+                ThreadStreamRouter.uninstall()
+
+    def run_job(self, job):
+        """ Runs the task of one job in a new session, logging out when it is done
+
+        :param job: name, command line and the output and error streams
+        :type job: tuple.
+        :returns: dictionary with the name, return code, status and duration
+        """
+        name, line, out, err = job
+        started = time.time()
+        returncode = ReturnCodes.MULTIPLE_SERVER_CONFIG_FAIL
+        sys.stdout.register(out)
+        sys.stderr.register(err)
+        session = None
+        try:
+            session = self.rdmc.new_session()
+            TYPEPATH.use(session.app.typepath)
+            session.retcode = ReturnCodes.SUCCESS
+            self.task(session, line)
+            returncode = session.retcode
+        except SystemExit as excp:
+            returncode = excp.code if isinstance(excp.code, int) else session.retcode
+        except Exception as excp:
+            err.write("Unable to run the command: {}\n".format(excp))
+        finally:
+            if session:
+                try:
+                    session.app.logout()
+                except Exception as excp:
+                    LOGGER.info("Unable to log out of %s: %s", name, excp)
+            sys.stdout.unregister()
+            sys.stderr.unregister()
+
+        return {'name': name, 'returncode': returncode,
+                'status': 'SUCCESS' if returncode == ReturnCodes.SUCCESS else 'FAILED',
+                'seconds': round(time.time() - started, 3)}
+
+    def run_logged(self, jobs, createdir, action, suffix=''):
+        """ Runs jobs writing the output of each to a log file of its own in createdir,
+        printing the status of a job when it completes
+
+        :param jobs: tuples of a name and a command line, names are unique
+        :type jobs: list.
+        :param createdir: directory for the log files
+        :type createdir: str.
+        :param action: description of the jobs for the status messages
+        :type action: str.
+        :param suffix: added to the names of the log files
+        :type suffix: str.
+        :returns: list of the results in the order of the jobs
+        """
+        ui = self.rdmc.ui
+        logfiles = dict((name, open(os.path.join(createdir, name + suffix + ".txt"), "w+")) \
+                        for name, _ in jobs)
+        results = dict()
+        try:
+            for result in self.run([(name, line, logfiles[name], logfiles[name]) \
+                                    for name, line in jobs]):
+                name = result['name']
+                results[name] = result
+                result['log'] = name + suffix + ".txt"
+                logfiles[name].close()
+                if result['returncode'] == ReturnCodes.SUCCESS:
+                    ui.printer('{} for {} : SUCCESS ({:.1f}s)\n'.format(action, name, \
+                                                                         result['seconds']))
+                else:
+                    ui.error('{} for {} : FAILED ({:.1f}s)\n'.format(action, name, \
+                                                                     result['seconds']))
+                    ui.error('ILOREST return code : {}.\nFor more details please check {} '
+                             'under {} directory.\n'.format(result['returncode'], \
+                                                             result['log'], createdir))
+        finally:
+            for logfile in logfiles.values():
+                logfile.close()
+
+        return [results[name] for name, _ in jobs]
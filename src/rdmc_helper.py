@@ -25,26 +25,18 @@ import sys
 import time
 import json
 import logging
+import threading
 
 from collections import OrderedDict
 from ctypes import create_string_buffer, c_char_p, byref
 
 import six
-import pyaes
-
-from prompt_toolkit.completion import Completer, Completion
 
 import redfish.ris
 import redfish.hpilo.risblobstore2 as risblobstore2
 
 import versioning
 
-# from rdmc_base_classes import HARDCODEDLIST
-
-if os.name == 'nt':
-    from six.moves import winreg
-    from win32con import HKEY_LOCAL_MACHINE
-
 # ---------End of imports---------
 
 
@@ -624,6 +616,69 @@ class UI(object):
             self.printer(content)
 
 
+class ThreadStreamRouter(object):
+    """ File like object that sends the writes of a thread to the stream registered for it
+    and everything else to the stream it replaced """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def register(self, stream):
+        """ Route the writes of the calling thread to stream
+
+        :param stream: file like object to write to
+        :type stream: file.
+        """
+        self._local.stream = stream
+
+    def unregister(self):
+        """ Send the writes of the calling thread back to the original stream """
+        self._local.stream = None
+
+    def current(self):
+        """ Stream the writes of the calling thread go to """
+        stream = getattr(self._local, 'stream', None)
+        return stream if stream is not None else self.stream
+
+    def write(self, data):
+        """ Write to the stream of the calling thread """
+        return self.current().write(data)
+
+    def flush(self):
+        """ Flush the stream of the calling thread """
+        try:
+            self.current().flush()
+        except (AttributeError, IOError):
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    @staticmethod
+    def install():
+        """ Replace sys.stdout, sys.stderr and the stderr log handler with routers, reusing
+        the routers already installed
+
+        :returns: tuple of the stdout and stderr routers
+        """
+        if not isinstance(sys.stdout, ThreadStreamRouter):
+            sys.stdout = ThreadStreamRouter(sys.stdout)
+        if not isinstance(sys.stderr, ThreadStreamRouter):
+            sys.stderr = ThreadStreamRouter(sys.stderr)
+        LERR.stream = sys.stderr
+        return sys.stdout, sys.stderr
+
+    @staticmethod
+    def uninstall():
+        """ Put the original streams back """
+        if isinstance(sys.stdout, ThreadStreamRouter):
+            sys.stdout = sys.stdout.stream
+        if isinstance(sys.stderr, ThreadStreamRouter):
+            sys.stderr = sys.stderr.stream
+        LERR.stream = sys.stderr
+
+
 class Encryption(object):
     """ Encryption/Decryption object """
 
@@ -636,6 +691,9 @@ class Encryption(object):
         """
         fips = False
         if os.name == 'nt':
+            from six.moves import winreg
+            from win32con import HKEY_LOCAL_MACHINE
+
             reg = winreg.ConnectRegistry(None, HKEY_LOCAL_MACHINE)
             try:
                 reg = winreg.OpenKey(reg, 'System\\CurrentControlSet\\Control\\'
@@ -693,6 +751,7 @@ class Encryption(object):
         if len(key) not in [16, 24, 32]:
             raise InvalidKeyError("")
         else:
+            import pyaes
             encryptedfile = pyaes.AESModeOfOperationCTR(key).encrypt(filetxt)
 
         return encryptedfile
@@ -716,6 +775,7 @@ class Encryption(object):
         if len(key) not in [16, 24, 32]:
             raise InvalidKeyError("")
         else:
+            import pyaes
             decryptedfile = pyaes.AESModeOfOperationCTR(key).decrypt(filetxt)
             try:
                 json.loads(decryptedfile)
@@ -783,119 +843,3 @@ class Encryption(object):
             raise UnableToDecodeError("Unable to decode credential %s." % credential)
 
         return enc_val
-
-
-class TabAndHistoryCompletionClass(Completer):
-    """ Tab and History Class used by interactive mode """
-
-    def __init__(self, options):
-        self.options = options
-        self.toolbar_text = None
-        self.last_complete = None
-
-    def get_completions(self, document, complete_event):
-        """ Function to return the options for autocomplete """
-        word = ""
-        self.toolbar_text = ""
-        lstoption = self.options
-        if document.text:
-            tokens = document.text.split()
-            # We aren't completing options yet
-            tokens = [token for token in tokens if not token.startswith('-')]
-
-            self.last_complete = tokens[-1]
-            nestedtokens = self.last_complete.split('/')
-
-            if not document.text.endswith(" "):
-                tokens.pop()
-                word = document.get_word_under_cursor()
-            else:
-                nestedtokens = []
-            if word == '/':
-                word = ''
-
-            if len(tokens) >= 1:
-                if tokens[0] == 'select':
-                    # only first type
-                    if len(tokens) >= 2:
-                        lstoption = []
-                    else:
-                        lstoption = self.options.get(tokens[0], {})
-                elif tokens[0] in ['get', 'list', 'info', 'set']:
-                    # Match properties
-                    nested_data = self.options.get('nestedprop', {})
-                    nested_info = self.options.get('nestedinfo', {})
-                    for token in nestedtokens:
-                        try:
-                            nested_data = nested_data[token]
-                            if tokens[0] == 'get' and isinstance(nested_data, dict):
-                                for k in list(nested_data.keys()):
-                                    if k.lower() in HARDCODEDLIST or '@odata' in k.lower() or \
-                                            '@redfish.allowablevalues' in k.lower():
-                                        del nested_data[k]
-                            if nested_info:
-                                if 'properties' in nested_info:
-                                    nested_info = nested_info['properties']
-                                if not 'AttributeName' in nested_info[token]:
-                                    nested_info = nested_info['properties'][token] if 'properties' \
-                                                                                      in nested_info else nested_info[
-                                        token]
-                                else:
-                                    nested_info = nested_info[token]
-                        except Exception:
-                            break
-                    nested_data = list(nested_data.keys()) if isinstance(nested_data, dict) else []
-                    lstoption = nested_data
-
-                    # Try to get info for help bar
-                    help_text = nested_info.get('HelpText', '')
-                    enum_tab = []
-                    if 'Type' in nested_info and nested_info['Type'].lower() == "enumeration":
-                        help_text += "\nPossible Values:\n"
-                        for value in nested_info['Value']:
-                            enum_tab.append(value['ValueName'])
-                            help_text += six.u(str(value['ValueName'])) + ' '
-
-                    if not help_text:
-                        try:
-                            nested_info = nested_info['properties']
-                        except KeyError:
-                            pass
-                        help_text = nested_info.get('description', '')
-                        if 'enum' in nested_info:
-                            help_text += "\nPossible Values:\n"
-                            for value in nested_info['enum']:
-                                enum_tab.append(value)
-                                help_text += six.u(str(value)) + ' '
-                    if isinstance(help_text, str):
-                        help_text = help_text.replace('. ', '.\n')
-                    self.toolbar_text = help_text
-                    if tokens[0] in ['set']:
-                        lstoption = self.options.get('set')
-                else:
-                    lstoption = {}
-            else:
-                for token in tokens:
-                    # just match commands
-                    lstoption = self.options.get(token, {})
-
-        for opt in lstoption:
-            if opt == word:
-                self.last_complete = opt
-            if opt.startswith(word):
-                yield Completion(
-                    opt + '',
-                    start_position=-len(word))
-
-    def bottom_toolbar(self):
-        return self.toolbar_text if self.toolbar_text else None
-
-    def updates_tab_completion_lists(self, options):
-        """ Function to update tab completion lists
-        :param options: options list
-        :type options: list.
-        """
-        # Loop through options passed and add them to them
-        # to the current tab options list
-        for key, value in options.items():
-            self.options[key] = value
@@ -0,0 +1,1010 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Mock Redfish server for RDMC. Serves a synthetic iLO 5 resource tree, sized by the number
+of drives, log entries and BIOS attributes asked for, to run commands and benchmarks without
+a server."""
+
+# ---------Imports---------
+
+import os
+import ssl
+import json
+import time
+import base64
+import random
+import hashlib
+import tempfile
+import threading
+import subprocess
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import unquote
+
+from rdmc_helper import LOGGER
+
+# ---------End of imports---------
+
+DEFAULT_PORT = 8443
+MOCK_USERNAME = 'admin'
+MOCK_PASSWORD = 'password'
+MOCK_FIRMWARE = '2.44'
+BIOS_REGISTRY = 'BiosAttributeRegistryU32.v1_2_68'
+AHS_PATH = '/ahsdata/'
+UPLOAD_PATH = '/cgi-bin/uploadFile'
+# states an update walks through before it is complete, and the task queue states
+UPDATE_STATES = ('Verifying', 'Flashing')
+TASK_STATES = ('Pending', 'InProgress', 'Complete')
+
+
+def _link(path):
+    return {'@odata.id': path}
+
+
+def _key(path):
+    """ Lookup key of a resource path, without query, case or trailing slash differences """
+    path = unquote(path.split('?')[0].split('#')[0]).lower()
+    return path if path.endswith('/') else path + '/'
+
+
+def _query(path):
+    """ Query arguments of a request path """
+    if '?' not in path:
+        return dict()
+    return dict((item.split('=', 1) + [''])[:2] for item in path.split('?', 1)[1].split('&') \
+                if item)
+
+
+def _message(messageid, status=200):
+    """ Body of an iLO message response """
+    return {'error': {'code': 'iLO.0.10.ExtendedInfo',
+                      'message': 'See @Message.ExtendedInfo for more information.',
+                      '@Message.ExtendedInfo': [{'MessageId': messageid}]}}, status
+
+
+def pseudo_random_bytes(size, seed=0):
+    """ Deterministic bytes standing in for binary downloads such as AHS data
+
+    :param size: number of bytes
+    :type size: int.
+    :param seed: seed of the sequence
+    :type seed: int.
+    :returns: bytes
+    """
+    blocks = []
+    block = hashlib.sha256(str(seed).encode('ascii')).digest()
+    for _ in range(size // len(block) + 1):
+        block = hashlib.sha256(block).digest()
+        blocks.append(block)
+    return b''.join(blocks)[:size]
+
+
+def multipart_files(body, contenttype):
+    """ Parts of a multipart/form-data body
+
+    :param body: request body
+    :type body: bytes.
+    :param contenttype: Content-Type header of the request
+    :type contenttype: str.
+    :returns: dictionary of part names to (filename, data) tuples
+    """
+    parts = dict()
+    if 'boundary=' not in (contenttype or ''):
+        return parts
+    boundary = b'--' + contenttype.split('boundary=')[-1].strip('"').encode('ascii')
+    for part in body.split(boundary)[1:]:
+        if b'\r\n\r\n' not in part:
+            continue
+        head, data = part.split(b'\r\n\r\n', 1)
+        disposition = dict()
+        for item in head.decode('utf-8', 'replace').split(';'):
+            if '=' in item:
+                name, value = item.strip().split('=', 1)
+                disposition[name.lower()] = value.strip('"')
+        if 'name' in disposition:
+            parts[disposition['name']] = (disposition.get('filename'), data[:-2] if \
+                                          data.endswith(b'\r\n') else data)
+    return parts
+
+
+class MockTree(object):
+    """ Synthetic iLO 5 resource tree. Resources are kept as dictionaries by path with an ETag
+    that changes with them. Reading the update service or the task queue moves pending
+    updates and tasks one state further, so clients polling them see them complete. """
+
+    def __init__(self, drives=8, entries=50, attributes=500, ahssize=1048576, components=3,
+                 updatereads=1, directory=True, seed=0):
+        """
+        :param drives: number of physical drives of the array controller
+        :type drives: int.
+        :param entries: number of entries of the IML and IEL logs
+        :type entries: int.
+        :param attributes: number of BIOS attributes, and of attribute registry entries
+        :type attributes: int.
+        :param ahssize: bytes of the AHS download
+        :type ahssize: int.
+        :param components: number of components in the iLO repository
+        :type components: int.
+        :param updatereads: reads of the update service an update spends in each state
+        :type updatereads: int.
+        :param directory: flag to serve the resource directory, so logins do not crawl
+        :type directory: bool.
+        :param seed: seed of the generated data
+        :type seed: int.
+        """
+        self.lock = threading.RLock()
+        self.resources = dict()
+        self.etags = dict()
+        self.sessions = dict()
+        self.updatereads = updatereads
+        self.update = []
+        self.directory = directory
+        self.ahs = pseudo_random_bytes(ahssize, seed)
+        self.nextid = 1
+        self.build(drives, entries, attributes, components)
+
+    def add(self, path, rtype, body=None, collection=None):
+        """ Adds a resource
+
+        :param path: resource path
+        :type path: str.
+        :param rtype: @odata.type of the resource
+        :type rtype: str.
+        :param body: properties of the resource
+        :type body: dict.
+        :param collection: path of the collection the resource is a member of
+        :type collection: str.
+        :returns: the resource
+        """
+        resource = {'@odata.context': '/redfish/v1/$metadata#%s' % rtype.split('.')[-1],
+                    '@odata.id': path, '@odata.type': rtype,
+                    'Id': path.rstrip('/').split('/')[-1], 'Name': rtype.split('.')[-1]}
+        resource.update(body or {})
+        with self.lock:
+            self.resources[_key(path)] = resource
+            self.touch(path)
+            if collection:
+                members = self.resources[_key(collection)]
+                members['Members'].append(_link(path))
+                members['Members@odata.count'] = len(members['Members'])
+                self.touch(collection)
+        return resource
+
+    def add_collection(self, path, rtype, name):
+        """ Adds an empty collection
+
+        :param path: collection path
+        :type path: str.
+        :param rtype: @odata.type of the collection
+        :type rtype: str.
+        :param name: name of the collection
+        :type name: str.
+        :returns: the collection
+        """
+        return self.add(path, rtype, {'Name': name, 'Members': [], 'Members@odata.count': 0})
+
+    def remove(self, path):
+        """ Removes a resource and its link from the collections
+
+        :param path: resource path
+        :type path: str.
+        :returns: True if the resource existed
+        """
+        key = _key(path)
+        with self.lock:
+            if key not in self.resources:
+                return False
+            del self.resources[key]
+            self.etags.pop(key, None)
+            # members are kept right below their collection
+            collection = self.resources.get(key.rstrip('/').rsplit('/', 1)[0] + '/')
+            if collection and isinstance(collection.get('Members'), list):
+                collection['Members'] = [member for member in collection['Members'] if \
+                                         _key(member.get('@odata.id', '')) != key]
+                collection['Members@odata.count'] = len(collection['Members'])
+                self.touch(collection['@odata.id'])
+        return True
+
+    def touch(self, path):
+        """ Drops the ETag of a resource after it changed, a new one is computed when it is
+        next read
+
+        :param path: resource path
+        :type path: str.
+        """
+        key = _key(path)
+        with self.lock:
+            self.resources[key].pop('@odata.etag', None)
+            self.etags.pop(key, None)
+
+    def build(self, drives, entries, attributes, components):
+        """ Builds the resource tree """
+        base = '/redfish/v1/'
+        self.add(base, '#ServiceRoot.v1_5_1.ServiceRoot', {
+            'Id': 'RootService', 'Name': 'HPE RESTful Root Service', 'RedfishVersion': '1.6.0',
+            'UUID': '00000000-0000-0000-0000-000000000000',
+            'AccountService': _link(base + 'AccountService/'),
+            'Chassis': _link(base + 'Chassis/'), 'JsonSchemas': _link(base + 'JsonSchemas/'),
+            'Managers': _link(base + 'Managers/'), 'Registries': _link(base + 'Registries/'),
+            'SessionService': _link(base + 'SessionService/'),
+            'Systems': _link(base + 'Systems/'), 'UpdateService': _link(base + 'UpdateService/'),
+            'Links': {'Sessions': _link(base + 'SessionService/Sessions/')},
+            'Oem': {'Hpe': {'@odata.type': '#HpeiLOServiceExt.v2_3_0.HpeiLOServiceExt',
+                            'Links': {'ResourceDirectory': _link(base + 'ResourceDirectory/')} \
+                                     if self.directory else {},
+                            'Manager': [{'ManagerType': 'iLO 5',
+                                         'ManagerFirmwareVersion': MOCK_FIRMWARE,
+                                         'HostName': 'mock-ilo', 'FQDN': 'mock-ilo.local'}],
+                            'Moniker': {'PRODGEN': 'iLO 5', 'PRODNAM': 'Integrated Lights-Out',
+                                        'ADVLIC': 'iLO Advanced'},
+                            'Sessions': {'LoginHint': {'Hint': 'POST to /Sessions to login'}},
+                            'System': [{'Status': {'Health': 'OK'}}]}}})
+
+        self.add(base + 'SessionService/', '#SessionService.v1_0_0.SessionService', {
+            'ServiceEnabled': True, 'SessionTimeout': 30,
+            'Sessions': _link(base + 'SessionService/Sessions/')})
+        self.add_collection(base + 'SessionService/Sessions/',
+                            '#SessionCollection.SessionCollection', 'Sessions')
+        self.add(base + 'AccountService/', '#AccountService.v1_3_0.AccountService', {
+            'Accounts': _link(base + 'AccountService/Accounts/'), 'MinPasswordLength': 8})
+        self.add_collection(base + 'AccountService/Accounts/',
+                            '#ManagerAccountCollection.ManagerAccountCollection', 'Accounts')
+        self.add(base + 'AccountService/Accounts/1/', '#ManagerAccount.v1_1_3.ManagerAccount', {
+            'UserName': MOCK_USERNAME, 'RoleId': 'Administrator', 'Password': None,
+            'Oem': {'Hpe': {'LoginName': 'Administrator', 'Privileges': {
+                'HostBIOSConfigPriv': True, 'HostNICConfigPriv': True, 'HostStorageConfigPriv':
+                True, 'LoginPriv': True, 'RemoteConsolePriv': True, 'SystemRecoveryConfigPriv':
+                True, 'UserConfigPriv': True, 'VirtualMediaPriv': True,
+                'VirtualPowerAndResetPriv': True, 'iLOConfigPriv': True}}}},
+                 collection=base + 'AccountService/Accounts/')
+
+        self.build_system(base, drives, entries, attributes)
+        self.build_manager(base, entries)
+        self.build_update_service(base, components)
+        self.build_registries(base, attributes)
+        self.build_schemas(base)
+
+    def build_system(self, base, drives, entries, attributes):
+        """ Builds the computer system with its BIOS, array controller and IML """
+        system = base + 'Systems/1/'
+        self.add_collection(base + 'Systems/', '#ComputerSystemCollection.'
+                            'ComputerSystemCollection', 'Computer Systems')
+        self.add(system, '#ComputerSystem.v1_4_0.ComputerSystem', {
+            'Name': 'Computer System', 'Manufacturer': 'HPE', 'Model': 'ProLiant DL380 Gen10',
+            'SKU': '868703-B21', 'SerialNumber': 'MOCK000001', 'AssetTag': '',
+            'HostName': 'mock-host', 'PowerState': 'On', 'SystemType': 'Physical',
+            'BiosVersion': 'U30 v2.42 (01/23/2021)',
+            'Boot': {'BootSourceOverrideEnabled': 'Disabled',
+                     'BootSourceOverrideTarget': 'None',
+                     'BootSourceOverrideTarget@Redfish.AllowableValues': ['None', 'Pxe', 'Hdd',
+                                                                          'Cd', 'Usb']},
+            'MemorySummary': {'TotalSystemMemoryGiB': 384, 'Status': {'HealthRollup': 'OK'}},
+            'ProcessorSummary': {'Count': 2, 'Model': 'Intel(R) Xeon(R) Gold 6248 CPU',
+                                 'Status': {'HealthRollup': 'OK'}},
+            'Status': {'Health': 'OK', 'State': 'Enabled'},
+            'Bios': _link(system + 'Bios/'), 'LogServices': _link(system + 'LogServices/'),
+            'Actions': {'#ComputerSystem.Reset': {
+                'ResetType@Redfish.AllowableValues': ['On', 'ForceOff', 'GracefulShutdown',
+                                                      'ForceRestart', 'Nmi', 'PushPowerButton'],
+                'target': system + 'Actions/ComputerSystem.Reset/'}},
+            'Oem': {'Hpe': {'@odata.type': '#HpeComputerSystemExt.v2_5_0.HpeComputerSystemExt',
+                            'Links': {'SmartStorage': _link(system + 'SmartStorage/')},
+                            'PostState': 'FinishedPost'}}}, collection=base + 'Systems/')
+
+        attrs = self.bios_attributes(attributes)
+        settings = {'AttributeRegistry': BIOS_REGISTRY, 'Attributes': attrs,
+                    'Name': 'BIOS Current Settings'}
+        bios = dict(settings, **{'@Redfish.Settings': {
+            '@odata.type': '#Settings.v1_0_0.Settings',
+            'SettingsObject': _link(system + 'Bios/Settings/')}})
+        self.add(system + 'Bios/', '#Bios.v1_0_0.Bios', bios)
+        self.add(system + 'Bios/Settings/', '#Bios.v1_0_0.Bios',
+                 dict(settings, Attributes=dict(attrs), Name='BIOS Pending Settings'))
+
+        storage = system + 'SmartStorage/'
+        controller = storage + 'ArrayControllers/0/'
+        self.add(storage, '#HpeSmartStorage.v2_0_0.HpeSmartStorage', {
+            'Links': {'ArrayControllers': _link(storage + 'ArrayControllers/')},
+            'Status': {'Health': 'OK'}})
+        self.add_collection(storage + 'ArrayControllers/', '#HpeSmartStorageArrayController'
+                            'Collection.HpeSmartStorageArrayControllerCollection',
+                            'HpeSmartStorageArrayControllers')
+        self.add(controller, '#HpeSmartStorageArrayController.v2_2_0.'
+                 'HpeSmartStorageArrayController', {
+                     'Location': 'Slot 0', 'LocationFormat': 'PCISlot',
+                     'Model': 'HPE Smart Array P408i-a SR Gen10', 'SerialNumber': 'MOCKCTRL0',
+                     'FirmwareVersion': {'Current': {'VersionString': '2.65'}},
+                     'Status': {'Health': 'OK', 'State': 'Enabled'},
+                     'Links': {'PhysicalDrives': _link(controller + 'DiskDrives/'),
+                               'LogicalDrives': _link(controller + 'LogicalDrives/')}},
+                 collection=storage + 'ArrayControllers/')
+        self.add_collection(controller + 'DiskDrives/', '#HpeSmartStorageDiskDriveCollection.'
+                            'HpeSmartStorageDiskDriveCollection', 'HpeSmartStorageDiskDrives')
+        self.add_collection(controller + 'LogicalDrives/', '#HpeSmartStorageLogicalDrive'
+                            'Collection.HpeSmartStorageLogicalDriveCollection',
+                            'HpeSmartStorageLogicalDrives')
+        for index in range(drives):
+            self.add(controller + 'DiskDrives/%s/' % index, '#HpeSmartStorageDiskDrive.v2_1_0.'
+                     'HpeSmartStorageDiskDrive', {
+                         'Location': '1I:1:%s' % (index + 1), 'LocationFormat':
+                         'ControllerPort:Box:Bay', 'Model': 'EG000600JWJNP',
+                         'SerialNumber': 'MOCK%06d' % index, 'CapacityMiB': 572325,
+                         'BlockSizeBytes': 512, 'MediaType': 'HDD', 'InterfaceType': 'SAS',
+                         'RotationalSpeedRpm': 10000, 'DiskDriveUse': 'Data',
+                         'FirmwareVersion': {'Current': {'VersionString': 'HPD2'}},
+                         'Status': {'Health': 'OK', 'State': 'Enabled'}},
+                     collection=controller + 'DiskDrives/')
+        self.add(system + 'SmartStorageConfig/', '#SmartStorageConfig.v2_0_0.SmartStorageConfig',
+                 {'Location': 'Slot 0', 'LocationFormat': 'PCISlot', 'LogicalDrives': [],
+                  'DataGuard': 'Disabled'})
+
+        self.build_log(system + 'LogServices/', 'IML', 'Integrated Management Log', entries)
+
+    def build_manager(self, base, entries):
+        """ Builds the manager with its IEL and AHS """
+        manager = base + 'Managers/1/'
+        self.add_collection(base + 'Managers/', '#ManagerCollection.ManagerCollection',
+                            'Managers')
+        self.add(manager, '#Manager.v1_5_1.Manager', {
+            'Name': 'Manager', 'ManagerType': 'BMC', 'Model': 'iLO 5',
+            'FirmwareVersion': 'iLO 5 v%s' % MOCK_FIRMWARE,
+            'Status': {'Health': 'OK', 'State': 'Enabled'},
+            'LogServices': _link(manager + 'LogServices/'),
+            'Actions': {'#Manager.Reset': {'target': manager + 'Actions/Manager.Reset/'}},
+            'Oem': {'Hpe': {'@odata.type': '#HpeiLO.v2_7_0.HpeiLO',
+                            'Links': {'ActiveHealthSystem':
+                                      _link(manager + 'ActiveHealthSystem/')},
+                            'Firmware': {'Current': {'VersionString': 'iLO 5 v%s' % \
+                                                     MOCK_FIRMWARE}}}}},
+                 collection=base + 'Managers/')
+        self.add(manager + 'ActiveHealthSystem/', '#HpeiLOActiveHealthSystem.v2_5_0.'
+                 'HpeiLOActiveHealthSystem', {
+                     'AHSEnabled': True, 'AHSFileStart': '2021-01-01T00:00:00Z',
+                     'AHSFileEnd': '2021-12-31T00:00:00Z',
+                     'Actions': {'#HpeiLOActiveHealthSystem.ClearLog': {
+                         'target': manager + 'ActiveHealthSystem/Actions/HpeiLOActiveHealthSystem'
+                                             '.ClearLog/'}},
+                     'Links': {'AHSLocation': {'extref': AHS_PATH + 'ilo.ahs?downloadAll=1'},
+                               'RecentWeek': {'extref': AHS_PATH + 'ilo.ahs?days=7'}}})
+        self.build_log(manager + 'LogServices/', 'IEL', 'iLO Event Log', entries)
+
+    def build_log(self, services, logid, name, entries):
+        """ Builds a log service with its entries """
+        self.add_collection(services, '#LogServiceCollection.LogServiceCollection',
+                            'Log Service Collection')
+        log = services + logid + '/'
+        self.add(log, '#LogService.v1_0_0.LogService', {
+            'Name': name, 'Entries': _link(log + 'Entries/'),
+            'Actions': {'#LogService.ClearLog': {'target': log + 'Actions/LogService.ClearLog/'}}},
+                 collection=services)
+        self.add_collection(log + 'Entries/', '#LogEntryCollection.LogEntryCollection',
+                            name + ' Entries')
+        for index in range(1, entries + 1):
+            stamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(1609459200 + index * 3600))
+            self.add(log + 'Entries/%s/' % index, '#LogEntry.v1_0_0.LogEntry', {
+                'Name': name, 'Created': stamp, 'EntryType': 'Oem', 'OemRecordFormat': 'Hpe-' + \
+                logid, 'Severity': ('OK', 'Warning', 'Critical')[index % 3],
+                'Message': 'Mock %s event %s.' % (logid, index),
+                'Oem': {'Hpe': {'@odata.type': '#HpeLogEntry.v2_1_0.HpeLogEntry', 'Class': 33,
+                                'Code': index, 'Count': 1, 'Updated': stamp,
+                                'EventNumber': index, 'Categories': ['Security']}}},
+                     collection=log + 'Entries/')
+
+    def build_update_service(self, base, components):
+        """ Builds the update service with the repository, task queue and firmware inventory """
+        service = base + 'UpdateService/'
+        self.add(service, '#UpdateService.v1_1_1.UpdateService', {
+            'Name': 'Update Service', 'ServiceEnabled': True, 'HttpPushUri': UPLOAD_PATH,
+            'FirmwareInventory': _link(service + 'FirmwareInventory/'),
+            'Actions': {'#UpdateService.SimpleUpdate': {
+                'target': service + 'Actions/UpdateService.SimpleUpdate/'}},
+            'Oem': {'Hpe': {'@odata.type': '#HpeiLOUpdateServiceExt.v2_1_4.'
+                                           'HpeiLOUpdateServiceExt',
+                            'State': 'Idle', 'FlashProgressPercent': 0,
+                            'ComponentRepository': _link(service + 'ComponentRepository/'),
+                            'UpdateTaskQueue': _link(service + 'UpdateTaskQueue/'),
+                            'InstallSets': _link(service + 'InstallSets/'),
+                            'MaintenanceWindows': _link(service + 'MaintenanceWindows/'),
+                            'Capabilities': {'UpdateFWPKG': True},
+                            'Actions': {'#HpeiLOUpdateServiceExt.AddFromUri': {
+                                'target': service + 'Actions/Oem/Hpe/HpeiLOUpdateServiceExt.'
+                                                    'AddFromUri/'}}}}})
+        self.add_collection(service + 'FirmwareInventory/', '#SoftwareInventoryCollection.'
+                            'SoftwareInventoryCollection', 'Firmware Inventory Collection')
+        for index, (name, version) in enumerate((('iLO 5', MOCK_FIRMWARE),
+                                                 ('System ROM', 'U30 v2.42'),
+                                                 ('Intelligent Platform Abstraction Data',
+                                                  '10.1.0 Build 23'),
+                                                 ('HPE Smart Storage Battery 1 Firmware', '1.1'))):
+            self.add(service + 'FirmwareInventory/%s/' % (index + 1), '#SoftwareInventory.'
+                     'v1_0_0.SoftwareInventory', {'Name': name, 'Version': version,
+                                                  'Updateable': True,
+                                                  'Status': {'Health': 'OK', 'State': 'Enabled'}},
+                     collection=service + 'FirmwareInventory/')
+        self.add_collection(service + 'ComponentRepository/', '#HpeComponentCollection.'
+                            'HpeComponentCollection', 'Component Collection')
+        for index in range(components):
+            self.add_component('mock-component-%s.fwpkg' % (index + 1), 1048576)
+        self.add_collection(service + 'UpdateTaskQueue/', '#HpeComponentUpdateTaskQueue'
+                            'Collection.HpeComponentUpdateTaskQueueCollection',
+                            'Update Task Queue')
+        self.add_collection(service + 'InstallSets/', '#HpeComponentInstallSetCollection.'
+                            'HpeComponentInstallSetCollection', 'Install Sets')
+        self.add_collection(service + 'MaintenanceWindows/', '#HpeMaintenanceWindowCollection.'
+                            'HpeMaintenanceWindowCollection', 'Maintenance Windows')
+
+    def add_component(self, filename, size):
+        """ Adds a component to the iLO repository, replacing one with the same file name
+
+        :param filename: component file name
+        :type filename: str.
+        :param size: component size in bytes
+        :type size: int.
+        """
+        repository = '/redfish/v1/UpdateService/ComponentRepository/'
+        path = repository + hashlib.md5(filename.encode('utf-8')).hexdigest()[:8] + '/'
+        self.remove(path)
+        self.add(path, '#HpeComponent.v1_0_1.HpeComponent', {
+            'Name': filename, 'Filename': filename, 'Filepath': filename, 'SizeBytes': size,
+            'Locked': False,
+            'Version': '1.0.0', 'Criticality': 'Optional', 'Configuration': '',
+            'ComponentUri': '/fwrepo/' + filename, 'Created': '2021-01-01T00:00:00Z',
+            'Updated': '2021-01-01T00:00:00Z'}, collection=repository)
+
+    def build_registries(self, base, attributes):
+        """ Builds the message and BIOS attribute registries """
+        self.add_collection(base + 'Registries/', '#MessageRegistryFileCollection.'
+                            'MessageRegistryFileCollection', 'Registry File Collection')
+        store = base + 'RegistryStore/registries/en/'
+        self.add(base + 'Registries/%s/' % BIOS_REGISTRY, '#MessageRegistryFile.v1_0_0.'
+                 'MessageRegistryFile', {'Registry': BIOS_REGISTRY, 'Languages': ['en'],
+                                         'Location': [{'Language': 'en', 'Uri': store + \
+                                                       BIOS_REGISTRY + '/'}]},
+                 collection=base + 'Registries/')
+        self.add(store + BIOS_REGISTRY + '/', '#AttributeRegistry.v1_1_0.AttributeRegistry', {
+            'Id': BIOS_REGISTRY, 'Language': 'en', 'OwningEntity': 'HPE',
+            'RegistryVersion': '1.2.68', 'RegistryEntries': {
+                'Attributes': self.bios_registry_entries(attributes), 'Dependencies': [],
+                'Menus': []}})
+
+    def build_schemas(self, base):
+        """ Builds a JSON schema for every resource type, inferred from its first resource """
+        self.add_collection(base + 'JsonSchemas/', '#JsonSchemaFileCollection.'
+                            'JsonSchemaFileCollection', 'JSON Schemas')
+        store = base + 'SchemaStore/en/'
+        types = dict()
+        for resource in list(self.resources.values()):
+            types.setdefault(resource['@odata.type'].lstrip('#').rsplit('.', 1)[0], resource)
+        for name, resource in sorted(types.items()):
+            self.add(base + 'JsonSchemas/%s/' % name, '#JsonSchemaFile.v1_0_2.JsonSchemaFile', {
+                'Schema': '#' + name + '.' + name.split('.')[0], 'Languages': ['en'],
+                'Location': [{'Language': 'en', 'Uri': store + name + '.json/'}]},
+                     collection=base + 'JsonSchemas/')
+            self.resources[_key(store + name + '.json/')] = {
+                '$schema': 'http://json-schema.org/draft-04/schema#',
+                'title': '#' + name + '.' + name.split('.')[0], 'type': 'object',
+                'readonly': False, 'properties': self.schema_properties(resource)}
+            self.touch(store + name + '.json/')
+
+    def schema_properties(self, value):
+        """ Schema properties of the values of a resource, properties that are not settings
+        are read only """
+        kinds = {bool: 'boolean', int: 'integer', float: 'number', dict: 'object',
+                 list: 'array', type(None): 'null'}
+        properties = dict()
+        for name, item in value.items():
+            if name.startswith(('@', '#')):
+                continue
+            prop = {'type': kinds.get(type(item), 'string'),
+                    'readonly': name not in ('Attributes', 'AssetTag', 'HostName', 'Boot',
+                                             'BootSourceOverrideEnabled',
+                                             'BootSourceOverrideTarget', 'UserName', 'Password',
+                                             'RoleId')}
+            if isinstance(item, dict) and name != 'Attributes':
+                prop['properties'] = self.schema_properties(item)
+            properties[name] = prop
+        return properties
+
+    @staticmethod
+    def bios_attributes(count):
+        """ Current values of count BIOS attributes """
+        attributes = {'AdminName': '', 'AdminPhone': '', 'BootMode': 'Uefi',
+                      'ServerAssetTag': '', 'WorkloadProfile': 'GeneralPowerEfficientCompute',
+                      'PowerRegulator': 'DynamicPowerSavings', 'ProcHyperthreading': 'Enabled'}
+        for index in range(max(0, count - len(attributes))):
+            attributes['MockAttribute%04d' % index] = \
+                ('Enabled', 10 + index % 90, 'Mock value %s' % index)[index % 3]
+        return attributes
+
+    def bios_registry_entries(self, count):
+        """ Attribute registry entries of the BIOS attributes """
+        entries = []
+        for name, value in sorted(self.bios_attributes(count).items()):
+            entry = {'AttributeName': name, 'DisplayName': name, 'ReadOnly': False,
+                     'HelpText': 'Use this option to configure %s. This is a synthetic attribute '
+                                 'of the mock server, sized like the entries of a real BIOS '
+                                 'attribute registry.' % name,
+                     'Prompt': name, 'GrayOut': False, 'Hidden': False, 'ResetRequired': True}
+            if isinstance(value, int):
+                entry.update({'Type': 'Integer', 'LowerBound': 0, 'UpperBound': 1000,
+                              'ScalarIncrement': 1})
+            elif value in ('Enabled', 'Disabled') or name in ('BootMode', 'WorkloadProfile',
+                                                               'PowerRegulator'):
+                values = {'BootMode': ('Uefi', 'LegacyBios'),
+                          'WorkloadProfile': ('GeneralPowerEfficientCompute',
+                                              'GeneralPeakFrequencyCompute', 'Virtualization-'
+                                              'MaxPerformance', 'Custom'),
+                          'PowerRegulator': ('DynamicPowerSavings', 'StaticLowPower',
+                                             'StaticHighPerf', 'OsControl')}.get(
+                                                 name, ('Enabled', 'Disabled'))
+                entry.update({'Type': 'Enumeration', 'Value': [
+                    {'ValueName': item, 'ValueDisplayName': item} for item in values]})
+            else:
+                entry.update({'Type': 'String', 'MinLength': 0, 'MaxLength': 64})
+            entries.append(entry)
+        return entries
+
+    def get(self, path):
+        """ A resource, with the members of collections expanded when the path asks for it
+
+        :param path: request path
+        :type path: str.
+        :returns: the resource or None if there is none at path
+        """
+        key = _key(path)
+        with self.lock:
+            if key == '/redfish/v1/resourcedirectory/' and self.directory:
+                return self.resource_directory()
+            resource = self.resources.get(key)
+            if resource is None:
+                return None
+            self.etag(key)
+            if _query(path).get('$expand') in ('.', '*') and 'Members' in resource:
+                for member in resource['Members']:
+                    self.etag(member['@odata.id'])
+                resource = dict(resource, Members=[self.resources.get(_key(
+                    member['@odata.id']), member) for member in resource['Members']])
+            # a copy, the resource changes once read and by requests handled meanwhile
+            resource = json.loads(json.dumps(resource))
+            if key == '/redfish/v1/updateservice/':
+                self.advance_update()
+            elif key.startswith('/redfish/v1/updateservice/updatetaskqueue/'):
+                self.advance_tasks()
+            return resource
+
+    def resource_directory(self):
+        """ The resource directory listing every resource with its type and ETag """
+        return {'@odata.id': '/redfish/v1/ResourceDirectory/', 'Id': 'ResourceDirectory',
+                '@odata.type': '#HpeiLOResourceDirectory.v2_0_0.HpeiLOResourceDirectory',
+                'Name': 'Resource Directory',
+                'Instances': [{'@odata.id': resource['@odata.id'],
+                               '@odata.type': resource['@odata.type'],
+                               'ETag': self.etag(key)} \
+                              for key, resource in sorted(self.resources.items()) \
+                              if '@odata.type' in resource and '/sessions/' not in key and \
+                              '/schemastore/' not in key and '/registrystore/' not in key]}
+
+    def etag(self, path):
+        """ ETag of the resource at path
+
+        :param path: request path
+        :type path: str.
+        :returns: str or None
+        """
+        key = _key(path)
+        with self.lock:
+            if key not in self.etags and key in self.resources:
+                resource = self.resources[key]
+                self.etags[key] = resource['@odata.etag'] = 'W/"%s"' % hashlib.md5(json.dumps(
+                    resource, sort_keys=True).encode('utf-8')).hexdigest()[:8].upper()
+            return self.etags.get(key)
+
+    def patch(self, path, body):
+        """ Applies a PATCH
+
+        :param path: request path
+        :type path: str.
+        :param body: properties to change
+        :type body: dict.
+        :returns: tuple of the response body and status
+        """
+        key = _key(path)
+        with self.lock:
+            if key == '/redfish/v1/systems/1/bios/':
+                return _message('iLO.2.14.PropertyNotWritableOrUnknown', 400)
+            resource = self.resources.get(key)
+            if resource is None:
+                return _message('Base.1.4.ResourceMissingAtURI', 404)
+            self.merge(resource, body)
+            self.touch(path)
+        if key == '/redfish/v1/systems/1/bios/settings/':
+            return _message('iLO.2.14.SystemResetRequired')
+        return _message('Base.1.4.Success')
+
+    def merge(self, resource, changes):
+        """ Merges PATCH changes into a resource """
+        for name, value in changes.items():
+            if isinstance(value, dict) and isinstance(resource.get(name), dict):
+                self.merge(resource[name], value)
+            else:
+                resource[name] = value
+
+    def post(self, path, body):
+        """ Applies a POST to a collection or an action
+
+        :param path: request path
+        :type path: str.
+        :param body: request body
+        :type body: dict.
+        :returns: tuple of the response body, status and the path of the created resource
+        """
+        key = _key(path)
+        with self.lock:
+            if key.endswith('/actions/updateservice.simpleupdate/') or \
+                    key.endswith('hpeiloupdateserviceext.addfromuri/'):
+                self.start_update()
+                return _message('Base.1.4.Success') + (None,)
+            if '/actions/' in key:
+                if key.endswith('.clearlog/') and '/logservices/' in key:
+                    entries = self.resources.get(key.split('actions/')[0] + 'entries/')
+                    if entries:
+                        for member in entries['Members']:
+                            self.resources.pop(_key(member['@odata.id']), None)
+                            self.etags.pop(_key(member['@odata.id']), None)
+                        entries.update({'Members': [], 'Members@odata.count': 0})
+                        self.touch(entries['@odata.id'])
+                return _message('Base.1.4.Success') + (None,)
+
+            collection = self.resources.get(key)
+            if collection is None or 'Members' not in collection:
+                return _message('Base.1.4.ActionNotSupported', 405) + (None,)
+            created = collection['@odata.id'] + 'mock%s/' % self.nextid
+            self.nextid += 1
+            rtype = collection['@odata.type'].replace('Collection.', '.v1_0_0.').\
+                replace('Collection', '')
+            body = dict(body or {})
+            if key.endswith('/updatetaskqueue/'):
+                body.setdefault('State', TASK_STATES[0])
+            self.add(created, rtype, body, collection=collection['@odata.id'])
+            return _message('Base.1.4.Created', 201) + (created,)
+
+    def delete(self, path):
+        """ Applies a DELETE
+
+        :param path: request path
+        :type path: str.
+        :returns: tuple of the response body and status
+        """
+        key = _key(path)
+        with self.lock:
+            if '/sessions/' in key:
+                for token, session in list(self.sessions.items()):
+                    if _key(session) == key:
+                        del self.sessions[token]
+            if 'Members' in self.resources.get(key, {}) or key == '/redfish/v1/':
+                return _message('Base.1.4.ActionNotSupported', 405)
+            if not self.remove(path):
+                return _message('Base.1.4.ResourceMissingAtURI', 404)
+        return _message('Base.1.4.Success')
+
+    def start_update(self):
+        """ Starts walking the update service states towards Complete """
+        with self.lock:
+            self.update = [state for state in UPDATE_STATES for _ in range(self.updatereads)]
+            self.set_update_state(self.update[0] if self.update else 'Complete', 0)
+
+    def advance_update(self):
+        """ Moves an update one read further """
+        with self.lock:
+            if not self.update:
+                return
+            self.update.pop(0)
+            total = len(UPDATE_STATES) * self.updatereads
+            self.set_update_state(self.update[0] if self.update else 'Complete',
+                                  100 * (total - len(self.update)) // max(total, 1))
+
+    def set_update_state(self, state, percent):
+        service = self.resources['/redfish/v1/updateservice/']
+        service['Oem']['Hpe']['State'] = state
+        service['Oem']['Hpe']['FlashProgressPercent'] = percent
+        self.touch('/redfish/v1/UpdateService/')
+
+    def advance_tasks(self):
+        """ Moves every task of the update task queue one state further """
+        with self.lock:
+            queue = self.resources['/redfish/v1/updateservice/updatetaskqueue/']
+            for member in queue['Members']:
+                task = self.resources.get(_key(member['@odata.id']))
+                if task and task.get('State') in TASK_STATES[:-1]:
+                    task['State'] = TASK_STATES[TASK_STATES.index(task['State']) + 1]
+                    self.touch(member['@odata.id'])
+
+    def login(self, username, password):
+        """ Creates a session for valid credentials
+
+        :param username: user name
+        :type username: str.
+        :param password: password
+        :type password: str.
+        :returns: tuple of the token and session path, (None, None) for invalid credentials
+        """
+        if (username, password) != (MOCK_USERNAME, MOCK_PASSWORD):
+            return None, None
+        token = base64.b16encode(os.urandom(16)).decode('ascii').lower()
+        with self.lock:
+            path = '/redfish/v1/SessionService/Sessions/%s%s/' % (username, token[:16])
+            self.add(path, '#Session.v1_0_0.Session', {'UserName': username},
+                     collection='/redfish/v1/SessionService/Sessions/')
+            self.sessions[token] = path
+        return token, path
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Handles the requests of one client connection """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.mock.handle(self, 'GET')
+
+    def do_HEAD(self):
+        self.server.mock.handle(self, 'HEAD')
+
+    def do_POST(self):
+        self.server.mock.handle(self, 'POST')
+
+    def do_PATCH(self):
+        self.server.mock.handle(self, 'PATCH')
+
+    def do_PUT(self):
+        self.server.mock.handle(self, 'PUT')
+
+    def do_DELETE(self):
+        self.server.mock.handle(self, 'DELETE')
+
+    def log_message(self, format, *args):
+        LOGGER.debug("Mock server: " + format, *args)
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class MockServer(object):
+    """ Serves a MockTree over HTTPS. Requests need a session or basic authentication except
+    for the service root and the login. Every request can be delayed by a fixed latency and
+    answered with a 503 at a given rate, both applied before the request is handled. """
+
+    def __init__(self, tree=None, host='127.0.0.1', port=DEFAULT_PORT, latency=0.0, errors=0.0,
+                 seed=0, certfile=None, keyfile=None, secure=True):
+        """
+        :param tree: resource tree to serve, a default MockTree if not provided
+        :type tree: MockTree.
+        :param host: address to listen on
+        :type host: str.
+        :param port: port to listen on, 0 for any free port
+        :type port: int.
+        :param latency: seconds added to every request
+        :type latency: float.
+        :param errors: fraction of the requests answered with a 503
+        :type errors: float.
+        :param seed: seed of the requests answered with a 503
+        :type seed: int.
+        :param certfile: TLS certificate, a self signed one is created if not provided
+        :type certfile: str.
+        :param keyfile: TLS private key of certfile
+        :type keyfile: str.
+        :param secure: flag to serve HTTPS, HTTP otherwise
+        :type secure: bool.
+        """
+        self.tree = tree if tree else MockTree()
+        self.latency = latency
+        self.errors = errors
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'unavailable': 0, 'notmodified': 0, 'bytessent': 0,
+                      'bytesreceived': 0, 'uploads': 0}
+        self.secure = secure
+        self.tempdir = None
+        self.thread = None
+
+        self.httpd = _HTTPServer((host, port), _RequestHandler)
+        self.httpd.mock = self
+        if secure:
+            if not certfile:
+                certfile, keyfile = self.self_signed_certificate()
+            try:
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            except AttributeError:
+                context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+            context.load_cert_chain(certfile, keyfile)
+            # the handshake happens in the thread of the connection instead of the listener
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True,
+                                                    do_handshake_on_connect=False)
+
+    def self_signed_certificate(self):
+        """ Creates a self signed certificate for localhost with openssl
+
+        :returns: tuple of the certificate and key file names
+        """
+        self.tempdir = tempfile.mkdtemp(prefix='mockilo')
+        certfile = os.path.join(self.tempdir, 'cert.pem')
+        keyfile = os.path.join(self.tempdir, 'key.pem')
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                                   '-days', '2', '-subj', '/CN=localhost', '-keyout', keyfile,
+                                   '-out', certfile], stdout=devnull, stderr=devnull)
+        return certfile, keyfile
+
+    @property
+    def url(self):
+        """ Base url of the server """
+        host, port = self.httpd.server_address[:2]
+        return '%s://%s:%s' % ('https' if self.secure else 'http', host, port)
+
+    def start(self):
+        """ Serves in a background thread
+
+        :returns: the server
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        """ Serves in the calling thread until stopped """
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """ Stops serving and removes the certificate created for the server """
+        if self.thread:
+            self.httpd.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.httpd.server_close()
+        if self.tempdir:
+            for name in os.listdir(self.tempdir):
+                os.remove(os.path.join(self.tempdir, name))
+            os.rmdir(self.tempdir)
+            self.tempdir = None
+
+    def authorized(self, handler):
+        """ Whether the request of handler carries a valid session or basic authentication """
+        token = handler.headers.get('X-Auth-Token')
+        cookie = handler.headers.get('Cookie') or ''
+        if not token and 'sessionKey=' in cookie:
+            token = cookie.split('sessionKey=')[-1].split(';')[0]
+        if token and token in self.tree.sessions:
+            return True
+        auth = handler.headers.get('Authorization') or ''
+        if auth.startswith('Basic '):
+            try:
+                user, password = base64.b64decode(auth[6:]).decode('utf-8').split(':', 1)
+            except (ValueError, TypeError):
+                return False
+            return (user, password) == (MOCK_USERNAME, MOCK_PASSWORD)
+        return False
+
+    def handle(self, handler, method):
+        """ Answers the request of a handler
+
+        :param handler: request handler of the connection
+        :type handler: BaseHTTPRequestHandler.
+        :param method: HTTP method
+        :type method: str.
+        """
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytesreceived'] += len(body)
+            unavailable = self.errors and self.random.random() < self.errors
+            if unavailable:
+                self.stats['unavailable'] += 1
+
+        headers = {'Content-Type': 'application/json; charset=utf-8'}
+        if unavailable:
+            headers['Retry-After'] = '1'
+            result, status = _message('Base.1.4.ServiceTemporarilyUnavailable', 503)
+        else:
+            result, status = self.respond(handler, method, body, headers)
+
+        if isinstance(result, bytes):
+            data = result
+        else:
+            data = json.dumps(result).encode('utf-8') if result is not None else b''
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        if method != 'HEAD':
+            handler.wfile.write(data)
+        with self.lock:
+            self.stats['bytessent'] += len(data)
+
+    def respond(self, handler, method, body, headers):
+        """ Response to a request
+
+        :returns: tuple of the response body, bytes or a dictionary, and status
+        """
+        path = handler.path
+        key = _key(path)
+        tree = self.tree
+        if method == 'POST' and key == '/redfish/v1/sessionservice/sessions/':
+            try:
+                credentials = json.loads(body.decode('utf-8'))
+            except ValueError:
+                credentials = dict()
+            token, session = tree.login(credentials.get('UserName'), credentials.get('Password'))
+            if not token:
+                return _message('Base.1.4.NoValidSession', 401)
+            headers['X-Auth-Token'] = token
+            host = (handler.headers.get('Host') or 'localhost').rsplit(':', 1)[0]
+            # iLO returns the session location without the port
+            headers['Location'] = 'https://%s%s' % (host, session)
+            return tree.get(session), 201
+
+        if not (method in ('GET', 'HEAD') and key == '/redfish/v1/') and \
+                not self.authorized(handler):
+            return _message('Base.1.4.NoValidSession', 401)
+
+        if method in ('GET', 'HEAD'):
+            if key.startswith(AHS_PATH):
+                headers['Content-Type'] = 'application/octet-stream'
+                return tree.ahs, 200
+            resource = tree.get(path)
+            if resource is None:
+                return _message('Base.1.4.ResourceMissingAtURI', 404)
+            etag = resource.get('@odata.etag')
+            if etag:
+                headers['ETag'] = etag
+                if handler.headers.get('If-None-Match') == etag:
+                    with self.lock:
+                        self.stats['notmodified'] += 1
+                    return None, 304
+            return resource, 200
+
+        if method == 'POST' and key == _key(UPLOAD_PATH):
+            files = multipart_files(body, handler.headers.get('Content-Type'))
+            if 'file' not in files:
+                return _message('Base.1.4.PropertyMissing', 400)
+            filename, data = files['file']
+            tree.add_component(filename or 'upload.bin', len(data))
+            tree.start_update()
+            with self.lock:
+                self.stats['uploads'] += 1
+            return _message('Base.1.4.Success')
+
+        try:
+            payload = json.loads(body.decode('utf-8')) if body else dict()
+        except ValueError:
+            return _message('Base.1.4.MalformedJSON', 400)
+
+        if method in ('PATCH', 'PUT'):
+            return tree.patch(path, payload)
+        elif method == 'POST':
+            result, status, created = tree.post(path, payload)
+            if created:
+                headers['Location'] = created
+            return result, status
+        return tree.delete(path)
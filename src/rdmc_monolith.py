@@ -0,0 +1,504 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Indexed monolith for RDMC. The monolith keeps indexes of its types and of the @odata.id of
+its members as they are added, refreshed and removed, so selecting a type or an instance looks
+up the members it needs instead of going through the whole monolith."""
+
+# ---------Imports---------
+
+import copy
+import bisect
+import threading
+
+from collections import defaultdict
+
+try:
+    from inspect import getfullargspec as getargspec
+except ImportError:
+    from inspect import getargspec
+
+import six
+
+from redfish.ris import RmcApp, NothingSelectedError, InstanceNotFoundError
+from redfish.ris.ris import RisMonolith
+from redfish.ris.utils import navigatejson, warning_handler
+from redfish.ris.validation import Typepathforval
+
+from rdmc_helper import LOGGER
+
+# ---------End of imports---------
+
+
+def normalize_id(path):
+    """ Key of a path or @odata.id in the id indexes, lowercase without the trailing slash
+    so /redfish/v1/Systems/1 and /redfish/v1/systems/1/ are the same resource
+
+    :param path: path or @odata.id
+    :type path: str.
+    :returns: str
+    """
+    return path.split('#')[0].rstrip('/').lower()
+
+
+class TypeIndex(defaultdict):
+    """ typesadded of an IndexedMonolith, the paths of the members of every major type. Type
+    lookups are kept until a type is added or removed. """
+
+    def __init__(self, types=None):
+        """
+        :param types: major types and their paths to start from
+        :type types: dict.
+        """
+        super(TypeIndex, self).__init__(set)
+        self._matches = dict()
+        for key, paths in (types or {}).items():
+            self[key] = paths
+
+    def __setitem__(self, key, paths):
+        if not dict.__contains__(self, key):
+            self._matches.clear()
+        super(TypeIndex, self).__setitem__(key, paths)
+
+    def __delitem__(self, key):
+        super(TypeIndex, self).__delitem__(key)
+        self._matches.clear()
+
+    def pop(self, key, *default):
+        self._matches.clear()
+        return super(TypeIndex, self).pop(key, *default)
+
+    def clear(self):
+        self._matches.clear()
+        super(TypeIndex, self).clear()
+
+    def match(self, query):
+        """ Major types containing query, ignoring case, in the order they were added
+
+        :param query: type or part of a type
+        :type query: str.
+        :returns: tuple of the major types
+        """
+        query = query.lower()
+        if query not in self._matches:
+            self._matches[query] = tuple(key for key in self if key and query in key.lower())
+        return self._matches[query]
+
+
+class IndexedMonolith(RisMonolith):
+    """ Monolith indexing its members by major type and by @odata.id. Looking a type up
+    depends on the number of types and not on the number of members, an @odata.id or an
+    @odata.id prefix on the number of members matching it. """
+
+    def __init__(self, client, typepath, directory_load=True):
+        self._typesadded = TypeIndex()
+        self._paths = dict()
+        self._byid = dict()
+        self._ids = None
+        self._typelists = dict()
+        self._parsed = dict()
+        self._changes = 0
+        super(IndexedMonolith, self).__init__(client, typepath, directory_load=directory_load)
+
+    @property
+    def typesadded(self):
+        """ Paths of the members of every major type """
+        return self._typesadded
+
+    @typesadded.setter
+    def typesadded(self, types):
+        self._typesadded = types if isinstance(types, TypeIndex) else TypeIndex(types)
+        self.changed()
+
+    @property
+    def paths(self):
+        """ Members by path """
+        return self._paths
+
+    @paths.setter
+    def paths(self, paths):
+        self._paths = paths
+        self._byid = dict()
+        self._ids = None
+        self._parsed = dict()
+        self.changed()
+        for path in paths.keys():
+            self._byid.setdefault(normalize_id(path), set()).add(path)
+
+    @property
+    def typelists(self):
+        """ Type lists of RdmcApp.types, dropped whenever a member changes """
+        return self._typelists
+
+    @property
+    def changes(self):
+        """ Number of changes to the members, lists built from the monolith are current as
+        long as it stays the same """
+        return self._changes
+
+    def changed(self):
+        """ Records a change to the members: added, replaced, removed or patched """
+        self._typelists.clear()
+        self._changes += 1
+
+    @RisMonolith.types.setter
+    def types(self, member):
+        """ Adds a member, see RisMonolith.types, and indexes it. A member replaced by one
+        with the same ETag is not counted as a change. """
+        path = member.path
+        self.typesadded[member.maj_type].add(path)
+        patches = []
+        etag = None
+        new = path not in self.paths
+        if not new:
+            patches = self.paths[path].patches
+            etag = self.paths[path].etag
+        self.paths[path] = member
+        self.paths[path].patches.extend([patch for patch in patches])
+        if new or not etag or etag != member.etag:
+            self.changed()
+        if new:
+            key = normalize_id(path)
+            if key not in self._byid and self._ids is not None:
+                bisect.insort(self._ids, key)
+            self._byid.setdefault(key, set()).add(path)
+
+    def removepath(self, path):
+        """ Removes a member, see RisMonolith.removepath, and its index entries
+
+        :param path: path to remove
+        :type path: str
+        """
+        if path in self.paths:
+            key = normalize_id(path)
+            indexed = self._byid.get(key, set())
+            indexed.discard(path)
+            if not indexed:
+                self._byid.pop(key, None)
+                if self._ids is not None:
+                    index = bisect.bisect_left(self._ids, key)
+                    if index < len(self._ids) and self._ids[index] == key:
+                        del self._ids[index]
+            self._parsed.pop(path, None)
+            self.changed()
+        super(IndexedMonolith, self).removepath(path)
+
+    def parses(self, path):
+        """ Whether the response of a member has a body, parsed once for every member added
+
+        :param path: path of the member
+        :type path: str.
+        :returns: bool
+        """
+        member = self.paths[path]
+        if self._parsed.get(path) is not member:
+            try:
+                if not member.dict:
+                    return False
+            except AttributeError:
+                return False
+            self._parsed[path] = member
+        return True
+
+    def gettypename(self, types):
+        """ Major types matching types, see RisMonolith.gettypename """
+        types = types[1:] if types[0] in ("#", "#") else types
+        return iter(self.typesadded.match(types))
+
+    def typed_paths(self, typeval, within=None):
+        """ Paths of the members of the major types containing typeval
+
+        :param typeval: type or part of a type
+        :type typeval: str.
+        :param within: paths to limit the members to
+        :type within: set.
+        :returns: set of paths
+        """
+        paths = set()
+        for typename in self.typesadded.match(typeval):
+            typed = self.typesadded[typename]
+            paths.update(typed if within is None else [path for path in within if path in typed])
+        return paths
+
+    def paths_by_id(self, odataid, prefix=False):
+        """ Paths of the members with an @odata.id, or starting with it, ignoring case and
+        trailing slashes
+
+        :param odataid: @odata.id or its start
+        :type odataid: str.
+        :param prefix: flag to match every @odata.id starting with odataid
+        :type prefix: bool.
+        :returns: set of paths
+        """
+        key = normalize_id(odataid)
+        if not prefix:
+            return set(self._byid.get(key, ()))
+        if self._ids is None:
+            self._ids = sorted(self._byid)
+        paths = set()
+        index = bisect.bisect_left(self._ids, key)
+        while index < len(self._ids) and self._ids[index].startswith(key):
+            paths.update(self._byid[self._ids[index]])
+            index += 1
+        return paths
+
+
+class SessionTypepath(threading.local):
+    """ Typepath read by the validation of the redfish library, Typepathforval.typepath. The
+    library keeps one typepath per process and replaces it with the one of every new RmcApp, so
+    sessions running in other threads would validate with the types and paths of another server.
+    Each thread reads the typepath of the session it runs a command for instead, or the typepath
+    of the first app if it does not run one. """
+    default = None
+
+    def use(self, typepath):
+        """ Validates with typepath in the current thread
+
+        :param typepath: typepath of the session
+        :type typepath: Typesandpathdefines.
+        """
+        self.current = typepath
+        if Typepathforval.typepath is not self:
+            # registered again after a plain RmcApp replaced it
+            Typepathforval(self)
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__.get('current') or SessionTypepath.default, name)
+
+
+TYPEPATH = SessionTypepath()
+
+#: arguments RmcApp.loadset takes, libraries validating with the latest schema have no latestschema
+LOADSET_ARGS = getargspec(RmcApp.loadset).args
+
+
+class RdmcApp(RmcApp):
+    """ RmcApp building indexed monoliths and selecting through their indexes """
+
+    def __init__(self, showwarnings=False, cache_dir=None):
+        self._initialized = False
+        self._loadwithin = None
+        super(RdmcApp, self).__init__(showwarnings=showwarnings, cache_dir=cache_dir)
+        self._initialized = True
+        if SessionTypepath.default is None:
+            SessionTypepath.default = self.typepath
+
+    @property
+    def typepath(self):
+        """ Types and paths of the server. RmcApp.__init__ registers it for the validation of
+        the process, the session typepath is registered in its place so creating an app does not
+        change the typepath sessions in other threads validate with. """
+        return self._typepath if self._initialized else TYPEPATH
+
+    @typepath.setter
+    def typepath(self, typepath):
+        self._typepath = typepath
+
+    def _build_monolith(self, path=None, includelogs=False, skipbuild=False, json_out=False):
+        """ Runs through the RIS tree to build an indexed monolith, see RmcApp._build_monolith """
+        self.monolith = IndexedMonolith(self.current_client, self.typepath)
+        if not skipbuild:
+            self.monolith.load(path=path, includelogs=includelogs, init=True, json_out=json_out)
+        else:
+            self.monolith.update_member(resp=self.current_client.root,
+                                        path=self.current_client.default_prefix, init=False)
+
+    def loadset(self, seldict=None, fltrvals=(None, None), diffonly=False, latestschema=False,
+                uniqueoverride=False, selector=None):
+        """ Creates patches for the selected instances, see RmcApp.loadset. The latestschema flag
+        is only passed on to libraries that still take it. Only the instance with the @odata.id of
+        seldict and its settings are patched, so only they are selected.
+
+        :param latestschema: flag to validate with the latest schema
+        :type latestschema: boolean.
+        """
+        kwargs = dict(seldict=seldict, fltrvals=fltrvals, diffonly=diffonly,
+                      uniqueoverride=uniqueoverride, selector=selector)
+        if 'latestschema' in LOADSET_ARGS:
+            kwargs['latestschema'] = latestschema
+        if isinstance(self.monolith, IndexedMonolith) and not fltrvals[0] and \
+                isinstance(seldict, dict) and seldict.get('@odata.id'):
+            odataid = normalize_id(seldict['@odata.id'])
+            self._loadwithin = self.monolith.paths_by_id(odataid) | \
+                               self.monolith.paths_by_id(odataid + '/settings')
+        try:
+            return super(RdmcApp, self).loadset(**kwargs)
+        finally:
+            self._loadwithin = None
+            if isinstance(self.monolith, IndexedMonolith):
+                self.monolith.changed()
+
+    def _modifiedpath(self, results, delete=False, replace=False):
+        """ Marks the path of a response modified, see RmcApp._modifiedpath. Replacing a path
+        drops its patches, so it counts as a change of the monolith. """
+        super(RdmcApp, self)._modifiedpath(results, delete=delete, replace=replace)
+        if isinstance(self.monolith, IndexedMonolith):
+            self.monolith.changed()
+
+    def types(self, fulltypes=False):
+        """ Types available to select, see RmcApp.types. Kept until a member changes. """
+        monolith = self.monolith
+        if not isinstance(monolith, IndexedMonolith):
+            return super(RdmcApp, self).types(fulltypes)
+        key = bool(fulltypes)
+        if key not in monolith.typelists:
+            monolith.typelists[key] = super(RdmcApp, self).types(fulltypes)
+        return list(monolith.typelists[key])
+
+    def select(self, selector=None, fltrvals=(None, None), path_refresh=False):
+        """ Selects instances, see RmcApp.select. Filtering on the @odata.id only goes
+        through the instances with a matching @odata.id. """
+        monolith = self.monolith
+        within, self._loadwithin = self._loadwithin, None
+        if within and not fltrvals[0] and (selector or self.selector):
+            # loadset without a filter, falls back to every instance when none is within
+            selector = self.typepath.modifyselectorforgen(selector or self.selector)
+            instances = self._getinstances(selector=selector, path_refresh=path_refresh,
+                                           within=within)
+            if instances:
+                self.selector = selector
+                self.save()
+                return instances
+        if not isinstance(monolith, IndexedMonolith) or not fltrvals[0] or \
+                not isinstance(fltrvals[1], six.string_types) or \
+                fltrvals[0].lower() != self.typepath.defs.hrefstring.lower():
+            return super(RdmcApp, self).select(selector=selector, fltrvals=fltrvals,
+                                               path_refresh=path_refresh)
+        if not selector:
+            selector = self.selector
+        if not selector:
+            raise NothingSelectedError()
+        selector = self.typepath.modifyselectorforgen(selector)
+        val = fltrvals[1].strip("'\"")
+        within = monolith.paths_by_id(val[:-1] if val.endswith("*") else val,
+                                      prefix=val.endswith("*"))
+        instances = self._getinstances(selector=selector, path_refresh=path_refresh,
+                                       within=within)
+        instances = [inst for inst in instances if navigatejson(
+            fltrvals[0].split("/"), copy.deepcopy(inst.dict), val)]
+        if any(instances):
+            self.selector = selector
+            self.save()
+            return instances
+
+        raise InstanceNotFoundError("Unable to locate instance for '{0}' and filter "
+                                    "'{1}={2}'".format(selector, fltrvals[0], fltrvals[1]))
+
+    def _getinstances(self, selector=None, path_refresh=False, crawl=False, within=None):
+        """ Instances of a type, see RmcApp._getinstances. The instances are read from the type
+        index, their responses are only parsed when they are refreshed.
+
+        :param within: paths to limit the instances to
+        :type within: set.
+        """
+        monolith = self.monolith
+        if not isinstance(monolith, IndexedMonolith):
+            return super(RdmcApp, self)._getinstances(selector=selector,
+                                                      path_refresh=path_refresh, crawl=crawl)
+        selector = self.selector if not selector else selector
+        if not selector:
+            return []
+        selector = ".".join(selector.split("#")[-1].split(".")[:2])
+        self._updatemono(currtype=selector, crawl=crawl, path_refresh=path_refresh,
+                         within=within)
+        marker = "redfish" if self.redfishinst.is_redfish else "rest"
+        if selector == '"*"':
+            instances = [monolith.paths[path] for path in monolith.paths.keys() if \
+                         within is None or path in within]
+            instances = [inst for inst in instances if inst.maj_type not in ["object", "string"]]
+        else:
+            # gettypename first, a partial monolith adds the instances of the type
+            typenames = [typename for typename in monolith.gettypename(selector) if \
+                         typename not in ["object", "string"]]
+            instances = [monolith.paths[path] for typename in typenames for path in \
+                         (monolith.typesadded[typename] if within is None else
+                          [path for path in within if path in monolith.typesadded[typename]])
+                         if path in monolith.paths]
+        instances = [inst for inst in instances if marker in inst.path]
+        _ = [setattr(inst, "patches", []) for inst in instances if path_refresh]
+        return instances
+
+    def _updatemono(self, currtype=None, path=None, crawl=False, path_refresh=False,
+                    within=None):
+        """ Refreshes the members of a type or a path that are missing or modified, see
+        RmcApp._updatemono. The members of the type are found through the type index.
+
+        :param within: paths to limit the members of the type to
+        :type within: set.
+        """
+        monolith = self.monolith
+        if not currtype or currtype == '"*"' or not isinstance(monolith, IndexedMonolith):
+            return super(RdmcApp, self)._updatemono(currtype=currtype, path=path, crawl=crawl,
+                                                    path_refresh=path_refresh)
+        paths = set()
+        for path in monolith.typed_paths(currtype, within):
+            if path not in monolith.paths:
+                continue
+            resp = monolith.paths[path]
+            if path_refresh or not resp:
+                paths.add(path)
+            if resp and not monolith.parses(path):
+                paths.add(path)
+            if resp.modified:
+                paths.add(path)
+                paths.update(monolith.checkmodified(path) if path in monolith.ctree else set())
+        if paths:
+            self._checkforchange(list(paths), crawl=crawl)
+
+    def _verifyschemasdownloaded(self, monolith):
+        """ Whether the schemas and registries are downloaded, see
+        RmcApp._verifyschemasdownloaded. They are looked up in the @odata.id index.
+
+        :param monolith: full data model retrieved from server.
+        :type monolith: dict.
+        """
+        if not isinstance(monolith, IndexedMonolith):
+            return super(RdmcApp, self)._verifyschemasdownloaded(monolith)
+        schemaid = self.typepath.schemapath
+        regid = self.typepath.regpath
+
+        if not (schemaid and regid):
+            warning_handler("Missing Schemas or registries.")
+            return None
+
+        for path, colltype in ((schemaid, self.typepath.defs.schemafilecollectiontype),
+                               (regid, self.typepath.defs.regfilecollectiontype)):
+            coll = next(monolith.gettypename(colltype), None)
+            if not coll or any(paths.lower() == path and monolith.paths[paths] for paths in
+                               monolith.typesadded[coll]):
+                self.download_path([path], crawl=False)
+
+        wanted = (schemaid.lower(), regid.lower())
+        return any(path.lower() in wanted and monolith.paths[path] for path in
+                   monolith.paths_by_id(schemaid) | monolith.paths_by_id(regid))
+
+    def _checkforchange(self, paths, crawl=True):
+        """ Reloads paths and drops the patches of the ones that changed on the server, see
+        RmcApp._checkforchange. Only the ETags of the paths are compared. """
+        mono = self.monolith
+        if not isinstance(mono, IndexedMonolith):
+            return super(RdmcApp, self)._checkforchange(paths, crawl=crawl)
+        pathtoetag = dict((path, mono.paths[path].etag) for path in paths if path in mono.paths)
+        self.download_path(list(paths), crawl=crawl, path_refresh=True)
+        etags = [None if path not in mono.paths else mono.paths[path].etag for path in paths]
+        sametag = [path for ind, path in enumerate(paths) if path in pathtoetag and
+                   path in mono.paths and pathtoetag[path] != etags[ind]]
+        for path in sametag:
+            mono.paths[path].patches = []
+        if sametag:
+            LOGGER.warning("The data in the following paths have been updated. Recheck the "
+                           "changes made to . %s", ",".join([str(path) for path in sametag]))
@@ -0,0 +1,165 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Startup profiler for RDMC. Must stay free of third party imports so it can be
+enabled before anything else is loaded."""
+
+# ---------Imports---------
+
+import sys
+import json
+import time
+
+from contextlib import contextmanager
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+# ---------End of imports---------
+
+PROFILE_FLAG = '--profile-startup'
+
+
+class StartupProfiler(object):
+    """Records wall time for imports, extension loads, command loading and the
+    other stages of an ilorest start."""
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.started = None
+        self._stack = []
+        self._import = None
+
+    @staticmethod
+    def requested(argv):
+        """Check the raw argument list for the profile flag
+
+        :param argv: command line arguments
+        :type argv: list.
+        :returns: True if the profiler was requested
+        """
+        return any(arg == PROFILE_FLAG or arg.startswith(PROFILE_FLAG + '=') for arg in argv)
+
+    def start(self):
+        """Start recording and time every module imported from here on"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.time()
+        self._import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        """Stop timing imports"""
+        if self._import:
+            builtins.__import__ = self._import
+            self._import = None
+
+    def record(self, category, name, elapsed, inclusive=None):
+        """Add a timing record
+
+        :param category: stage the record belongs to (import, extension, config...)
+        :type category: str.
+        :param name: name of the timed item
+        :type name: str.
+        :param elapsed: seconds spent in the item itself
+        :type elapsed: float.
+        :param inclusive: seconds including nested items, defaults to elapsed
+        :type inclusive: float.
+        """
+        if self.enabled:
+            self.records.append({'category': category, 'name': name, 'self': elapsed,
+                                 'inclusive': elapsed if inclusive is None else inclusive})
+
+    @contextmanager
+    def timed(self, category, name):
+        """Context manager recording the wall time of the enclosed block
+
+        :param category: stage the record belongs to
+        :type category: str.
+        :param name: name of the timed item
+        :type name: str.
+        """
+        if not self.enabled:
+            yield
+            return
+        self._stack.append(0.0)
+        start = time.time()
+        try:
+            yield
+        finally:
+            inclusive = time.time() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += inclusive
+            self.record(category, name, inclusive - children, inclusive)
+
+    def _timed_import(self, name, globs=None, locs=None, fromlist=(), level=0):
+        """__import__ replacement that times modules which are not loaded yet"""
+        fullname = name
+        if level and globs:
+            package = globs.get('__package__') or globs.get('__name__', '')
+            package = package.rsplit('.', level - 1)[0] if level > 1 else package
+            fullname = '%s.%s' % (package, name) if name else package
+        if fullname in sys.modules:
+            return self._import(name, globs, locs, fromlist, level)
+        with self.timed('import', fullname):
+            return self._import(name, globs, locs, fromlist, level)
+
+    def summary(self):
+        """Totals per category and the overall elapsed time
+
+        :returns: dictionary of category totals
+        """
+        totals = dict()
+        for item in self.records:
+            totals[item['category']] = totals.get(item['category'], 0.0) + item['self']
+        totals['total'] = (time.time() - self.started) if self.started else 0.0
+        return totals
+
+    def report(self, filename=None, limit=40, out=None):
+        """Print a sorted table of the slowest items or write all records as JSON
+
+        :param filename: JSON output file, print a table to stderr if not provided
+        :type filename: str.
+        :param limit: number of rows to print in the table
+        :type limit: int.
+        :param out: stream to print the table to
+        :type out: file.
+        """
+        self.stop()
+        if filename:
+            with open(filename, 'w') as outfile:
+                json.dump({'summary': self.summary(), 'records': self.records}, outfile, indent=2)
+            return
+
+        out = out if out else sys.stderr
+        rows = sorted(self.records, key=lambda item: item['inclusive'], reverse=True)[:limit]
+        out.write("\n%-12s %10s %10s  %s\n" % ('CATEGORY', 'SELF ms', 'TOTAL ms', 'NAME'))
+        for item in rows:
+            out.write("%-12s %10.1f %10.1f  %s\n" % (item['category'], item['self'] * 1000,
+                                                     item['inclusive'] * 1000, item['name']))
+        out.write("\n")
+        for category, value in sorted(self.summary().items(), key=lambda item: item[1],
+                                      reverse=True):
+            out.write("%-12s %10.1f ms\n" % (category, value * 1000))
+
+
+PROFILER = StartupProfiler()
@@ -0,0 +1,219 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""HTTP request tracer for RDMC. Records every request sent to a server with its latency split
+into connecting, waiting for the first byte and reading the response."""
+
+# ---------Imports---------
+
+import sys
+import json
+import math
+import time
+import threading
+
+from contextlib import contextmanager
+
+import urllib3.connection
+
+# ---------End of imports---------
+
+
+def percentile(values, fraction):
+    """ Value below which fraction of the sorted values fall, nearest rank
+
+    :param values: sorted values
+    :type values: list.
+    :param fraction: between 0 and 1
+    :type fraction: float.
+    :returns: float
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(math.ceil(fraction * len(values))) - 1))]
+
+
+class HttpTracer(object):
+    """ Transport layer recording every request: the command sending it, method, path,
+    status, bytes received and the connect, time to first byte and read latencies.
+    The latencies come from timing the connection and header parsing of urllib3 in the
+    thread sending the request. """
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = []
+
+    def start(self):
+        """ Start recording, hooking the connect and getresponse calls of urllib3 """
+        if self.enabled:
+            return
+        self.enabled = True
+        local = self._local
+        for cls in (urllib3.connection.HTTPConnection, urllib3.connection.HTTPSConnection):
+            if 'connect' in cls.__dict__:
+                connect = cls.__dict__['connect']
+                self._originals.append((cls, 'connect', connect))
+
+                def timed_connect(conn, _connect=connect):
+                    started = time.time()
+                    try:
+                        return _connect(conn)
+                    finally:
+                        local.connect = getattr(local, 'connect', 0.0) + time.time() - started
+                cls.connect = timed_connect
+        getresponse = urllib3.connection.HTTPConnection.getresponse
+        self._originals.append((urllib3.connection.HTTPConnection, 'getresponse', getresponse))
+
+        def timed_getresponse(conn, *args, **kwargs):
+            try:
+                return getresponse(conn, *args, **kwargs)
+            finally:
+                local.firstbyte = time.time()
+        urllib3.connection.HTTPConnection.getresponse = timed_getresponse
+
+    def stop(self):
+        """ Stop recording and remove the hooks """
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals = []
+        self.enabled = False
+
+    @contextmanager
+    def command(self, name):
+        """ Context manager attributing the requests of the calling thread to a command
+
+        :param name: command name
+        :type name: str.
+        """
+        previous = getattr(self._local, 'command', None)
+        self._local.command = name
+        try:
+            yield
+        finally:
+            self._local.command = previous
+
+    def request(self, send, connection, path, method, args, body, headers):
+        """ Transport layer entry, see Transport """
+        local = self._local
+        local.connect = 0.0
+        local.firstbyte = None
+        started = time.time()
+        status = error = None
+        size = 0
+        try:
+            response = send(connection, path, method, args, body, headers)
+            status = getattr(response, 'status', None)
+            data = getattr(response, 'ori', None)
+            size = len(data) if data else 0
+            return response
+        except Exception as excp:
+            error = excp.__class__.__name__
+            raise
+        finally:
+            ended = time.time()
+            connect = local.connect
+            firstbyte = local.firstbyte or ended
+            record = {'command': getattr(local, 'command', None), 'method': method,
+                      'host': connection.base_url, 'path': path, 'status': status or error,
+                      'bytes': size, 'connect': round(connect, 6),
+                      'ttfb': round(max(0.0, firstbyte - started - connect), 6),
+                      'read': round(max(0.0, ended - firstbyte), 6),
+                      'seconds': round(ended - started, 6), 'started': started}
+            with self.lock:
+                self.records.append(record)
+
+    def summary(self, slowest=10):
+        """ Totals of the recorded requests
+
+        :param slowest: number of the slowest requests to list
+        :type slowest: int.
+        :returns: dictionary of the totals, percentiles, commands, slowest and duplicate paths
+        """
+        with self.lock:
+            records = list(self.records)
+        latencies = sorted(record['seconds'] for record in records)
+        commands = dict()
+        fetches = dict()
+        statuses = dict()
+        for record in records:
+            command = commands.setdefault(record['command'] or '-', {'requests': 0, 'bytes': 0,
+                                                                    'seconds': 0.0})
+            command['requests'] += 1
+            command['bytes'] += record['bytes']
+            command['seconds'] += record['seconds']
+            statuses[str(record['status'])] = statuses.get(str(record['status']), 0) + 1
+            if record['method'] == 'GET':
+                key = record['host'] + record['path']
+                fetches[key] = fetches.get(key, 0) + 1
+
+        return {'requests': len(records),
+                'bytes': sum(record['bytes'] for record in records),
+                'seconds': round(sum(latencies), 6),
+                'connect': round(sum(record['connect'] for record in records), 6),
+                'ttfb': round(sum(record['ttfb'] for record in records), 6),
+                'read': round(sum(record['read'] for record in records), 6),
+                'p50': percentile(latencies, 0.5), 'p95': percentile(latencies, 0.95),
+                'statuses': statuses, 'commands': commands,
+                'slowest': [dict((key, record[key]) for key in ('method', 'path', 'status',
+                                                                'seconds')) \
+                            for record in sorted(records, key=lambda item: item['seconds'],
+                                                 reverse=True)[:slowest]],
+                'duplicates': dict((key, count) for key, count in fetches.items() if count > 1)}
+
+    def report(self, filename=None, out=None):
+        """ Print the summary or write it as JSON with all records
+
+        :param filename: JSON output file, print to stderr if not provided
+        :type filename: str.
+        :param out: stream to print the summary to
+        :type out: file.
+        """
+        self.stop()
+        summary = self.summary()
+        if filename:
+            with open(filename, 'w') as outfile:
+                json.dump({'summary': summary, 'records': self.records}, outfile, indent=2)
+            return
+
+        out = out if out else sys.stderr
+        out.write("\nHTTP: %s requests, %.1f KiB, %.3fs (connect %.3fs, first byte %.3fs, "
+                  "read %.3fs), p50 %.1f ms, p95 %.1f ms\n" % (
+                      summary['requests'], summary['bytes'] / 1024.0, summary['seconds'],
+                      summary['connect'], summary['ttfb'], summary['read'],
+                      summary['p50'] * 1000, summary['p95'] * 1000))
+        out.write("\n%-20s %8s %10s %10s\n" % ('COMMAND', 'REQUESTS', 'KiB', 'SECONDS'))
+        for name, command in sorted(summary['commands'].items(),
+                                    key=lambda item: item[1]['seconds'], reverse=True):
+            out.write("%-20s %8s %10.1f %10.3f\n" % (name, command['requests'],
+                                                    command['bytes'] / 1024.0,
+                                                    command['seconds']))
+        out.write("\n%10s %6s  %s\n" % ('SLOWEST ms', 'STATUS', 'REQUEST'))
+        for record in summary['slowest']:
+            out.write("%10.1f %6s  %s %s\n" % (record['seconds'] * 1000, record['status'],
+                                               record['method'], record['path']))
+        if summary['duplicates']:
+            out.write("\n%10s  %s\n" % ('FETCHES', 'DUPLICATE GET'))
+            for path, count in sorted(summary['duplicates'].items(), key=lambda item: item[1],
+                                      reverse=True):
+                out.write("%10s  %s\n" % (count, path))
+        out.write("\n")
+
+
+HTTP_TRACER = HttpTracer()
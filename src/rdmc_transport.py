@@ -0,0 +1,367 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Transport layers for RDMC. Every HTTP request of the redfish library, from any session or
+thread of the process, passes through the layers installed here before it is sent."""
+
+# ---------Imports---------
+
+import os
+import json
+import math
+import time
+import threading
+import functools
+
+from redfish.rest.connections import HttpConnection
+from redfish.rest.containers import StaticRestResponse
+
+from rdmc_helper import LOGGER
+from rdmc_cache import atomic_write
+
+# ---------End of imports---------
+
+try:
+    _clock = time.monotonic
+except AttributeError:
+    _clock = time.time
+
+ETAG_FILE = 'etags.json'
+
+
+class Transport(object):
+    """ Chain of layers wrapped around HttpConnection.rest_request. A layer is an object with a
+    request(send, connection, path, method, args, body, headers) method that calls send with
+    the same arguments to pass the request on, or returns a response of its own. """
+
+    def __init__(self):
+        self.layers = []
+        self._send = None
+
+    def add(self, layer):
+        """ Adds a layer, the first layer added is the outermost one
+
+        :param layer: layer to add
+        :type layer: object.
+        """
+        if layer not in self.layers:
+            self.layers.append(layer)
+        self.install()
+
+    def remove(self, layer):
+        """ Removes a layer, the library is restored once no layer is left
+
+        :param layer: layer to remove
+        :type layer: object.
+        """
+        if layer in self.layers:
+            self.layers.remove(layer)
+        if not self.layers:
+            self.uninstall()
+
+    def install(self):
+        """ Routes the requests of all HTTP connections through the layers """
+        if self._send is None:
+            self._send = HttpConnection.rest_request
+            transport = self
+
+            def rest_request(connection, path, method="GET", args=None, body=None, headers=None):
+                return transport.request(connection, path, method, args, body, headers)
+
+            HttpConnection.rest_request = rest_request
+
+    def uninstall(self):
+        """ Restores the request function of the library """
+        if self._send is not None:
+            HttpConnection.rest_request = self._send
+            self._send = None
+
+    def request(self, connection, path, method="GET", args=None, body=None, headers=None):
+        """ Passes a request through the layers down to the library
+
+        :param connection: connection sending the request
+        :type connection: HttpConnection.
+        :returns: the response
+        """
+        send = self._send
+        for layer in reversed(self.layers):
+            send = functools.partial(layer.request, send)
+        return send(connection, path, method, args, body, headers)
+
+
+class TokenBucket(object):
+    """ Token bucket refilled at rate tokens a second up to burst tokens. Tokens are reserved
+    ahead, a reservation beyond the tokens available tells how long to wait for it. """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.stamp = _clock()
+
+    def reserve(self, now):
+        """ Takes a token
+
+        :param now: current time of the clock
+        :type now: float.
+        :returns: seconds to wait before the token is available
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def drain(self, now):
+        """ Empties the bucket, the requests that follow are spaced by the rate
+
+        :param now: current time of the clock
+        :type now: float.
+        """
+        self.reserve(now)
+        self.tokens = min(self.tokens + 1, 0.0)
+
+
+class RateLimiter(object):
+    """ Transport layer limiting the requests a second sent to every host, and to all hosts
+    together, with token buckets. Requests over budget wait for their turn, the time spent
+    waiting is counted per host. A 503 response empties the bucket of its host. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hostrate = self.hostburst = self.globalrate = self.globalburst = 0
+        self.hosts = dict()
+        self.globalbucket = None
+        self.stats = dict()
+
+    @property
+    def enabled(self):
+        """ True when a per host or global rate is set """
+        return bool(self.hostrate or self.globalrate)
+
+    def configure(self, hostrate=0, hostburst=0, globalrate=0, globalburst=0):
+        """ Sets the budgets, a rate of 0 has no limit. The burst is the number of requests
+        sent without waiting after an idle period, the rate rounded up when not provided.
+
+        :param hostrate: requests a second to a host
+        :type hostrate: float.
+        :param hostburst: burst of requests to a host
+        :type hostburst: float.
+        :param globalrate: requests a second to all hosts together
+        :type globalrate: float.
+        :param globalburst: burst of requests to all hosts together
+        :type globalburst: float.
+        """
+        if min(hostrate, hostburst, globalrate, globalburst) < 0:
+            raise ValueError("Request rates and bursts can not be negative.")
+        with self.lock:
+            self.hostrate, self.globalrate = hostrate, globalrate
+            self.hostburst = hostburst or math.ceil(hostrate)
+            self.globalburst = globalburst or math.ceil(globalrate)
+            self.hosts = dict()
+            self.globalbucket = TokenBucket(globalrate, self.globalburst) if globalrate else None
+
+    def acquire(self, host):
+        """ Waits until a request to host is within the budgets
+
+        :param host: base url of the host
+        :type host: str.
+        :returns: seconds waited
+        """
+        with self.lock:
+            now = _clock()
+            wait = 0.0
+            if self.hostrate:
+                if host not in self.hosts:
+                    self.hosts[host] = TokenBucket(self.hostrate, self.hostburst)
+                wait = self.hosts[host].reserve(now)
+            if self.globalbucket:
+                wait = max(wait, self.globalbucket.reserve(now))
+            stats = self.stats.setdefault(host, {'requests': 0, 'throttled': 0, 'seconds': 0.0})
+            stats['requests'] += 1
+            if wait:
+                stats['throttled'] += 1
+                stats['seconds'] += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def backoff(self, host):
+        """ Empties the bucket of host after it reported being overloaded
+
+        :param host: base url of the host
+        :type host: str.
+        """
+        with self.lock:
+            if host in self.hosts:
+                self.hosts[host].drain(_clock())
+
+    def request(self, send, connection, path, method, args, body, headers):
+        """ Transport layer entry, see Transport """
+        host = connection.base_url
+        waited = self.acquire(host)
+        if waited:
+            LOGGER.debug("Throttled %s %s%s for %.3fs", method, host, path, waited)
+        response = send(connection, path, method, args, body, headers)
+        if getattr(response, 'status', None) == 503:
+            LOGGER.info("%s is overloaded, backing off.", host)
+            self.backoff(host)
+        return response
+
+    def throttled(self):
+        """ Total seconds requests waited for the budgets """
+        with self.lock:
+            return sum(stats['seconds'] for stats in self.stats.values())
+
+    def report(self):
+        """ Lines describing the requests sent and the time spent throttled for every host
+
+        :returns: list of strings
+        """
+        with self.lock:
+            lines = ['%s: %s requests, %s throttled, %.2fs waiting\n' % \
+                     (host, stats['requests'], stats['throttled'], stats['seconds']) \
+                     for host, stats in sorted(self.stats.items())]
+        return lines
+
+
+class ConditionalCache(object):
+    """ Transport layer remembering the ETag and body of GET responses per host and path.
+    Repeated GETs carry If-None-Match and a 304 response is answered with the remembered body,
+    so unchanged resources are not downloaded again. Other methods forget the entries of the
+    resource they modify. The entries of a host are kept between runs in the cache directory
+    of its session, and go away with it at logout. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locate = None
+        self.hosts = dict()
+        self.changed = set()
+        self.hits = self.misses = self.saved = 0
+
+    def configure(self, locate=None):
+        """ Sets the function giving the directory keeping the entries of a host between runs
+
+        :param locate: function taking the base url of a host and returning its directory,
+                       entries are kept in memory only if not provided
+        :type locate: function.
+        """
+        with self.lock:
+            self.locate = locate
+
+    def _filename(self, host):
+        return os.path.join(self.locate(host), ETAG_FILE) if self.locate else None
+
+    def _entries(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = dict()
+            filename = self._filename(host)
+            if filename:
+                try:
+                    with open(filename, 'r') as entryfh:
+                        self.hosts[host] = json.load(entryfh)
+                except (IOError, OSError, ValueError):
+                    pass
+        return self.hosts[host]
+
+    @staticmethod
+    def _key(path, args):
+        return path + ('?' + json.dumps(args, sort_keys=True) if args else '')
+
+    @staticmethod
+    def _base(path):
+        return path.split('?')[0].lower().rstrip('/').replace('/settings', '')
+
+    def request(self, send, connection, path, method, args, body, headers):
+        """ Transport layer entry, see Transport """
+        host = connection.base_url
+        if method != 'GET':
+            if method != 'HEAD':
+                self.forget(host, path)
+            return send(connection, path, method, args, body, headers)
+
+        key = self._key(path, args)
+        with self.lock:
+            entry = self._entries(host).get(key)
+        if entry and not any(name.lower() == 'if-none-match' for name in (headers or {})):
+            headers = dict(headers or {})
+            headers['If-None-Match'] = entry['etag']
+
+        response = send(connection, path, method, args, body, headers)
+        status = getattr(response, 'status', None)
+        if status == 304 and entry:
+            with self.lock:
+                self.hits += 1
+                self.saved += len(entry['body'])
+            return StaticRestResponse(restreq=response.request, Status=entry['status'],
+                                      Headers=entry['headers'], Content=entry['body'])
+
+        with self.lock:
+            self.misses += 1
+        if status == 200:
+            etag = response.getheader('etag')
+            if etag and 'json' in (response.getheader('content-type') or ''):
+                with self.lock:
+                    self._entries(host)[key] = {'etag': etag, 'status': status,
+                                                'headers': dict(response.getheaders()),
+                                                'body': response.read}
+                    self.changed.add(host)
+            elif entry:
+                self.forget(host, path)
+        return response
+
+    def forget(self, host, path):
+        """ Drops the entries of a resource and of its settings resource
+
+        :param host: base url of the host
+        :type host: str.
+        :param path: path of the resource
+        :type path: str.
+        """
+        base = self._base(path)
+        with self.lock:
+            entries = self._entries(host)
+            for key in [key for key in entries if self._base(key) == base]:
+                del entries[key]
+                self.changed.add(host)
+
+    def save(self):
+        """ Writes the entries of the hosts that changed, for the hosts whose session is
+        still cached """
+        with self.lock:
+            for host in self.changed:
+                filename = self._filename(host)
+                if not filename or not os.path.isdir(os.path.dirname(filename)):
+                    continue
+                try:
+                    atomic_write(filename, json.dumps(self.hosts[host]))
+                except (IOError, OSError) as excp:
+                    LOGGER.warning("Unable to save the ETags of %s: %s", host, excp)
+            self.changed.clear()
+
+    def report(self):
+        """ Line describing the hits, misses and bytes not downloaded again
+
+        :returns: str
+        """
+        with self.lock:
+            return '%s hits, %s misses, %.1f KiB not downloaded again\n' % \
+                (self.hits, self.misses, self.saved / 1024.0)
+
+
+TRANSPORT = Transport()
+RATE_LIMITER = RateLimiter()
+CONDITIONAL_CACHE = ConditionalCache()
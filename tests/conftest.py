@@ -0,0 +1,64 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Fixtures of the RDMC tests, run with python -m pytest tests from the top of the tree."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'src'))
+
+from rdmc_mockserver import MockServer, MockTree
+
+
+@pytest.fixture(params=[True, False], ids=['directory', 'nodirectory'])
+def mockserver(request):
+    """ Mock iLO 5 server, with and without a resource directory """
+    server = MockServer(MockTree(drives=4, entries=5, attributes=20, directory=request.param),
+                        port=0).start()
+    yield server
+    server.stop()
+
+
+def command():
+    """ Command engine of iLOrest, a new one for every command line like the executable """
+    import versioning
+    from rdmc import RdmcCommand
+    from rdmc_base_classes import RdmcOptionParser
+
+    return RdmcCommand(Args=[], name=versioning.__shortname__,
+                       usage=versioning.__shortname__ + ' [command]',
+                       summary='HPE RESTful Interface Tool', aliases=[versioning.__shortname__],
+                       argparser=RdmcOptionParser())
+
+
+@pytest.fixture
+def rdmc():
+    """ Command engine of iLOrest, run with rdmc.run(arguments) """
+    return command()
+
+
+@pytest.fixture
+def ilorest(tmpdir):
+    """ Runs an iLOrest command line with a cache directory of the test, returning the return
+    code """
+    cachedir = str(tmpdir.mkdir('cache'))
+    return lambda *arguments: command().run(['--nologo', '--cache-dir', cachedir] +
+                                            list(arguments))
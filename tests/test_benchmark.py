@@ -0,0 +1,39 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Comparison of benchmark results with the baseline."""
+
+from rdmc_benchmark import compare, STAGES
+
+
+def _stages(**changes):
+    """ Results of every stage, with the stages in changes replaced """
+    stages = dict((stage, {'seconds': 1.0, 'peak': 1024}) for stage in STAGES)
+    stages.update(changes)
+    return {'resources/100': stages}
+
+
+def test_compare_reports_failing_stages():
+    """ A stage failing now or in the baseline is reported instead of being skipped """
+    failed = {'seconds': 0.0, 'peak': None, 'error': 'TypeError: failed'}
+    assert compare(_stages(), _stages()) == []
+    assert compare(_stages(load=failed), _stages()) == \
+        [('resources/100', 'load', 'error', None, 'TypeError: failed')]
+    assert compare(_stages(), _stages(load=failed)) == \
+        [('resources/100', 'load', 'baseline', 'TypeError: failed', None)]
+    assert compare(_stages(get={'seconds': 2.0, 'peak': 1024}), _stages()) == \
+        [('resources/100', 'get', 'seconds', 1.0, 2.0)]
@@ -0,0 +1,228 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Segment and pack stores, locks and shared pool of the session cache."""
+
+import os
+import json
+import multiprocessing
+
+import pytest
+
+from redfish.ris.ris import RisMonolithMemberv100
+
+from rdmc_cache import CacheLock, SegmentStore, PackStore, PackReader, SharedPool, \
+    LazyPaths, PACK_FILE, SEGMENT_DIR, segment_name
+from rdmc_helper import ReturnCodes
+
+FIRMWARE = 'iLO 5/2.44/2.44'
+WRITERS = 4
+
+
+def _member(path, majtype, **body):
+    """ Monolith member of a resource """
+    body.update({'@odata.id': path, '@odata.type': '#%s.%s' % (majtype, majtype.split('.')[0])})
+    member = RisMonolithMemberv100(None, True)
+    member.load_from_dict({'Type': body['@odata.type'], 'MajType': majtype, 'ETag': 'W/"1"',
+                           'OriginalUri': path, 'Content': json.dumps(body), 'Status': 200,
+                           'Headers': {}, 'Patches': [], 'modified': False})
+    return member
+
+
+def _members():
+    """ Members of two types, two drives and a BIOS """
+    drives = '/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/%s/'
+    return {drives % 0: _member(drives % 0, 'HpeSmartStorageDiskDrive.v2_1_0', Id='0'),
+            drives % 1: _member(drives % 1, 'HpeSmartStorageDiskDrive.v2_1_0', Id='1'),
+            '/redfish/v1/Systems/1/Bios/': _member('/redfish/v1/Systems/1/Bios/',
+                                                   'Bios.v1_0_0', Id='Bios')}
+
+
+def _restore(store, clientdir, metadata):
+    """ Members read back through a new store """
+    reader = type(store)()
+    pending = reader.open(clientdir, metadata, FIRMWARE)
+    members = dict()
+    for segment in set(pending.values()):
+        members.update(reader.read(clientdir, segment))
+    if isinstance(reader, PackStore):
+        reader.close()
+    return dict((path, json.loads(member['Content'])['Id']) for path, member in members.items())
+
+
+@pytest.mark.parametrize('store', [SegmentStore, PackStore], ids=['segments', 'pack'])
+def test_only_dirty_members_are_saved(tmpdir, store):
+    """ A save with every member clean writes nothing, a dirty member rewrites its own data
+    and keeps the others """
+    clientdir = str(tmpdir)
+    store = store()
+    members = _members()
+    clean = set()
+    written, metadata = store.save(clientdir, members, clean.__contains__, FIRMWARE)
+    assert sorted(written) == sorted(members)
+    clean.update(members)
+
+    files = [os.path.join(root, name) for root, _, names in os.walk(clientdir)
+             for name in names]
+    for name in files:
+        os.utime(name, ns=(0, 0))
+    assert store.save(clientdir, members, clean.__contains__, FIRMWARE)[0] == []
+    assert all(os.stat(name).st_mtime_ns == 0 for name in files)
+
+    bios = '/redfish/v1/Systems/1/Bios/'
+    members[bios] = _member(bios, 'Bios.v1_0_0', Id='Changed')
+    clean.discard(bios)
+    written, metadata = store.save(clientdir, members, clean.__contains__, FIRMWARE)
+    assert written == [bios]
+    if isinstance(store, SegmentStore):
+        drives = os.path.join(clientdir, SEGMENT_DIR,
+                              segment_name('HpeSmartStorageDiskDrive.v2_1_0'))
+        assert os.stat(drives).st_mtime_ns == 0
+    else:
+        store.close()
+    assert _restore(store, clientdir, metadata) == {
+        '/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/0/': '0',
+        '/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/1/': '1',
+        bios: 'Changed'}
+
+
+def test_restored_members_are_not_written_again(tmpdir):
+    """ Members of a restored monolith that were never loaded are not written again """
+    clientdir = str(tmpdir)
+    members = _members()
+    _, metadata = SegmentStore().save(clientdir, members, lambda path: False, FIRMWARE)
+
+    store = SegmentStore()
+    paths = LazyPaths(lambda segment: dict(), store.open(clientdir, metadata, FIRMWARE))
+    for name in os.listdir(os.path.join(clientdir, SEGMENT_DIR)):
+        os.utime(os.path.join(clientdir, SEGMENT_DIR, name), ns=(0, 0))
+    assert store.save(clientdir, paths, lambda path: False, FIRMWARE)[0] == []
+    assert all(os.stat(os.path.join(clientdir, SEGMENT_DIR, name)).st_mtime_ns == 0
+               for name in os.listdir(os.path.join(clientdir, SEGMENT_DIR)))
+
+
+def _pack(tmpdir):
+    """ Pack file of the members, returning its directory and contents """
+    clientdir = str(tmpdir)
+    store = PackStore()
+    store.save(clientdir, _members(), lambda path: False, FIRMWARE)
+    store.close()
+    with open(os.path.join(clientdir, PACK_FILE), 'rb') as packfile:
+        return clientdir, packfile.read()
+
+
+@pytest.mark.parametrize('size', [0, 5, 20], ids=['empty', 'header', 'index'])
+def test_pack_cut_short_is_rejected(tmpdir, size):
+    """ A pack cut short before the end of its index is not opened """
+    clientdir, data = _pack(tmpdir)
+    with open(os.path.join(clientdir, PACK_FILE), 'wb') as packfile:
+        packfile.write(data[:size])
+    with pytest.raises(ValueError):
+        PackStore().open(clientdir, {}, FIRMWARE)
+
+
+def test_corrupt_pack_is_rejected(tmpdir):
+    """ A file that is not a pack, or a pack of another firmware, is not opened """
+    clientdir, data = _pack(tmpdir)
+    with open(os.path.join(clientdir, PACK_FILE), 'wb') as packfile:
+        packfile.write(b'X' + data[1:])
+    with pytest.raises(ValueError, match='not a cache pack file'):
+        PackReader(os.path.join(clientdir, PACK_FILE))
+
+    with open(os.path.join(clientdir, PACK_FILE), 'wb') as packfile:
+        packfile.write(data)
+    with pytest.raises(ValueError, match='firmware'):
+        PackStore().open(clientdir, {}, 'iLO 5/2.44/2.50')
+
+
+def test_members_lost_from_a_pack_are_left_out(tmpdir):
+    """ Members whose data is cut off or corrupt are left out, the others are read """
+    clientdir, data = _pack(tmpdir)
+    reader = PackReader(os.path.join(clientdir, PACK_FILE))
+    index = reader.index
+    start = reader._start
+    reader.close()
+    first, last = sorted(index, key=lambda path: index[path][0])[::2]
+    offset = start + index[first][0]
+    data = data[:offset] + b'\0' * 4 + data[offset + 4:start + index[last][0] + 4]
+    with open(os.path.join(clientdir, PACK_FILE), 'wb') as packfile:
+        packfile.write(data)
+
+    store = PackStore()
+    pending = store.open(clientdir, {}, FIRMWARE)
+    members = dict()
+    for path in pending:
+        members.update(store.read(clientdir, path))
+    store.close()
+    assert sorted(members) == sorted(set(index) - set([first, last]))
+
+
+def _add_members(directory, writer):
+    """ Adds members of a writer to a shared pool and counts its writes in a JSON document """
+    pool = SharedPool(directory)
+    for index in range(5):
+        path = '/redfish/v1/Registries/Writer%s/%s/' % (writer, index)
+        pool.add({path: _member(path, 'MessageRegistryFile.v1_0_0', Id=path)})
+        pool.update_json('writes.json', {'%s-%s' % (writer, index): True})
+    with CacheLock(directory + '.count'):
+        with open(directory + '.count', 'r+') as countfile:
+            count = int(countfile.read() or 0)
+            countfile.seek(0)
+            countfile.write(str(count + 1))
+            countfile.truncate()
+
+
+def test_concurrent_writers_keep_every_member(tmpdir):
+    """ Processes adding to the same pool at the same time keep the members and entries of
+    every one of them """
+    directory = str(tmpdir.join('pool'))
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=_add_members, args=(directory, writer))
+               for writer in range(WRITERS)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    pool = SharedPool(directory)
+    assert len(pool.index()) == WRITERS * 5
+    assert all(pool.read(path)[path]['OriginalUri'] == path for path in pool.index())
+    assert len(pool.read_json('writes.json')) == WRITERS * 5
+    with open(directory + '.count') as countfile:
+        assert countfile.read() == str(WRITERS)
+
+
+def test_commands_only_write_what_they_change(mockserver, ilorest, tmpdir):
+    """ A command reading the session leaves the cached members as they are, a change
+    rewrites the segment of its type only """
+    assert ilorest('login', mockserver.url, '-u', 'admin', '-p', 'password') == \
+        ReturnCodes.SUCCESS
+    assert ilorest('select', 'Bios.') == ReturnCodes.SUCCESS
+    cachedir = str(tmpdir.join('cache'))
+    segments = [os.path.join(root, name) for root, _, names in os.walk(cachedir)
+                for name in names if os.path.basename(root) == SEGMENT_DIR]
+    assert segments
+    for name in segments:
+        os.utime(name, ns=(0, 0))
+
+    assert ilorest('get', 'MockAttribute0002') == ReturnCodes.SUCCESS
+    assert all(os.stat(name).st_mtime_ns == 0 for name in segments)
+
+    assert ilorest('set', 'MockAttribute0002=changed') == ReturnCodes.SUCCESS
+    changed = [name for name in segments if os.stat(name).st_mtime_ns]
+    assert [os.path.basename(name) for name in changed] == [segment_name('Bios.v1_0_0')]
@@ -0,0 +1,92 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Record and replay of REST traffic."""
+
+import os
+import json
+
+import pytest
+
+from redfish.rest.connections import HttpConnection
+
+from rdmc_cassette import Player, CASSETTE_FILE, REPLAY_TOKEN
+from rdmc_helper import ReturnCodes
+from rdmc_transport import Transport, TRANSPORT
+
+SYSTEM = '/redfish/v1/Systems/1/'
+
+
+@pytest.fixture
+def layers():
+    """ Takes the transport layers the commands of a test install out again """
+    installed = list(TRANSPORT.layers)
+    yield
+    for layer in [layer for layer in TRANSPORT.layers if layer not in installed]:
+        TRANSPORT.remove(layer)
+
+
+def _output(capsys):
+    """ JSON document printed by a command """
+    out = capsys.readouterr().out
+    return json.loads(out[out.index('{'):])
+
+
+def test_replay_serves_the_recorded_run(mockserver, ilorest, tmpdir, capsys, layers):
+    """ A run replayed from its cassette, without the server, gets the responses of the
+    recorded run. The session token is not written to the cassette. """
+    cassette = str(tmpdir.join('cassette'))
+    login = ['login', mockserver.url, '-u', 'admin', '-p', 'password']
+    assert ilorest('--record', cassette, *login) == ReturnCodes.SUCCESS
+    capsys.readouterr()
+    assert ilorest('--record', cassette, 'rawget', SYSTEM) == ReturnCodes.SUCCESS
+    recorded = _output(capsys)
+    assert recorded['@odata.id'] == SYSTEM
+    url = mockserver.url
+    mockserver.stop()
+
+    with open(os.path.join(cassette, CASSETTE_FILE)) as cassettefile:
+        interactions = [json.loads(line) for line in cassettefile]
+    tokens = [value for interaction in interactions for name, value in
+              interaction['headers'].items() if name.lower() == 'x-auth-token']
+    assert tokens and set(tokens) == set([REPLAY_TOKEN])
+
+    replay = ['--replay', cassette, '--cache-dir', str(tmpdir.mkdir('replay'))]
+    assert ilorest(*(replay + ['login', url, '-u', 'admin', '-p', 'password'])) == \
+        ReturnCodes.SUCCESS
+    capsys.readouterr()
+    assert ilorest(*(replay + ['rawget', SYSTEM])) == ReturnCodes.SUCCESS
+    assert _output(capsys) == recorded
+
+
+def test_requests_not_recorded_get_a_404(mockserver, tmpdir):
+    """ Requests missing from the cassette are answered 404, requests recorded several times
+    get their responses in order and the last one again afterwards """
+    cassette = tmpdir.join('cassette')
+    cassette.mkdir()
+    cassette.join(CASSETTE_FILE).write('\n'.join(json.dumps(
+        {'key': 'GET ' + SYSTEM, 'status': status, 'reason': '', 'headers': {},
+         'seconds': 0, 'body': ''}) for status in (200, 503)) + '\n')
+    player = Player(str(cassette))
+    transport = Transport()
+    transport.layers.append(player)
+    connection = HttpConnection(mockserver.url, {})
+
+    statuses = [transport.request(connection, path).status for path in
+                (SYSTEM, SYSTEM, '/redfish/v1/Chassis/1/', SYSTEM)]
+    assert statuses == [200, 503, 404, 503]
+    assert player.missed == 1
@@ -0,0 +1,98 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Completion index and completer of the interactive mode."""
+
+from prompt_toolkit.document import Document
+
+from rdmc_completer import CompletionTrie, TabAndHistoryCompletionClass
+
+PATHS = ['AssetTag', 'Attributes', 'Attributes/Boot', 'Attributes/Boot/Mode',
+         'Attributes/BootOrder']
+
+
+def _completions(completer, text):
+    """ Completion texts of a command line """
+    return [completion.text for completion in
+            completer.get_completions(Document(text), None)]
+
+
+def test_trie_completes_prefixes():
+    """ Words are completed in order, a prefix no word starts with completes to nothing """
+    trie = CompletionTrie(['set', 'select', 'save', 'serverinfo'])
+    assert trie.complete('se') == ['select', 'serverinfo', 'set']
+    assert trie.complete('select') == ['select']
+    assert trie.complete('') == ['save', 'select', 'serverinfo', 'set']
+    assert trie.complete('x') == []
+
+
+def test_trie_add_after_complete():
+    """ Completions are kept until a word is added below them, the lists returned before
+    are left as they were """
+    trie = CompletionTrie(['set', 'select'])
+    completed = trie.complete('se')
+    assert trie.complete('se') is completed
+    assert trie.complete('s') == ['select', 'set']
+
+    trie.add('serverinfo')
+    assert completed == ['select', 'set']
+    assert trie.complete('se') == ['select', 'serverinfo', 'set']
+    assert trie.complete('s') == ['select', 'serverinfo', 'set']
+
+    trie.add('save')
+    assert trie.complete('se') == ['select', 'serverinfo', 'set']
+    assert trie.complete('s') == ['save', 'select', 'serverinfo', 'set']
+
+
+def test_trie_stops_at_a_level():
+    """ With a stop character the words end at the next level of a path """
+    trie = CompletionTrie(PATHS)
+    assert trie.complete('A', stop='/') == ['AssetTag', 'Attributes']
+    assert trie.complete('Attributes/', stop='/') == ['Attributes/Boot', 'Attributes/BootOrder']
+    assert trie.complete('Attributes/Boot/', stop='/') == ['Attributes/Boot/Mode']
+    assert trie.complete('A') == sorted(PATHS)
+
+    trie.add('Attributes/Boot/Order')
+    assert trie.complete('Attributes/Boot/', stop='/') == ['Attributes/Boot/Mode',
+                                                            'Attributes/Boot/Order']
+    assert trie.complete('Attributes/', stop='/') == ['Attributes/Boot', 'Attributes/BootOrder']
+
+
+def test_completer_completes_one_level_of_the_properties():
+    """ get and list complete the properties one level at a time, get leaves out the
+    properties it does not show """
+    completer = TabAndHistoryCompletionClass({'get': [], 'list': [], 'select': []})
+    completer.updates_tab_completion_lists({'nestedprop': {
+        '@odata.id': '/redfish/v1/Systems/1/Bios/', 'AssetTag': 'tag',
+        'Attributes': {'Boot': {'Mode': 'Uefi'}, 'BootOrder': []}}})
+    assert _completions(completer, 'get ') == ['AssetTag', 'Attributes']
+    assert _completions(completer, 'list ') == ['@odata.id', 'AssetTag', 'Attributes']
+    assert _completions(completer, 'get Attributes/') == ['Boot', 'BootOrder']
+    assert _completions(completer, 'get Attributes/Boot/M') == ['Mode']
+    assert _completions(completer, 'g') == ['get']
+
+
+def test_completer_follows_updated_lists():
+    """ Lists updated after they were completed are completed from their new words """
+    completer = TabAndHistoryCompletionClass({'select': []})
+    completer.updates_tab_completion_lists({'select': ['Bios.v1_0_0']})
+    assert _completions(completer, 'select B') == ['Bios.v1_0_0']
+
+    completer.updates_tab_completion_lists({'select': ['Bios.v1_0_0', 'Boot.v1_0_0'],
+                                            'nestedprop': {'Mode': 'Uefi'}})
+    assert _completions(completer, 'select B') == ['Bios.v1_0_0', 'Boot.v1_0_0']
+    assert _completions(completer, 'get ') == ['Mode']
@@ -0,0 +1,74 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Monoliths crawled at login against the ones loaded by the library."""
+
+from rdmc_crawl import build_monolith
+from rdmc_monolith import RdmcApp, normalize_id
+
+
+def _session(path):
+    """ Session resources are created by every login """
+    return 'SessionService/Sessions/' in path and not path.endswith('Sessions/')
+
+
+def _snapshot(monolith):
+    """ Members, types, collection tree and @odata.id index of a monolith, without the
+    session of the login """
+    return {
+        'paths': [path for path in monolith.paths if not _session(path)],
+        'typesadded': [(key, [path for path in paths if not _session(path)]) for key, paths in
+                       monolith.typesadded.items()],
+        'ctree': [(key, [path for path in paths if not _session(path)]) for key, paths in
+                  monolith.ctree.items()],
+        'colltypes': sorted((str(key), sorted(paths)) for key, paths in
+                            monolith.colltypes.items()),
+        'byid': dict((key, paths) for key, paths in monolith._byid.items() if
+                     not any(_session(path) for path in paths)),
+    }
+
+
+def _login(url, tmpdir, workers=None):
+    """ Logs in to url, loading the monolith with the library or crawling it with workers """
+    app = RdmcApp(showwarnings=False, cache_dir=str(tmpdir))
+    if workers is None:
+        app.login(username='admin', password='password', base_url=url)
+    else:
+        app.login(username='admin', password='password', base_url=url, skipbuild=True)
+        build_monolith(app, workers=workers)
+    snapshot = _snapshot(app.monolith)
+    app.logout()
+    return snapshot
+
+
+def test_crawl_matches_library_load(mockserver, tmpdir):
+    """ The crawl gives the members, types, tree and @odata.id index of a library load """
+    loaded = _login(mockserver.url, tmpdir.mkdir('load'))
+    crawled = _login(mockserver.url, tmpdir.mkdir('crawl'), workers=6)
+    assert crawled == loaded
+    assert crawled['byid'] == dict((normalize_id(path), set([path])) for path in
+                                   crawled['paths'])
+
+
+def test_crawl_workers_build_the_same_monolith(mockserver, tmpdir):
+    """ Crawling with one worker or with six gives the same members in the same order, the
+    same types, tree and collection types """
+    single = _login(mockserver.url, tmpdir.mkdir('single'), workers=1)
+    pooled = _login(mockserver.url, tmpdir.mkdir('pooled'), workers=6)
+    for key in ('paths', 'typesadded', 'ctree', 'colltypes'):
+        assert pooled[key] == single[key], key
+    assert single['paths']
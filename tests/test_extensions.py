@@ -0,0 +1,33 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Command manifest of the extensions."""
+
+import extensions
+
+
+def test_manifest_follows_the_extension_sources(tmpdir, monkeypatch):
+    """ A manifest is used until the extension sources it was built from change """
+    monkeypatch.setattr(extensions, 'manifestFile', str(tmpdir.join('manifest.json')))
+    names = extensions.command_class_names()
+    extensions.write_manifest([], version='1.0')
+    assert extensions.tree_digest() is extensions.tree_digest()
+    assert extensions.load_manifest(version='1.0') == []
+    assert extensions.load_manifest(version='2.0') is None
+    monkeypatch.setattr(extensions, '_digest', ['changed'])
+    assert extensions.load_manifest(version='1.0') is None
+    assert extensions.command_class_names() == names
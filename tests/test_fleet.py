@@ -0,0 +1,111 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Multiple server runs."""
+
+import json
+
+import pytest
+
+from rdmc_fleet import read_targets, SUMMARY_FILE, OUTPUT_FILE
+from rdmc_helper import InvalidFileInputError, ReturnCodes
+
+DRIVES = '/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/%s/'
+
+
+def test_targets_are_listed_once(tmpdir):
+    """ The log and the result of a server are kept by its name, a server listed twice is
+    rejected instead of overwriting the other """
+    servers = tmpdir.join('servers.txt')
+    servers.write('--url https://10.0.0.1 -u admin -p password\n'
+                  '--url https://10.0.0.2 -u admin -p password\n'
+                  '--url 10.0.0.1 -u admin -p password\n')
+    with pytest.raises(InvalidFileInputError, match="'10.0.0.1' on line 3"):
+        read_targets(str(servers))
+
+    servers.write('--url https://10.0.0.1 -u admin -p password\n'
+                  '--url https://10.0.0.2 -u admin -p password\n')
+    assert [name for name, _ in read_targets(str(servers))] == ['10.0.0.1', '10.0.0.2']
+
+
+def _targets(mockserver, tmpdir):
+    """ Targets file with a server that logs in and one that does not, returning the file and
+    the names of both """
+    good = mockserver.url.split('//')[-1]
+    bad = good.replace('127.0.0.1', 'localhost')
+    servers = tmpdir.join('servers.txt')
+    servers.write('--url %s -u admin -p password\n'
+                  '--url %s -u admin -p wrongpassword\n' % (mockserver.url,
+                                                            mockserver.url.replace(good, bad)))
+    return str(servers), good, bad
+
+
+def test_targets_run_in_sessions_of_their_own(mockserver, ilorest, tmpdir, capsys):
+    """ Each server of --targets gets a record of its own, a failing server does not fail the
+    other one """
+    servers, good, bad = _targets(mockserver, tmpdir)
+    assert ilorest('--targets', servers, '--parallel', '2', 'rawget', '/redfish/v1/') == \
+        ReturnCodes.MULTIPLE_SERVER_CONFIG_FAIL
+
+    records = dict((record['target'], record) for record in
+                   [json.loads(line) for line in capsys.readouterr().out.splitlines()
+                    if line.startswith('{')])
+    assert sorted(records) == sorted([good, bad])
+    assert records[good]['status'] == 'SUCCESS'
+    assert records[good]['data']['@odata.id'] == '/redfish/v1/'
+    assert records[bad]['status'] == 'FAILED'
+    assert records[bad]['returncode'] != ReturnCodes.SUCCESS
+    assert '@odata.id' not in records[bad]['stdout']
+
+
+def test_multiple_server_load_logs_every_server(mockserver, ilorest, tmpdir):
+    """ A multiple server load writes a log for each server and a summary of both, with the
+    changes loaded to the server that logged in """
+    filename = str(tmpdir.join('ilorest.json'))
+    assert ilorest('login', mockserver.url, '-u', 'admin', '-p', 'password') == \
+        ReturnCodes.SUCCESS
+    assert ilorest('save', '--select', 'HpeSmartStorageDiskDrive.', '-f', filename) == \
+        ReturnCodes.SUCCESS
+    assert ilorest('logout') == ReturnCodes.SUCCESS
+    with open(filename) as savefile:
+        entries = json.load(savefile)
+    for entry in entries:
+        for instances in entry.values():
+            if DRIVES % 2 in instances:
+                instances[DRIVES % 2]['DiskDriveUse'] = 'Spare'
+    with open(filename, 'w') as savefile:
+        json.dump(entries, savefile)
+
+    servers, good, bad = _targets(mockserver, tmpdir)
+    outputdir = tmpdir.mkdir('logs')
+    assert ilorest('load', '-f', filename, '-m', servers, '-o', str(outputdir),
+                   '--workers', '2') == ReturnCodes.MULTIPLE_SERVER_CONFIG_FAIL
+    assert mockserver.tree.resources[(DRIVES % 2).lower()]['DiskDriveUse'] == 'Spare'
+
+    createdir = outputdir.listdir()[0]
+    with open(str(createdir.join(SUMMARY_FILE))) as summaryfile:
+        summary = json.load(summaryfile)
+    assert (summary['succeeded'], summary['failed'], summary['pending']) == (1, 1, 0)
+    statuses = dict((target['name'], target['status']) for target in summary['targets'])
+    assert statuses == {good: 'SUCCESS', bad: 'FAILED'}
+
+    logs = dict((target['name'], createdir.join(target['log']).read())
+                for target in summary['targets'])
+    assert 'Changes are being made to path: %s' % (DRIVES % 2) in logs[good]
+    assert 'please login again' in logs[bad]
+    assert 'Loading configuration' not in logs[bad]
+    assert all('Output for ' + name in createdir.join(OUTPUT_FILE).read() for name in logs)
@@ -0,0 +1,36 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Arguments of flashfwpkg."""
+
+import pytest
+
+from rdmc_helper import ReturnCodes
+
+
+@pytest.mark.parametrize('rollout', [False, True], ids=['single', 'rollout'])
+def test_flashfwpkg_rejects_other_files(rdmc, tmpdir, capsys, rollout):
+    """ Files that are not .fwpkg files are rejected before anything is flashed """
+    component = tmpdir.join('component.zip')
+    component.write('not a fwpkg file')
+    servers = tmpdir.join('servers.txt')
+    servers.write('--url https://127.0.0.1:1 -u admin -p password\n')
+    arguments = ['--nologo', '--cache-dir', str(tmpdir), 'flashfwpkg', str(component)]
+    if rollout:
+        arguments += ['--rollout', str(servers)]
+    assert rdmc.run(arguments) == ReturnCodes.INVALID_FILE_INPUT_ERROR
+    assert 'valid .fwpkg file type' in capsys.readouterr().err
@@ -0,0 +1,118 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Load through the indexes of the monolith against the library load."""
+
+import copy
+import json
+
+from redfish.ris import RmcApp
+
+from rdmc_monolith import RdmcApp, TYPEPATH
+from rdmc_helper import ReturnCodes
+
+DRIVES = '/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/%s/'
+BIOS = '/redfish/v1/Systems/1/Bios/'
+SETTINGS = BIOS + 'Settings/'
+
+
+def _resource(mockserver, path):
+    """ Resource of the mock server """
+    return mockserver.tree.resources[path.lower()]
+
+
+def _save(ilorest, mockserver, tmpdir, selector):
+    """ Logs in and saves the instances of selector, returning the file and its entries """
+    assert ilorest('login', mockserver.url, '-u', 'admin', '-p', 'password') == \
+        ReturnCodes.SUCCESS
+    filename = str(tmpdir.join('ilorest.json'))
+    assert ilorest('save', '--select', selector, '-f', filename) == ReturnCodes.SUCCESS
+    with open(filename) as savefile:
+        return filename, json.load(savefile)
+
+
+def _change(filename, entries, changes):
+    """ Writes entries to filename with the changes of the instances by @odata.id """
+    for entry in entries:
+        for instances in entry.values():
+            for path, body in instances.items():
+                if isinstance(body, dict):
+                    body.update(changes.get(path, {}))
+    with open(filename, 'w') as savefile:
+        json.dump(entries, savefile)
+
+
+def test_load_patches_every_instance_of_a_type(mockserver, ilorest, tmpdir):
+    """ Every changed instance of a type with several instances is patched, the others are
+    left alone """
+    filename, entries = _save(ilorest, mockserver, tmpdir, 'HpeSmartStorageDiskDrive.')
+    _change(filename, entries, {DRIVES % 1: {'DiskDriveUse': 'Spare'},
+                                DRIVES % 3: {'DiskDriveUse': 'Raw'}})
+    assert ilorest('load', '-f', filename) == ReturnCodes.SUCCESS
+    assert [_resource(mockserver, DRIVES % index)['DiskDriveUse'] for index in range(4)] == \
+        ['Data', 'Spare', 'Data', 'Raw']
+
+
+def test_load_patches_the_settings(mockserver, ilorest, tmpdir):
+    """ BIOS changes are patched to the settings resource """
+    filename, entries = _save(ilorest, mockserver, tmpdir, 'Bios.')
+    current = copy.deepcopy(_resource(mockserver, BIOS))
+    _change(filename, entries, {SETTINGS: {'Attributes': {'MockAttribute0002': 'loaded'}}})
+    assert ilorest('load', '-f', filename) == ReturnCodes.SUCCESS
+    assert _resource(mockserver, SETTINGS)['Attributes']['MockAttribute0002'] == 'loaded'
+    assert _resource(mockserver, BIOS) == current
+
+
+def test_loadset_patches_what_the_library_patches(mockserver, tmpdir):
+    """ Selecting only the instance of the @odata.id patches the same instances with the same
+    changes as the library going through every instance """
+    app = RdmcApp(showwarnings=False, cache_dir=str(tmpdir))
+    app.login(username='admin', password='password', base_url=mockserver.url)
+    TYPEPATH.use(app.typepath)
+    cases = [('HpeSmartStorageDiskDrive.', dict(_resource(mockserver, DRIVES % index),
+                                                 DiskDriveUse='Spare')) for index in range(4)]
+    cases += [('HpeSmartStorageDiskDrive.', {'@odata.id': DRIVES % 9, 'DiskDriveUse': 'Spare'}),
+              ('Bios.', {'@odata.id': SETTINGS, 'Attributes': {'MockAttribute0002': 'set'}}),
+              ('Bios.', {'@odata.id': BIOS, 'Attributes': {'MockAttribute0002': 'set'}})]
+    try:
+        for selector, seldict in cases:
+            outcomes = []
+            for loadset in (app.loadset, lambda **kwargs: RmcApp.loadset(app, **kwargs)):
+                app.select(selector=selector)
+                for member in app.monolith.paths.values():
+                    member.patches = []
+                outcomes.append((loadset(seldict=copy.deepcopy(seldict)), sorted(
+                    path for path, member in app.monolith.paths.items() if member.patches)))
+            assert outcomes[0] == outcomes[1], seldict['@odata.id']
+    finally:
+        app.logout()
+
+
+def test_schemas_are_verified_like_the_library(mockserver, tmpdir):
+    """ Looking the schemas and registries up in the index finds what the library finds """
+    app = RdmcApp(showwarnings=False, cache_dir=str(tmpdir))
+    app.login(username='admin', password='password', base_url=mockserver.url)
+    TYPEPATH.use(app.typepath)
+    try:
+        for schemapath, regpath in ((app.typepath.schemapath, app.typepath.regpath),
+                                    (BIOS.lower(), SETTINGS.lower()),
+                                    (BIOS.lower(), DRIVES % 9)):
+            app.typepath.schemapath, app.typepath.regpath = schemapath, regpath
+            assert app._verifyschemasdownloaded(app.monolith) == \
+                RmcApp._verifyschemasdownloaded(app, app.monolith), (schemapath, regpath)
+    finally:
+        app.logout()
@@ -0,0 +1,63 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""RdmcApp against the redfish library: the typepath its validation reads in sessions of several
+threads and the arguments of its calls."""
+
+import threading
+
+from redfish.ris.validation import Typepathforval
+
+from rdmc_monolith import RdmcApp, TYPEPATH
+
+
+def test_sessions_validate_with_their_typepath():
+    """ Every thread validates with the typepath of its session, also after an app is created """
+    apps = [RdmcApp(), RdmcApp()]
+    for index, app in enumerate(apps):
+        app.typepath.flagiften = index
+    ready = threading.Barrier(len(apps))
+    seen = dict()
+
+    def run(index):
+        TYPEPATH.use(apps[index].typepath)
+        ready.wait()
+        if index:
+            RdmcApp()
+        ready.wait()
+        seen[index] = Typepathforval.typepath.flagiften
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(apps))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen == {0: 0, 1: 1}
+    assert apps[0].typepath is not TYPEPATH
+
+
+def test_loadset_takes_latestschema(mockserver, tmpdir):
+    """ Set and load pass latestschema whether or not the library still takes it """
+    app = RdmcApp(showwarnings=False, cache_dir=str(tmpdir))
+    app.login(username='admin', password='password', base_url=mockserver.url)
+    TYPEPATH.use(app.typepath)
+    try:
+        app.select(selector='Bios.')
+        assert app.loadset(seldict={'Attributes': {'MockAttribute0002': 'changed'}},
+                           latestschema=True)
+    finally:
+        app.logout()
@@ -0,0 +1,105 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Daemon mode of the serve command."""
+
+import os
+import json
+import time
+import socket
+import threading
+
+import pytest
+
+from rdmc_helper import ReturnCodes
+
+REQUESTS = 5
+# resources of the clients, each with a text the other one does not have
+RESOURCES = [('/redfish/v1/Systems/1/Bios/', 'MockAttribute0002'),
+             ('/redfish/v1/Managers/1/LogServices/IEL/Entries/1/', 'Mock IEL event 1.')]
+
+
+@pytest.fixture
+def daemon(ilorest, tmpdir):
+    """ Socket of a serve daemon running in a thread of the test """
+    path = str(tmpdir.join('serve.sock'))
+    returncodes = []
+    thread = threading.Thread(target=lambda: returncodes.append(
+        ilorest('serve', '--socket', path)))
+    thread.daemon = True
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.1)
+    yield path
+    _requests(path, [{'action': 'shutdown'}])
+    thread.join(30)
+    assert returncodes == [ReturnCodes.SUCCESS]
+
+
+def _requests(path, requests):
+    """ Sends requests on a connection of its own, returning the lines sent back for every
+    request: its output followed by its response """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    stream = client.makefile('rwb')
+    replies = []
+    try:
+        for request in requests:
+            stream.write((json.dumps(request) + '\n').encode('utf-8'))
+            stream.flush()
+            lines = []
+            while not lines or 'returncode' not in lines[-1]:
+                lines.append(json.loads(stream.readline().decode('utf-8')))
+            replies.append(lines)
+    finally:
+        stream.close()
+        client.close()
+    return replies
+
+
+def test_clients_get_their_own_output(daemon, mockserver):
+    """ Two clients running commands on two targets at the same time only get the output
+    of their own commands """
+    hosts = ['127.0.0.1', 'localhost']
+    replies = dict()
+
+    def client(index):
+        """ Logs in to a target and reads a resource of it repeatedly """
+        url = mockserver.url.replace('127.0.0.1', hosts[index])
+        requests = [{'target': url, 'command': 'login %s -u admin -p password' % url}] + \
+            [{'target': url, 'command': 'rawget %s' % RESOURCES[index][0], 'id': number}
+             for number in range(REQUESTS)]
+        replies[index] = _requests(daemon, requests)
+
+    clients = [threading.Thread(target=client, args=(index,)) for index in range(2)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join(60)
+
+    for index in range(2):
+        assert len(replies[index]) == REQUESTS + 1
+        for number, lines in enumerate(replies[index][1:]):
+            response = lines[-1]
+            assert response['returncode'] == ReturnCodes.SUCCESS
+            assert response['id'] == number
+            assert hosts[index] in response['target']
+            output = ''.join(line['data'] for line in lines[:-1] if line['stream'] == 'stdout')
+            assert RESOURCES[index][1] in output
+            assert RESOURCES[1 - index][1] not in output
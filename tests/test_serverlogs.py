@@ -0,0 +1,53 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Log downloads of serverlogs."""
+
+import json
+
+import pytest
+
+from rdmc_helper import ReturnCodes
+from rdmc_mockserver import MockServer, MockTree
+
+ENTRIES = '/redfish/v1/Systems/1/LogServices/IML/Entries/'
+
+
+@pytest.fixture
+def mockserver():
+    """ Mock iLO 5 server with a resource directory, the log services are only found through
+    it """
+    server = MockServer(MockTree(drives=4, entries=5, attributes=20), port=0).start()
+    yield server
+    server.stop()
+
+
+def test_log_entries_are_read_once(mockserver, ilorest, tmpdir, monkeypatch):
+    """ The entries collection is read once, the entries it links to are fetched from the
+    members already read """
+    assert ilorest('login', mockserver.url, '-u', 'admin', '-p', 'password') == \
+        ReturnCodes.SUCCESS
+    paths = []
+    get = mockserver.tree.get
+    monkeypatch.setattr(mockserver.tree, 'get', lambda path: paths.append(path) or get(path))
+
+    filename = str(tmpdir.join('iml.txt'))
+    assert ilorest('serverlogs', '--selectlog=IML', '-f', filename) == ReturnCodes.SUCCESS
+    assert [path for path in paths if path.split('?')[0] == ENTRIES] == [ENTRIES]
+    with open(filename) as logfile:
+        assert [entry['Message'] for entry in json.load(logfile)] == \
+            ['Mock IML event %s.' % index for index in range(1, 6)]
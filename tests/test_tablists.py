@@ -0,0 +1,72 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Tab completion lists of the interactive mode."""
+
+from rdmc_helper import ReturnCodes
+
+from conftest import command
+
+
+class Completer(object):
+    """ Completer receiving the tab completion lists """
+
+    def __init__(self):
+        self.lists = []
+
+    def updates_tab_completion_lists(self, changes):
+        """ Keeps the lists handed to the completer """
+        self.lists.append(changes)
+
+
+def test_tab_lists_follow_the_monolith(mockserver, tmpdir):
+    """ The lists of a selection are built again once set or commit change the monolith, and
+    reused otherwise, also when going back to a selection """
+    rdmc = command()
+    assert rdmc.run(['--nologo', '--cache-dir', str(tmpdir), 'login', mockserver.url, '-u',
+                     'admin', '-p', 'password']) == ReturnCodes.SUCCESS
+    rdmc.app.restore()
+    rdmc._redobj = Completer()
+    built = []
+    get_tab_lists = rdmc.get_tab_lists
+
+    def record():
+        """ Builds the lists, keeping the selection and the attribute value they saw """
+        attributes = rdmc.app.getprops()[0].get('Attributes', {})
+        built.append((rdmc.app.selector, attributes.get('MockAttribute0002')))
+        return get_tab_lists()
+
+    rdmc.get_tab_lists = record
+
+    def interactive(line):
+        """ Runs a line the way the interactive mode does """
+        nargv = rdmc.run_line(rdmc.opts, line)
+        assert rdmc.retcode == ReturnCodes.SUCCESS
+        rdmc.check_for_tab_lists(nargv)
+        rdmc.wait_for_tab_lists()
+
+    for line in ['select Bios.', 'get MockAttribute0002', 'select ComputerSystem.',
+                 'select Bios.']:
+        interactive(line)
+    assert built == [('Bios.', 'Mock value 2'), ('computersystem.', None)]
+    assert len(rdmc._redobj.lists) == 3
+
+    del built[:]
+    for line in ['set MockAttribute0002=changed', 'get MockAttribute0002', 'commit',
+                 'get MockAttribute0002']:
+        interactive(line)
+    assert built == [('Bios.', 'changed'), ('Bios.', 'changed')]
@@ -0,0 +1,150 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Conditional request cache and rate limiter transport layers."""
+
+import time
+import base64
+
+import pytest
+
+from redfish.rest.connections import HttpConnection
+
+from rdmc_transport import Transport, ConditionalCache, RateLimiter, TRANSPORT
+
+SYSTEM = '/redfish/v1/Systems/1/'
+BIOS = '/redfish/v1/Systems/1/Bios/'
+AUTHORIZATION = {'Authorization': 'Basic ' + base64.b64encode(b'admin:password').decode('ascii')}
+
+
+class Recorder(object):
+    """ Transport layer keeping the requests that reach the server and their status """
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, send, connection, path, method, args, body, headers):
+        """ Transport layer entry, see Transport """
+        response = send(connection, path, method, args, body, headers)
+        self.requests.append((method, path, (headers or {}).get('If-None-Match'),
+                              response.status))
+        return response
+
+
+@pytest.fixture
+def transport():
+    """ Transport of the test, the layers installed by the commands of earlier tests are
+    taken out while it runs """
+    TRANSPORT.uninstall()
+    transport = Transport()
+    yield transport
+    transport.uninstall()
+    if TRANSPORT.layers:
+        TRANSPORT.install()
+
+
+def _connection(mockserver):
+    """ Connection of the library to the mock server """
+    return HttpConnection(mockserver.url, {})
+
+
+def test_unchanged_resources_are_not_downloaded_again(mockserver, transport):
+    """ A repeated GET is answered 304 by the server and with the remembered body by the
+    cache, a resource that changes is downloaded again """
+    cache, recorder = ConditionalCache(), Recorder()
+    transport.add(cache)
+    transport.add(recorder)
+    connection = _connection(mockserver)
+
+    first = connection.rest_request(SYSTEM, headers=dict(AUTHORIZATION))
+    second = connection.rest_request(SYSTEM, headers=dict(AUTHORIZATION))
+    assert (first.status, second.status) == (200, 200)
+    assert second.dict == first.dict
+    etag = first.getheader('etag')
+    assert recorder.requests == [('GET', SYSTEM, None, 200), ('GET', SYSTEM, etag, 304)]
+    assert (cache.hits, cache.misses, cache.saved) == (1, 1, len(first.read))
+
+    mockserver.tree.resources[SYSTEM.lower()]['AssetTag'] = 'changed elsewhere'
+    mockserver.tree.touch(SYSTEM)
+    third = connection.rest_request(SYSTEM, headers=dict(AUTHORIZATION))
+    assert recorder.requests[-1] == ('GET', SYSTEM, etag, 200)
+    assert third.dict['AssetTag'] == 'changed elsewhere'
+    assert third.getheader('etag') != etag
+
+
+def test_patch_forgets_the_resource(mockserver, transport):
+    """ A PATCH of a resource, or of its settings, forgets the body remembered for it """
+    cache, recorder = ConditionalCache(), Recorder()
+    transport.add(cache)
+    transport.add(recorder)
+    connection = _connection(mockserver)
+
+    for path in (SYSTEM, BIOS):
+        assert connection.rest_request(path, headers=dict(AUTHORIZATION)).status == 200
+    headers = dict(AUTHORIZATION, **{'Content-Type': 'application/json'})
+    assert connection.rest_request(SYSTEM, 'PATCH', body={'AssetTag': 'patched'},
+                                   headers=dict(headers)).status == 200
+    assert connection.rest_request(BIOS + 'Settings/', 'PATCH', body={'Attributes': {
+        'MockAttribute0002': 'patched'}}, headers=dict(headers)).status == 200
+    assert cache.hosts[mockserver.url] == dict()
+
+    system = connection.rest_request(SYSTEM, headers=dict(AUTHORIZATION))
+    assert system.dict['AssetTag'] == 'patched'
+    connection.rest_request(BIOS, headers=dict(AUTHORIZATION))
+    assert [request[2] for request in recorder.requests if request[0] == 'GET'] == \
+        [None] * 4
+    assert cache.hits == 0
+
+
+def test_requests_are_paced_by_the_bucket(mockserver, transport):
+    """ Requests over the burst wait for a token, n requests take at least
+    (n - burst) / rate seconds however long the server takes to answer """
+    limiter = RateLimiter()
+    limiter.configure(hostrate=4, hostburst=2)
+    transport.add(limiter)
+    connection = _connection(mockserver)
+
+    started = time.time()
+    for _ in range(6):
+        assert connection.rest_request('/redfish/v1/').status == 200
+    elapsed = time.time() - started
+
+    stats = limiter.stats[mockserver.url]
+    assert (stats['requests'], stats['throttled']) == (6, 4)
+    assert elapsed >= (6 - 2) / 4.0
+    assert 0 < stats['seconds'] <= (6 - 2) / 4.0
+    assert limiter.throttled() == stats['seconds']
+
+
+def test_overloaded_host_empties_its_bucket():
+    """ A 503 response makes the next request to the host wait for a token, the global
+    budget paces the requests of every host together """
+    limiter = RateLimiter()
+    limiter.configure(hostrate=10, hostburst=5)
+    assert limiter.acquire('https://a') == 0
+
+    limiter.request(lambda *args: type('Response', (object,), {'status': 503}),
+                    type('Connection', (object,), {'base_url': 'https://a'}),
+                    '/redfish/v1/', 'GET', None, None, None)
+    assert limiter.acquire('https://a') == pytest.approx(0.1, abs=0.02)
+    assert limiter.acquire('https://b') == 0
+
+    limiter.configure(globalrate=10, globalburst=1)
+    waits = [limiter.acquire(host) for host in ('https://a', 'https://b', 'https://c')]
+    assert waits[0] == 0
+    assert waits[1] == pytest.approx(0.1, abs=0.02)
+    assert waits[2] == pytest.approx(0.1, abs=0.02)